@@ -1,15 +1,19 @@
 from __future__ import annotations
 
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_init, worker_process_shutdown, worker_ready
 
 from app.core.config import settings
+from app.core.worker_runtime import runtime
+from app.services.asset_pipeline import disable_process_pool, shutdown_executor
 
 
 celery_app = Celery(
     "pod_trend",
     broker=settings.resolved_celery_broker_url,
     backend=settings.resolved_celery_result_backend,
-    include=["app.tasks.ingest"],
+    include=["app.tasks.designs", "app.tasks.ingest", "app.tasks.maintenance", "app.tasks.pricing", "app.tasks.publishing", "app.tasks.scoring"],
 )
 
 celery_app.conf.update(
@@ -18,4 +22,56 @@ celery_app.conf.update(
     result_serializer="json",
     timezone="UTC",
     enable_utc=True,
+    beat_schedule={
+        "snapshot-maintenance": {
+            "task": "snapshot_maintenance",
+            "schedule": crontab(hour=3, minute=15),
+        },
+        "sync-shopify-drafts": {
+            "task": "sync_shopify_drafts",
+            "schedule": crontab(minute="*/10"),
+        },
+        "refresh-printful-catalog": {
+            "task": "refresh_printful_catalog",
+            "schedule": crontab(minute=20, hour="*/6"),
+        },
+        "analytics-export": {
+            "task": "analytics_export",
+            "schedule": crontab(minute=35),
+        },
+        "design-cache-maintenance": {
+            "task": "design_cache_maintenance",
+            "schedule": crontab(hour=3, minute=45),
+        },
+        "canonicalize-niches": {
+            "task": "canonicalize_niches",
+            "schedule": crontab(hour=3, minute=55),
+        },
+        "rebuild-trend-rollups": {
+            "task": "rebuild_trend_rollups",
+            "schedule": crontab(hour=4, minute=5),
+        },
+    },
 )
+
+
+@worker_process_init.connect
+def _start_worker_runtime(**_kwargs) -> None:
+    # Runs in each forked child, so the loop, DB pool and clients are never
+    # shared across processes.
+    runtime.start()
+    # Pool children are daemonic and cannot fork a resize pool of their own.
+    disable_process_pool()
+
+
+@worker_process_shutdown.connect
+def _stop_worker_runtime(**_kwargs) -> None:
+    runtime.stop()
+    shutdown_executor()
+
+
+@worker_ready.connect
+def _refresh_catalog_on_start(**_kwargs) -> None:
+    # The API resolves variants from the shared snapshot; don't leave it empty until beat runs.
+    if settings.printful_api_key:
+        celery_app.send_task("refresh_printful_catalog")
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -31,12 +31,48 @@ class Settings(BaseSettings):
     postgres_port: int = 5432
 
     database_url: Optional[str] = None  # If set, overrides the composed postgres URL
+    database_read_url: Optional[str] = None  # Optional read replica for GET endpoints
+
+    # Connection pool (per engine, per process)
+    db_pool_size: int = 10
+    db_max_overflow: int = 10
+    db_pool_timeout_s: int = 30
+    db_pool_recycle_s: int = 1800
+    db_pool_pre_ping: bool = True
+    # asyncpg prepared statement cache; set to 0 behind pgbouncer (transaction mode)
+    db_statement_cache_size: int = 100
 
     # Redis / Celery
     redis_url: str = "redis://redis:6379/0"
     celery_broker_url: Optional[str] = None
     celery_result_backend: Optional[str] = None
 
+    # API response cache for read-heavy dashboard endpoints (invalidated by realtime events)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 512
+    response_cache_ttl_s: int = 300  # safety net for changes that emit no event
+    response_cache_redis: bool = False  # share cached bodies between API processes
+    response_cache_invalidate_events_csv: str = "ingest_completed,scoring_completed,products_ingested"
+    # Build list responses from row tuples and serialize with orjson, skipping model validation
+    api_fast_json: bool = False
+    # Streaming exports: rows fetched per server-side cursor round trip (and per Parquet row group)
+    export_chunk_size: int = 5000
+    # Incremental Parquet analytics export (local dir or pyarrow URI such as s3://bucket/analytics)
+    analytics_export_dir: str = ".cache/analytics"
+    analytics_export_chunk_size: int = 50_000
+    # Rows are exported once their timestamp is this old, so transactions still open (or not yet
+    # replicated) at export time are not skipped. Keep above the longest write transaction.
+    analytics_export_lag_s: int = 600
+
+    # Realtime events: worker-side progress publish rate (per run), and per-websocket throttling
+    realtime_progress_interval_s: float = 0.5
+    realtime_ws_progress_interval_s: float = 1.0
+    realtime_ws_max_queue: int = 200  # queued discrete events per connection before the oldest are dropped
+
+    # Celery worker runtime (shared per worker process)
+    worker_http_timeout_s: int = 30
+    worker_http_max_connections: int = 50
+
     # OpenAI
     openai_api_key: Optional[str] = None
     # Auth / Security
@@ -49,6 +85,98 @@ class Settings(BaseSettings):
     openai_model: str = "gpt-5-mini"
     openai_reasoning: str = "low"  # low|medium|high (for reasoning models)
     openai_timeout_s: int = 60
+    openai_embedding_model: str = "text-embedding-3-small"
+
+    # Niche canonicalization (app.services.niches)
+    niche_match_threshold: float = 0.86  # min cosine similarity to join an existing canonical niche
+    niche_memo_max_entries: int = 20_000  # per-process normalized string -> canonical id memo
+    niche_index_ttl_s: int = 600  # full centroid index reload interval (new niches load incrementally)
+
+    # Design rendering (runs in Celery workers): stable-diffusion | stub
+    design_renderer: str = "stable-diffusion"
+    sd_api_base: str = "https://your-stable-diffusion-api.example.com"
+    sd_api_key: Optional[str] = None
+    sd_timeout_s: int = 120
+    sd_max_concurrency: int = 4  # concurrent backend calls per worker task
+    sd_batch_size: int = 1  # prompts per backend call; >1 uses the /txt2img/batch endpoint
+    # Simulated render time for the stub renderer (per backend call / per image)
+    design_stub_latency_s: float = 0.0
+    design_stub_per_item_latency_s: float = 0.0
+
+    # Design asset storage (content-addressed): local | s3
+    asset_storage: str = "local"
+    asset_storage_dir: str = ".cache/assets"
+    asset_public_base_url: str = "/assets"  # CDN / bucket URL when using s3
+    asset_s3_bucket: Optional[str] = None
+    asset_s3_prefix: str = "designs"
+    asset_s3_endpoint_url: Optional[str] = None  # for S3-compatible providers (R2, MinIO, ...)
+    asset_s3_region: Optional[str] = None
+    asset_variant_widths_csv: str = "256,512,1024"  # WebP variants generated per image
+    asset_thumbnail_width: int = 256
+    asset_process_workers: int = 2  # resize process pool size; 0 resizes in a thread (always in Celery workers)
+
+    # Design render reuse cache
+    design_cache_enabled: bool = True
+    design_cache_max_entries: int = 50_000
+    design_cache_max_idle_days: int = 90
+
+    # Product snapshot storage
+    snapshot_partition_months_ahead: int = 3
+    snapshot_raw_retention_days: int = 30  # raw rows older than this are rolled up into daily buckets
+    snapshot_daily_retention_days: int = 180  # daily buckets older than this are rolled up into weekly buckets
+
+    # Incremental trend metrics
+    trend_momentum_ewma_alpha: float = 0.3
+
+    # Marketplace scraping (politeness, per marketplace)
+    scraper_concurrency_per_marketplace: int = 2
+    scraper_min_interval_s: float = 1.0
+    # Headless browser pool (requires playwright)
+    scraper_browser_contexts: int = 4
+    scraper_pages_per_context: int = 4
+    scraper_page_max_uses: int = 50
+    scraper_headless: bool = True
+    # Scraper HTTP response cache: off | cache | record | replay
+    scraper_cache_mode: str = "cache"
+    scraper_cache_dir: str = ".cache/scraper_responses"
+    scraper_cache_ttl_s: int = 900
+    scraper_cache_max_mb: int = 512
+
+    # Keyword rules for listing scoring / audience inference (defaults to the bundled JSON)
+    keyword_rules_path: Optional[str] = None
+
+    # Pricing
+    # Conversion rates to USD, used to compare peer prices across currencies.
+    fx_rates_to_usd_csv: str = "USD:1.0,EUR:1.08,GBP:1.27,CAD:0.73,AUD:0.66"
+    pricing_min_group_size: int = 5  # below this, fall back to median +/-15%
+    pricing_band_low_quantile: float = 0.25
+    pricing_band_high_quantile: float = 0.75
+
+    # Publishing (Printful sync products + Shopify drafts)
+    printful_api_key: Optional[str] = None
+    printful_base_url: str = "https://api.printful.com"
+    printful_rate_limit: int = 120  # calls per window
+    printful_rate_window_s: float = 60.0
+    printful_default_product_id: int = 71  # catalog product used when a request doesn't name one
+    printful_default_variant_id: int = 4012
+    # Catalog snapshot (gzip JSON in Redis), refreshed by the `refresh_printful_catalog` task
+    printful_catalog_check_interval_s: float = 60.0  # how often processes look for a newer snapshot
+    printful_catalog_product_max_age_s: int = 7 * 24 * 3600  # revalidate product details/prices after this
+    printful_catalog_refresh_concurrency: int = 4
+    shopify_shop_domain: Optional[str] = None
+    shopify_admin_token: Optional[str] = None
+    shopify_api_version: str = "2023-10"
+    shopify_bucket_size: int = 40  # REST leaky bucket; 400 on Shopify Plus
+    shopify_leak_rate: float = 2.0  # calls/s; 20 on Shopify Plus
+    # rest: one REST call per draft; bulk: one GraphQL bulk operation per publish batch
+    shopify_sync_mode: str = "rest"
+    # Shopify runs one bulk operation per shop at a time: awaiting jobs are drained by the
+    # `sync_shopify_drafts` task under a Redis lock (also run by beat as a safety net).
+    shopify_bulk_max_jobs: int = 5000  # jobs per bulk mutation
+    shopify_bulk_lock_timeout_s: int = 3 * 3600
+    shopify_bulk_retry_s: int = 60  # retry delay when the shop is busy or the sync failed
+    publish_concurrency: int = 8  # jobs in flight per worker task
+    publish_max_attempts: int = 5  # per HTTP call (429/5xx) and per job
 
     # Trend ingestion
     trend_rss_urls_csv: str = (
@@ -62,6 +190,22 @@ class Settings(BaseSettings):
     def trend_rss_urls(self) -> List[str]:
         return _split_csv(self.trend_rss_urls_csv)
 
+    @property
+    def response_cache_invalidate_events(self) -> List[str]:
+        return _split_csv(self.response_cache_invalidate_events_csv)
+
+    @property
+    def asset_variant_widths(self) -> List[int]:
+        return [int(w) for w in _split_csv(self.asset_variant_widths_csv)]
+
+    @property
+    def fx_rates_to_usd(self) -> Dict[str, float]:
+        rates: Dict[str, float] = {}
+        for pair in _split_csv(self.fx_rates_to_usd_csv):
+            code, _, rate = pair.partition(":")
+            rates[code.strip().upper()] = float(rate)
+        return rates
+
     @property
     def resolved_database_url(self) -> str:
         if self.database_url:
@@ -72,6 +216,10 @@ class Settings(BaseSettings):
             f"{self.postgres_port}/{self.postgres_db}"
         )
 
+    @property
+    def resolved_database_read_url(self) -> str:
+        return self.database_read_url or self.resolved_database_url
+
     @property
     def resolved_celery_broker_url(self) -> str:
         return self.celery_broker_url or self.redis_url
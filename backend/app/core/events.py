@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import json
+from typing import Optional
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+
+CHANNEL = "trend_events"
+
+
+async def publish_event(event: dict, *, client: Optional[redis.Redis] = None) -> None:
+    """Publish a realtime event on the shared Redis channel.
+
+    Pass a long-lived `client` where one exists (e.g. the worker runtime); otherwise
+    a short-lived connection is opened. Failures are swallowed: realtime events are
+    best-effort and must never break ingestion.
+    """
+    try:
+        if client is not None:
+            await client.publish(CHANNEL, json.dumps(event, default=str))
+            return
+        r = redis.from_url(settings.redis_url, decode_responses=True)
+        try:
+            await r.publish(CHANNEL, json.dumps(event, default=str))
+        finally:
+            await r.close()
+    except Exception:
+        pass
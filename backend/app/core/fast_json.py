@@ -0,0 +1,32 @@
+"""Fast JSON path for trusted DB output.
+
+With `API_FAST_JSON=true`, the hot list endpoints select plain row tuples
+(app.crud `*_rows` helpers) instead of ORM instances, zip them into dicts and
+serialize with orjson. This skips ORM identity-map work, per-field Pydantic
+validation and `jsonable_encoder`. The output matches the `response_model`
+schemas field for field; the rows come straight from typed columns, so there is
+nothing left to validate.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Iterable, List, Sequence
+
+import orjson
+from fastapi.responses import Response
+
+
+def dumps(obj: Any) -> bytes:
+    # orjson writes naive datetimes without an offset, exactly like Pydantic.
+    return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+def rows_to_dicts(keys: Sequence[str], rows: Iterable[Sequence[Any]]) -> List[dict]:
+    return [dict(zip(keys, row)) for row in rows]
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
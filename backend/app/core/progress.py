@@ -0,0 +1,94 @@
+"""Rate-coalesced progress events for long-running tasks.
+
+A task calls `ProgressReporter.update(...)` as often as it likes (per item is
+fine). Updates are merged into one state dict, and that state is published at most
+once per `REALTIME_PROGRESS_INTERVAL_S`. An update that arrives inside the interval
+schedules a single trailing publish, so the last state always goes out even if
+the task then stalls. Redis therefore sees a bounded rate per run, and every
+published event carries the full state, so dropping any of them is harmless.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from app.core.config import settings
+
+PublishFn = Callable[[dict], Awaitable[None]]
+
+
+class ProgressReporter:
+    def __init__(
+        self,
+        event_type: str,
+        publish: PublishFn,
+        *,
+        run_id: Optional[str] = None,
+        min_interval_s: Optional[float] = None,
+        **fields: Any,
+    ):
+        self.event_type = event_type
+        self.publish = publish
+        self.run_id = run_id
+        self.min_interval_s = settings.realtime_progress_interval_s if min_interval_s is None else min_interval_s
+        self.state: Dict[str, Any] = dict(fields)
+        self.fraction = 0.0
+        self.seq = 0
+        self.published = 0
+        self._started = time.monotonic()
+        self._last_publish = float("-inf")
+        self._dirty = False
+        self._trailing: Optional[asyncio.Task] = None
+
+    def event(self) -> dict:
+        elapsed = time.monotonic() - self._started
+        eta = None
+        if 0 < self.fraction < 1:
+            eta = round(elapsed * (1 - self.fraction) / self.fraction, 1)
+        return {
+            "type": self.event_type,
+            "run_id": self.run_id,
+            "seq": self.seq,
+            **self.state,
+            "percent": round(self.fraction * 100, 1),
+            "elapsed_s": round(elapsed, 1),
+            "eta_s": eta,
+        }
+
+    async def update(self, *, fraction: Optional[float] = None, **fields: Any) -> None:
+        """Merge `fields` into the state; publish now if the interval allows, else schedule it."""
+        self.state.update(fields)
+        if fraction is not None:
+            self.fraction = min(1.0, max(0.0, fraction))
+        self._dirty = True
+        wait = self._last_publish + self.min_interval_s - time.monotonic()
+        if wait <= 0:
+            await self._publish()
+        elif self._trailing is None:
+            self._trailing = asyncio.create_task(self._publish_after(wait))
+
+    async def _publish_after(self, delay: float) -> None:
+        await asyncio.sleep(delay)
+        self._trailing = None
+        await self._publish()
+
+    async def _publish(self) -> None:
+        if not self._dirty:
+            return
+        self._dirty = False
+        self._last_publish = time.monotonic()
+        self.seq += 1
+        self.published += 1
+        await self.publish(self.event())
+
+    async def close(self, **fields: Any) -> None:
+        """Publish the final state immediately (call once, when the run ends)."""
+        if self._trailing is not None:
+            self._trailing.cancel()
+            self._trailing = None
+        self.state.update(fields)
+        self.fraction = 1.0
+        self._dirty = True
+        await self._publish()
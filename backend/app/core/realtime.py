@@ -0,0 +1,165 @@
+"""Fan-out of realtime events to websocket clients, with per-client throttling.
+
+Each API process holds one Redis subscription (`EventHub`), no matter how many
+websockets are open. Every connection gets a `ClientStream`. Pushing into a
+stream never blocks, so a slow browser cannot hold up the listener or the other
+clients:
+
+- discrete events (`ingest_started`, `design_completed`, ...) are queued in
+  order; past `REALTIME_WS_MAX_QUEUE` the oldest are dropped and the client is
+  told how many with an `events_dropped` event;
+- progress events (`*_progress`) are coalesced per run: only the latest state
+  per (type, run) is kept, and it is sent at most once per
+  `REALTIME_WS_PROGRESS_INTERVAL_S`. Pending progress is flushed ahead of a
+  discrete event, so a run's final progress always precedes its `*_completed`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, deque
+from typing import AsyncIterator, Deque, Hashable, Optional, Set
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.core.events import CHANNEL
+
+log = logging.getLogger(__name__)
+
+
+def is_progress(event: dict) -> bool:
+    return str(event.get("type", "")).endswith("_progress")
+
+
+def _progress_key(event: dict) -> Hashable:
+    return (event.get("type"), event.get("run_id") or event.get("batch_id"))
+
+
+class ClientStream:
+    def __init__(self, *, progress_interval_s: float, max_queue: int):
+        self.progress_interval_s = progress_interval_s
+        self.max_queue = max_queue
+        self.dropped = 0
+        self._events: Deque[dict] = deque()
+        self._progress: "OrderedDict[Hashable, dict]" = OrderedDict()
+        self._last_progress = float("-inf")
+        self._wake = asyncio.Event()
+
+    def push(self, event: dict) -> None:
+        if is_progress(event):
+            key = _progress_key(event)
+            self._progress[key] = event
+            self._progress.move_to_end(key)
+        else:
+            # Keep per-run ordering: progress already received goes out before this event.
+            while self._progress:
+                self._enqueue(self._progress.popitem(last=False)[1])
+            self._enqueue(event)
+        self._wake.set()
+
+    def _enqueue(self, event: dict) -> None:
+        self._events.append(event)
+        while len(self._events) > self.max_queue:
+            self._events.popleft()
+            self.dropped += 1
+
+    async def events(self) -> AsyncIterator[dict]:
+        """Yield events as the throttle allows; runs until the consumer stops iterating."""
+        while True:
+            self._wake.clear()
+            if self.dropped:
+                dropped, self.dropped = self.dropped, 0
+                yield {"type": "events_dropped", "count": dropped}
+                continue
+            if self._events:
+                yield self._events.popleft()
+                continue
+            timeout = None
+            if self._progress:
+                wait = self._last_progress + self.progress_interval_s - time.monotonic()
+                if wait <= 0:
+                    self._last_progress = time.monotonic()
+                    pending = list(self._progress.values())
+                    self._progress.clear()
+                    for event in pending:
+                        yield event
+                    continue
+                timeout = wait
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class EventHub:
+    """One Redis subscription per process, fanned out to every connected `ClientStream`."""
+
+    def __init__(self, *, retry_delay_s: float = 5.0):
+        self.retry_delay_s = retry_delay_s
+        self._clients: Set[ClientStream] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def subscribe(self) -> ClientStream:
+        stream = ClientStream(
+            progress_interval_s=settings.realtime_ws_progress_interval_s,
+            max_queue=settings.realtime_ws_max_queue,
+        )
+        self._clients.add(stream)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._listen())
+        return stream
+
+    def unsubscribe(self, stream: ClientStream) -> None:
+        self._clients.discard(stream)
+
+    def broadcast(self, event: dict) -> None:
+        for stream in list(self._clients):
+            stream.push(event)
+
+    async def _listen(self) -> None:
+        while True:
+            r = redis.from_url(settings.redis_url, decode_responses=True)
+            pubsub = r.pubsub()
+            try:
+                await pubsub.subscribe(CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message.get("data")
+                    try:
+                        event = json.loads(data) if isinstance(data, str) else data
+                    except ValueError:
+                        event = {"type": "raw", "data": str(data)}
+                    if not isinstance(event, dict):
+                        event = {"type": "raw", "data": event}
+                    self.broadcast(event)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:  # noqa: BLE001
+                log.warning("realtime event listener disconnected: %s", e)
+            finally:
+                try:
+                    await pubsub.close()
+                    await r.close()
+                except Exception:  # noqa: BLE001
+                    pass
+            await asyncio.sleep(self.retry_delay_s)
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+event_hub = EventHub()
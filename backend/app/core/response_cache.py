@@ -0,0 +1,234 @@
+"""Response cache for read-heavy API endpoints.
+
+Dashboard polls hit the same handful of list/detail endpoints, whose data only
+changes when an ingest or re-score finishes. `ResponseCache.respond` serves the
+serialized JSON body from an in-process LRU (optionally backed by Redis so API
+processes share bodies), keyed by route path + sorted query params, with a strong
+ETag: a matching `If-None-Match` gets a bodiless 304.
+
+Entries are dropped when one of `RESPONSE_CACHE_INVALIDATE_EVENTS` arrives on the
+realtime channel (`listen_for_invalidations`, started in the app lifespan); the
+TTL only bounds staleness for changes that emit no event. Cached bodies are
+shared across users, so only use this for data every authenticated user may see.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional
+from urllib.parse import urlencode
+
+import redis.asyncio as redis
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+from app.core.events import CHANNEL
+
+log = logging.getLogger(__name__)
+
+REDIS_PREFIX = "resp_cache:"
+
+
+@dataclass
+class CachedBody:
+    body: bytes
+    etag: str
+    expires_at: float
+
+
+@dataclass
+class ResponseCacheStats:
+    hits: int = 0
+    misses: int = 0
+    not_modified: int = 0
+    invalidations: int = 0
+
+
+_adapters: Dict[Any, TypeAdapter] = {}
+
+
+def _adapter(model: Any) -> TypeAdapter:
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter
+
+
+def cache_key(request: Request) -> str:
+    return f"{request.url.path}?{urlencode(sorted(request.query_params.multi_items()))}"
+
+
+def make_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison, as for GET: W/"x" matches "x".
+    return etag in {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        ttl_s: float = 300.0,
+        redis_client: Optional[redis.Redis] = None,
+        enabled: bool = True,
+    ):
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.redis = redis_client
+        self.enabled = enabled
+        # Bumped on invalidation, so a body computed before it is never stored after it.
+        self.generation = 0
+        self.stats = ResponseCacheStats()
+        self._entries: "OrderedDict[str, CachedBody]" = OrderedDict()
+
+    def _put_local(self, key: str, entry: CachedBody) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[CachedBody]:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry.expires_at > now:
+                self._entries.move_to_end(key)
+                return entry
+            del self._entries[key]
+        if self.redis is None:
+            return None
+        try:
+            raw = await self.redis.get(REDIS_PREFIX + key)
+        except Exception as e:  # noqa: BLE001 - Redis is an optimization only
+            log.debug("response cache redis get failed: %s", e)
+            return None
+        if not raw:
+            return None
+        etag, _, body = raw.partition(b"\n")
+        entry = CachedBody(body=body, etag=etag.decode(), expires_at=now + self.ttl_s)
+        self._put_local(key, entry)
+        return entry
+
+    async def set(self, key: str, body: bytes, *, generation: Optional[int] = None) -> CachedBody:
+        entry = CachedBody(body=body, etag=make_etag(body), expires_at=time.monotonic() + self.ttl_s)
+        if generation is not None and generation != self.generation:
+            return entry  # invalidated while this body was being built
+        self._put_local(key, entry)
+        if self.redis is not None:
+            try:
+                await self.redis.set(REDIS_PREFIX + key, entry.etag.encode() + b"\n" + body, ex=max(1, int(self.ttl_s)))
+            except Exception as e:  # noqa: BLE001
+                log.debug("response cache redis set failed: %s", e)
+        return entry
+
+    async def invalidate(self) -> None:
+        self.generation += 1
+        self.stats.invalidations += 1
+        self._entries.clear()
+        if self.redis is None:
+            return
+        try:
+            batch = []
+            async for key in self.redis.scan_iter(match=REDIS_PREFIX + "*", count=500):
+                batch.append(key)
+                if len(batch) >= 500:
+                    await self.redis.unlink(*batch)
+                    batch.clear()
+            if batch:
+                await self.redis.unlink(*batch)
+        except Exception as e:  # noqa: BLE001
+            log.warning("response cache redis invalidation failed: %s", e)
+
+    async def respond(self, request: Request, model: Any, load: Callable[[], Awaitable[Any]]) -> Response:
+        """Serve `load()` serialized as `model`, from cache when possible.
+
+        `load` only runs on a miss, so the handler's DB session is never used for hits.
+        """
+
+        async def build() -> bytes:
+            adapter = _adapter(model)
+            return adapter.dump_json(adapter.validate_python(await load(), from_attributes=True))
+
+        return await self.respond_json(request, build)
+
+    async def respond_json(self, request: Request, build: Callable[[], Awaitable[bytes]]) -> Response:
+        """Like `respond`, for handlers that produce the JSON body themselves (app.core.fast_json)."""
+        if not self.enabled:
+            return Response(content=await build(), media_type="application/json")
+
+        key = cache_key(request)
+        entry = await self.get(key)
+        status = "HIT"
+        if entry is None:
+            status = "MISS"
+            self.stats.misses += 1
+            generation = self.generation
+            entry = await self.set(key, await build(), generation=generation)
+        else:
+            self.stats.hits += 1
+
+        headers = {"ETag": entry.etag, "Cache-Control": "private, no-cache", "Vary": "Authorization", "X-Cache": status}
+        if etag_matches(request.headers.get("if-none-match"), entry.etag):
+            self.stats.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(content=entry.body, media_type="application/json", headers=headers)
+
+
+response_cache = ResponseCache(
+    max_entries=settings.response_cache_max_entries,
+    ttl_s=settings.response_cache_ttl_s,
+    redis_client=redis.from_url(settings.redis_url) if settings.response_cache_redis else None,
+    enabled=settings.response_cache_enabled,
+)
+
+
+async def listen_for_invalidations(
+    cache: ResponseCache = response_cache,
+    events: Optional[Iterable[str]] = None,
+    *,
+    retry_delay_s: float = 5.0,
+) -> None:
+    """Invalidate `cache` whenever a matching realtime event is published. Runs until cancelled."""
+    wanted = set(settings.response_cache_invalidate_events if events is None else events)
+    while True:
+        r = redis.from_url(settings.redis_url, decode_responses=True)
+        pubsub = r.pubsub()
+        try:
+            await pubsub.subscribe(CHANNEL)
+            # Events may have been missed while disconnected.
+            await cache.invalidate()
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    event = json.loads(message["data"])
+                except (TypeError, ValueError):
+                    continue
+                if isinstance(event, dict) and event.get("type") in wanted:
+                    await cache.invalidate()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:  # noqa: BLE001
+            log.warning("response cache invalidation listener disconnected: %s", e)
+        finally:
+            try:
+                await pubsub.close()
+                await r.close()
+            except Exception:  # noqa: BLE001
+                pass
+        await asyncio.sleep(retry_delay_s)
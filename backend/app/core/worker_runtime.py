@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Coroutine, Optional, TypeVar
+
+import httpx
+import redis.asyncio as redis
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.session import build_engine, build_sessionmaker
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """Long-lived asyncio runtime for a single Celery worker process.
+
+    Celery tasks are sync functions. Calling `asyncio.run()` per task creates a new
+    event loop every time, while the asyncpg pool, HTTP keep-alive connections and
+    Redis connections are all bound to the loop they were created on. Instead, each
+    worker process owns one loop for its whole lifetime and the resources below are
+    created once on that loop (see the `worker_process_init` hook in celery_app).
+    """
+
+    def __init__(self) -> None:
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.engine: Optional[AsyncEngine] = None
+        self.sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
+        # Replica for long read-only jobs (exports); the primary when no replica is configured.
+        self.read_engine: Optional[AsyncEngine] = None
+        self.read_sessionmaker: Optional[async_sessionmaker[AsyncSession]] = None
+        self.http: Optional[httpx.AsyncClient] = None
+        self.redis: Optional[redis.Redis] = None
+
+    @property
+    def started(self) -> bool:
+        return self.loop is not None and not self.loop.is_closed()
+
+    def start(self) -> None:
+        if self.started:
+            return
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.engine = build_engine()
+        self.sessionmaker = build_sessionmaker(self.engine)
+        self.read_engine = build_engine(settings.database_read_url) if settings.database_read_url else self.engine
+        self.read_sessionmaker = build_sessionmaker(self.read_engine)
+        self.http = httpx.AsyncClient(
+            timeout=settings.worker_http_timeout_s,
+            headers={"User-Agent": "pod-trend-bot/1.0"},
+            limits=httpx.Limits(max_connections=settings.worker_http_max_connections),
+            follow_redirects=True,
+        )
+        self.redis = redis.from_url(settings.redis_url, decode_responses=True)
+
+    def stop(self) -> None:
+        if not self.started:
+            return
+        assert self.loop is not None
+        try:
+            self.loop.run_until_complete(self._aclose())
+        finally:
+            self.loop.close()
+            self.loop = None
+            self.engine = None
+            self.sessionmaker = None
+            self.read_engine = None
+            self.read_sessionmaker = None
+            self.http = None
+            self.redis = None
+
+    async def _aclose(self) -> None:
+        if self.http is not None:
+            await self.http.aclose()
+        if self.redis is not None:
+            try:
+                await self.redis.close()
+            except Exception:
+                pass
+        if self.read_engine is not None and self.read_engine is not self.engine:
+            await self.read_engine.dispose()
+        if self.engine is not None:
+            await self.engine.dispose()
+
+    def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run `coro` to completion on the worker loop.
+
+        Starts lazily so eager tasks, the solo pool and scripts work without the
+        Celery process signals having fired.
+        """
+        if not self.started:
+            self.start()
+        assert self.loop is not None
+        return self.loop.run_until_complete(coro)
+
+
+runtime = WorkerRuntime()
@@ -1 +1,2 @@
-from .trend import create_trend  # noqa
+from .trend import bulk_create_trends, create_trend  # noqa
+from .product import bulk_insert_snapshots, bulk_upsert_products  # noqa
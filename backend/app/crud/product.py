@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import Select, desc, insert, select, true
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import MarketplaceProduct, ProductSnapshot, TrendScore
+from app.scrapers.base import RawListing
+
+ProductKey = Tuple[str, str]  # (marketplace, external_id)
+
+
+async def bulk_upsert_products(db: AsyncSession, listings: Sequence[RawListing]) -> Dict[ProductKey, int]:
+    """Insert or refresh products in one statement; returns ids keyed by (marketplace, external_id).
+
+    Relies on the unique (marketplace, external_id) constraint. Duplicate keys in
+    `listings` are collapsed (last one wins), since a single ON CONFLICT statement
+    cannot touch the same row twice.
+    """
+    now = datetime.utcnow()
+    rows: Dict[ProductKey, Dict[str, Any]] = {}
+    for listing in listings:
+        rows[(listing.marketplace, listing.product_id)] = {
+            "marketplace": listing.marketplace,
+            "external_id": listing.product_id,
+            "url": listing.url,
+            "title": listing.title,
+            "image_url": listing.image_url,
+            "created_at": now,
+            "updated_at": now,
+        }
+    if not rows:
+        return {}
+
+    stmt = pg_insert(MarketplaceProduct).values(list(rows.values()))
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_products_marketplace_external_id",
+        set_={
+            "url": stmt.excluded.url,
+            "title": stmt.excluded.title,
+            "image_url": stmt.excluded.image_url,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ).returning(MarketplaceProduct.id, MarketplaceProduct.marketplace, MarketplaceProduct.external_id)
+    res = await db.execute(stmt)
+    return {(marketplace, external_id): pid for pid, marketplace, external_id in res.all()}
+
+
+async def bulk_insert_snapshots(db: AsyncSession, rows: List[Dict[str, Any]]) -> List[ProductSnapshot]:
+    """Insert snapshot rows in batched INSERT .. RETURNING round-trips; returns the new ORM rows."""
+    if not rows:
+        return []
+    res = await db.scalars(insert(ProductSnapshot).returning(ProductSnapshot), rows)
+    return list(res.all())
+
+
+PRODUCT_FIELDS = ("id", "marketplace", "external_id", "url", "title", "description", "image_url", "tags", "niche")
+SNAPSHOT_FIELDS = ("captured_at", "price", "currency", "rank", "review_count", "rating", "estimated_sales")
+TREND_FIELDS = ("overall_score", "demand_score", "competition_score", "momentum_score", "cluster_label", "niche")
+
+
+def products_with_latest_stmt(*, min_score: float = 0.0) -> Select:
+    """Products joined (LATERAL) with their latest snapshot and latest trend score >= `min_score`.
+
+    Selects plain columns: the product's, then `snapshot_*`, then `trend_*`.
+    """
+    snap = (
+        select(*(ProductSnapshot.__table__.c[f] for f in SNAPSHOT_FIELDS))
+        .where(ProductSnapshot.product_id == MarketplaceProduct.id)
+        .order_by(desc(ProductSnapshot.captured_at))
+        .limit(1)
+        .lateral("latest_snapshot")
+    )
+    trend = (
+        select(*(TrendScore.__table__.c[f] for f in TREND_FIELDS))
+        .where(TrendScore.product_id == MarketplaceProduct.id, TrendScore.overall_score >= min_score)
+        .order_by(desc(TrendScore.created_at))
+        .limit(1)
+        .lateral("latest_trend")
+    )
+    return (
+        select(
+            *(MarketplaceProduct.__table__.c[f] for f in PRODUCT_FIELDS),
+            *(snap.c[f].label(f"snapshot_{f}") for f in SNAPSHOT_FIELDS),
+            *(trend.c[f].label(f"trend_{f}") for f in TREND_FIELDS),
+        )
+        .select_from(MarketplaceProduct)
+        .outerjoin(snap, true())
+        .outerjoin(trend, true())
+    )
+
+
+async def list_product_rows(
+    db: AsyncSession, *, limit: int, marketplace: Optional[str] = None, min_score: float = 0.0
+) -> List[dict]:
+    """Products with their latest snapshot and trend score, shaped like `ProductRead`,
+    from one query returning plain row tuples."""
+    stmt = products_with_latest_stmt(min_score=min_score).order_by(MarketplaceProduct.id).limit(limit)
+    if marketplace:
+        stmt = stmt.where(MarketplaceProduct.marketplace == marketplace)
+
+    n_product, n_snap = len(PRODUCT_FIELDS), len(SNAPSHOT_FIELDS)
+    out: List[dict] = []
+    for row in (await db.execute(stmt)).tuples():
+        item = dict(zip(PRODUCT_FIELDS, row[:n_product]))
+        snap_row = row[n_product : n_product + n_snap]
+        trend_row = row[n_product + n_snap :]
+        # captured_at / overall_score are NOT NULL, so NULL means "no row" from the outer join.
+        item["latest_snapshot"] = dict(zip(SNAPSHOT_FIELDS, snap_row)) if snap_row[0] is not None else None
+        item["latest_trend"] = dict(zip(TREND_FIELDS, trend_row)) if trend_row[0] is not None else None
+        out.append(item)
+    return out
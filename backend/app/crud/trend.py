@@ -1,5 +1,7 @@
 from datetime import datetime
+from typing import Sequence
 
+from sqlalchemy import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import Trend as TrendORM
@@ -25,3 +27,15 @@ async def create_trend(db: AsyncSession, obj_in: TrendCreate) -> TrendORM:
     await db.commit()
     await db.refresh(db_obj)
     return db_obj
+
+
+async def bulk_create_trends(db: AsyncSession, objs_in: Sequence[TrendCreate]) -> int:
+    """Insert many trends in one executemany. Unlike `create_trend`, does not commit."""
+    if not objs_in:
+        return 0
+    now = datetime.utcnow()
+    await db.execute(
+        insert(TrendORM),
+        [{**obj.model_dump(), "created_at": now, "updated_at": now} for obj in objs_in],
+    )
+    return len(objs_in)
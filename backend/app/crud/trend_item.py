@@ -1,12 +1,85 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Optional
+from typing import Any, List, Optional, Sequence
 
-from sqlalchemy import select
+from sqlalchemy import Select, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import TrendItem
+from app.core.fast_json import rows_to_dicts
+from app.db.models import CanonicalNiche, NicheAlias, TrendItem
+from app.schemas.trend_item import TrendItemOut
+
+# Columns backing TrendItemOut, in field order, for the row-tuple (fast JSON) path.
+TREND_ITEM_OUT_FIELDS = tuple(TrendItemOut.model_fields)
+_TREND_ITEM_OUT_COLUMNS = [TrendItem.__table__.c[name] for name in TREND_ITEM_OUT_FIELDS]
+
+
+def _list_stmt(
+    *entities: Any, limit: int, min_score: Optional[int], source: Optional[str], niche_id: Optional[int] = None
+) -> Select:
+    stmt = select(*entities).order_by(TrendItem.ai_score_0_100.desc().nullslast(), TrendItem.published_at.desc().nullslast()).limit(limit)
+    if min_score is not None:
+        stmt = stmt.where(TrendItem.ai_score_0_100 >= min_score)
+    if source:
+        stmt = stmt.where(TrendItem.source.ilike(f"%{source}%"))
+    if niche_id is not None:
+        stmt = stmt.where(TrendItem.niche_id == niche_id)
+    return stmt
+
+
+async def list_trend_items(
+    db: AsyncSession,
+    *,
+    limit: int,
+    min_score: Optional[int] = None,
+    source: Optional[str] = None,
+    niche_id: Optional[int] = None,
+) -> Sequence[TrendItem]:
+    res = await db.execute(_list_stmt(TrendItem, limit=limit, min_score=min_score, source=source, niche_id=niche_id))
+    return res.scalars().all()
+
+
+async def list_trend_item_rows(
+    db: AsyncSession,
+    *,
+    limit: int,
+    min_score: Optional[int] = None,
+    source: Optional[str] = None,
+    niche_id: Optional[int] = None,
+) -> List[dict]:
+    """Same as `list_trend_items`, as TrendItemOut-shaped dicts built from row tuples."""
+    res = await db.execute(
+        _list_stmt(*_TREND_ITEM_OUT_COLUMNS, limit=limit, min_score=min_score, source=source, niche_id=niche_id)
+    )
+    return rows_to_dicts(TREND_ITEM_OUT_FIELDS, res.tuples())
+
+
+async def list_niches(db: AsyncSession, *, limit: int = 100, min_items: int = 1) -> List[dict]:
+    """Canonical niches by item count (joins on the indexed `trend_items.niche_id`)."""
+    items = func.count(TrendItem.id)
+    aliases = (
+        select(func.count())
+        .where(NicheAlias.canonical_niche_id == CanonicalNiche.id)
+        .correlate(CanonicalNiche)
+        .scalar_subquery()
+    )
+    stmt = (
+        select(CanonicalNiche.id, CanonicalNiche.slug, CanonicalNiche.name, items, aliases)
+        .join(TrendItem, TrendItem.niche_id == CanonicalNiche.id)
+        .group_by(CanonicalNiche.id)
+        .having(items >= min_items)
+        .order_by(items.desc(), CanonicalNiche.id)
+        .limit(limit)
+    )
+    res = await db.execute(stmt)
+    return rows_to_dicts(("id", "slug", "name", "items", "aliases"), res.tuples())
+
+
+async def get_trend_item_row(db: AsyncSession, item_id: int) -> Optional[dict]:
+    res = await db.execute(select(*_TREND_ITEM_OUT_COLUMNS).where(TrendItem.id == item_id))
+    row = res.first()
+    return dict(zip(TREND_ITEM_OUT_FIELDS, row)) if row is not None else None
 
 
 async def upsert_trend_item(
@@ -1,2 +1,2 @@
-from .session import Base, engine, get_session  # noqa
+from .session import Base, engine, get_read_session, get_session  # noqa
 from . import models  # noqa
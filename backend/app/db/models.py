@@ -1,13 +1,18 @@
 from datetime import datetime
 
 from sqlalchemy import (
+    BigInteger,
     Column,
+    Date,
     Integer,
     String,
     Float,
     DateTime,
     Text,
     ForeignKey,
+    Index,
+    UniqueConstraint,
+    func,
 )
 from sqlalchemy.orm import relationship
 
@@ -49,6 +54,8 @@ class TrendItem(Base):
 
     ai_score_0_100 = Column(Integer, index=True, nullable=True)
     ai_niche = Column(String(255), index=True, nullable=True)
+    # Canonical niche for `ai_niche` (app.services.niches); NULL until canonicalized.
+    niche_id = Column(Integer, ForeignKey("canonical_niches.id"), index=True, nullable=True)
     ai_json = Column(Text, nullable=True)
 
     ai_status = Column(String(50), default="pending", nullable=False)
@@ -57,6 +64,13 @@ class TrendItem(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
+    __table_args__ = (
+        # Day-range lookups for the analytics rollups (app.services.trend_rollups).
+        Index("ix_trend_items_rollup_day", func.date(func.coalesce(published_at, created_at)), "source"),
+        # Keyset scans of the analytics export (app.services.analytics_export).
+        Index("ix_trend_items_updated_id", "updated_at", "id"),
+    )
+
 
 class DesignIdea(Base):
     """Design prompts/ideas generated from a TrendItem."""
@@ -76,6 +90,9 @@ class DesignIdea(Base):
 
 class MarketplaceProduct(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        UniqueConstraint("marketplace", "external_id", name="uq_products_marketplace_external_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     marketplace = Column(String(50), index=True, nullable=False)
@@ -99,11 +116,22 @@ class MarketplaceProduct(Base):
 
 
 class ProductSnapshot(Base):
+    """Raw point-in-time observation of a product.
+
+    Range-partitioned by month on `captured_at` (partitions are managed by
+    app.services.snapshot_storage), so the partition key is part of the primary key.
+    Old raw rows are rolled up into `SnapshotRollup` and dropped.
+    """
+
     __tablename__ = "product_snapshots"
+    __table_args__ = (
+        Index("ix_product_snapshots_product_captured", "product_id", "captured_at"),
+        {"postgresql_partition_by": "RANGE (captured_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(BigInteger, primary_key=True, autoincrement=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
-    captured_at = Column(DateTime, default=datetime.utcnow, index=True, nullable=False)
+    captured_at = Column(DateTime, default=datetime.utcnow, primary_key=True, nullable=False)
 
     price = Column(Float, nullable=False)
     currency = Column(String(10), default="USD", nullable=False)
@@ -115,6 +143,36 @@ class ProductSnapshot(Base):
     product = relationship("MarketplaceProduct", back_populates="snapshots")
 
 
+class SnapshotRollup(Base):
+    """Daily or weekly aggregate of `ProductSnapshot` rows past raw retention."""
+
+    __tablename__ = "product_snapshot_rollups"
+    __table_args__ = (
+        UniqueConstraint("product_id", "granularity", "bucket_start", name="uq_snapshot_rollup_bucket"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    granularity = Column(String(10), nullable=False)  # day | week
+    bucket_start = Column(DateTime, nullable=False)
+    last_captured_at = Column(DateTime, nullable=False)
+    samples = Column(Integer, nullable=False)
+
+    currency = Column(String(10), default="USD", nullable=False)
+    price_min = Column(Float, nullable=False)
+    price_max = Column(Float, nullable=False)
+    price_avg = Column(Float, nullable=False)
+    price_last = Column(Float, nullable=False)
+
+    rank_min = Column(Integer, nullable=True)
+    rank_max = Column(Integer, nullable=True)
+    rank_last = Column(Integer, nullable=True)
+    review_count_last = Column(Integer, nullable=True)
+    rating_last = Column(Float, nullable=True)
+    sales_first = Column(Float, nullable=True)
+    sales_last = Column(Float, nullable=True)
+
+
 class ProductEmbedding(Base):
     __tablename__ = "product_embeddings"
 
@@ -130,10 +188,16 @@ class ProductEmbedding(Base):
 
 class TrendScore(Base):
     __tablename__ = "trend_scores"
+    __table_args__ = (
+        Index("ix_trend_scores_product_created", "product_id", "created_at"),
+        # Keyset scans of the analytics export (app.services.analytics_export).
+        Index("ix_trend_scores_created_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
-    snapshot_id = Column(Integer, ForeignKey("product_snapshots.id"), nullable=True)
+    # No FK: product_snapshots is partitioned and raw rows are dropped after rollup.
+    snapshot_id = Column(BigInteger, nullable=True)
 
     overall_score = Column(Float, index=True, nullable=False)
     demand_score = Column(Float, nullable=False)
@@ -146,7 +210,40 @@ class TrendScore(Base):
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     product = relationship("MarketplaceProduct", back_populates="trend_scores")
-    snapshot = relationship("ProductSnapshot")
+    snapshot = relationship(
+        "ProductSnapshot",
+        primaryjoin="foreign(TrendScore.snapshot_id) == ProductSnapshot.id",
+        viewonly=True,
+    )
+
+
+class ProductTrendState(Base):
+    """Running trend-metric state per product, updated in O(1) per new snapshot.
+
+    See app.services.trend_state; `to_metrics` reproduces `compute_trend_metrics`
+    over the same snapshots without rereading history.
+    """
+
+    __tablename__ = "product_trend_states"
+
+    product_id = Column(Integer, ForeignKey("products.id"), primary_key=True)
+    snapshot_count = Column(Integer, default=0, nullable=False)
+    last_snapshot_id = Column(BigInteger, nullable=True)
+    last_captured_at = Column(DateTime, nullable=True)
+
+    latest_rank = Column(Integer, nullable=True)
+    latest_review_count = Column(Integer, nullable=True)
+    min_rank = Column(Integer, nullable=True)
+    max_rank = Column(Integer, nullable=True)
+
+    sales_count = Column(Integer, default=0, nullable=False)
+    first_sales = Column(Float, nullable=True)
+    first_sales_at = Column(DateTime, nullable=True)
+    last_sales = Column(Float, nullable=True)
+    last_sales_at = Column(DateTime, nullable=True)
+    ewma_momentum = Column(Float, nullable=True)
+
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
 
 class AudienceProfile(Base):
@@ -192,13 +289,134 @@ class DesignAsset(Base):
     provider = Column(String(50), nullable=False)
     image_url = Column(Text, nullable=True)
     thumbnail_url = Column(Text, nullable=True)
-    status = Column(String(50), default="pending", nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)  # sha256 of the stored original
+    status = Column(String(50), default="pending", nullable=False)  # pending | ready | failed
+    error = Column(Text, nullable=True)
 
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
 
     product = relationship("MarketplaceProduct", back_populates="design_assets")
 
 
+class DesignRenderCache(Base):
+    """Finished render reusable for identical (normalized) design requests."""
+
+    __tablename__ = "design_render_cache"
+
+    cache_key = Column(String(64), primary_key=True)  # sha256 of renderer + normalized request
+    renderer = Column(String(50), nullable=False)
+    prompt = Column(Text, nullable=False)
+    image_url = Column(Text, nullable=False)
+    thumbnail_url = Column(Text, nullable=True)
+    content_hash = Column(String(64), nullable=True, index=True)
+    asset_key = Column(Text, nullable=True)  # storage key of the original; None for external URLs
+    hits = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_hit_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+
+class PublishJob(Base):
+    """Progress of publishing one design to Printful (sync product) and Shopify (draft).
+
+    Each completed step stores the provider id, so a retried job resumes at the
+    first unfinished step instead of publishing twice.
+    """
+
+    __tablename__ = "publish_jobs"
+    __table_args__ = (UniqueConstraint("design_asset_id", name="uq_publish_jobs_design_asset"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(String(36), index=True, nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    design_asset_id = Column(Integer, ForeignKey("design_assets.id"), nullable=False)
+
+    printful_product_id = Column(Integer, nullable=False)
+    printful_variant_id = Column(Integer, nullable=False)
+    printful_sync_product_id = Column(String(64), nullable=True)
+    shopify_product_id = Column(String(64), nullable=True)
+
+    # pending | running | awaiting_shopify (bulk sync mode) | done | failed
+    status = Column(String(50), default="pending", nullable=False)
+    attempts = Column(Integer, default=0, nullable=False)
+    error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class TrendItemRollup(Base):
+    """Per (day, source, niche) aggregates of `TrendItem` for the analytics endpoints.
+
+    `day` is the item's published date (ingest date when unknown); `niche` is the
+    canonical niche slug (lowercased `ai_niche` until canonicalized), "" when unscored.
+    Maintained by app.services.trend_rollups.
+    """
+
+    __tablename__ = "trend_item_rollups"
+    __table_args__ = (UniqueConstraint("day", "source", "niche", name="uq_trend_item_rollup_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True, nullable=False)
+    source = Column(String(255), nullable=False)
+    niche = Column(String(255), index=True, nullable=False)
+    items = Column(Integer, nullable=False)
+    scored = Column(Integer, nullable=False)
+    score_sum = Column(BigInteger, nullable=False)
+    score_min = Column(Integer, nullable=True)
+    score_max = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+
+class TrendScoreHistogram(Base):
+    """Scored-item counts per 10-point `ai_score_0_100` bucket (0-9 ... 90-100), same keys as `TrendItemRollup`."""
+
+    __tablename__ = "trend_score_histogram"
+    __table_args__ = (UniqueConstraint("day", "source", "niche", "bucket", name="uq_trend_score_histogram_key"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, index=True, nullable=False)
+    source = Column(String(255), nullable=False)
+    niche = Column(String(255), nullable=False)
+    bucket = Column(Integer, nullable=False)
+    items = Column(Integer, nullable=False)
+
+
+class CanonicalNiche(Base):
+    """A canonical niche that free-text `TrendItem.ai_niche` values are mapped onto.
+
+    `centroid_json` is the running mean of the member aliases' embeddings (NULL when the
+    niche was created without an embedding provider); `members` is how many went into it.
+    """
+
+    __tablename__ = "canonical_niches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    slug = Column(String(255), unique=True, nullable=False)
+    name = Column(String(255), nullable=False)
+    provider = Column(String(100), nullable=True)
+    dim = Column(Integer, nullable=True)
+    centroid_json = Column(Text, nullable=True)
+    members = Column(Integer, default=0, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class NicheAlias(Base):
+    """Memoized assignment of a normalized niche string to its `CanonicalNiche`."""
+
+    __tablename__ = "niche_aliases"
+
+    id = Column(Integer, primary_key=True, index=True)
+    alias = Column(String(255), unique=True, nullable=False)
+    canonical_niche_id = Column(Integer, ForeignKey("canonical_niches.id"), index=True, nullable=False)
+    # Cosine similarity to the centroid at assignment time; NULL for exact/fallback matches.
+    similarity = Column(Float, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    canonical_niche = relationship("CanonicalNiche")
+
+
 class User(Base):
     __tablename__ = "users"
 
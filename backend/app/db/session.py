@@ -1,14 +1,48 @@
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 
 from app.core.config import settings
 
 DATABASE_URL = settings.resolved_database_url
+DATABASE_READ_URL = settings.resolved_database_read_url
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
-AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
+
+def _engine_kwargs(url: str) -> Dict[str, Any]:
+    kwargs: Dict[str, Any] = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+        "pool_recycle": settings.db_pool_recycle_s,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if url.startswith("postgresql+asyncpg"):
+        kwargs["connect_args"] = {"statement_cache_size": settings.db_statement_cache_size}
+    return kwargs
+
+
+def build_engine(url: str = DATABASE_URL) -> AsyncEngine:
+    """Create an async engine.
+
+    The engine's asyncpg pool is bound to the event loop it is first used on, so
+    long-lived processes that own their own loop (Celery workers) build a private
+    engine instead of sharing the module-level one.
+    """
+    return create_async_engine(url, echo=False, future=True, **_engine_kwargs(url))
+
+
+def build_sessionmaker(bind: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(bind, expire_on_commit=False, class_=AsyncSession)
+
+
+engine = build_engine()
+AsyncSessionLocal = build_sessionmaker(engine)
+
+# Read-only traffic (dashboard GETs) goes to the replica when one is configured,
+# through its own pool so it never queues behind writes on the primary.
+read_engine = build_engine(DATABASE_READ_URL) if settings.database_read_url else engine
+AsyncReadSessionLocal = build_sessionmaker(read_engine)
 
 Base = declarative_base()
 
@@ -16,3 +50,9 @@ Base = declarative_base()
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with AsyncSessionLocal() as session:
         yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session for read-only endpoints. Data may lag the primary by replication delay."""
+    async with AsyncReadSessionLocal() as session:
+        yield session
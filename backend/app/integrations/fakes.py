@@ -0,0 +1,363 @@
+"""In-process fakes of the Printful and Shopify APIs.
+
+They enforce the providers' rate limits the way the real APIs do (Shopify's leaky
+bucket with `X-Shopify-Shop-Api-Call-Limit`, Printful's fixed window with
+`X-Ratelimit-*` headers, 429 + `Retry-After` when exceeded) and can inject
+failures *after* a create has been applied, which is the case idempotent
+retries must survive. `FakeShopify` also implements the GraphQL bulk operation
+flow (staged upload, bulk mutation/query, polling, JSONL results), including
+Shopify's one-running-operation-per-shop rule. Mount them on
+an `httpx.MockTransport`::
+
+    fakes = FakeProviders()
+    client = httpx.AsyncClient(transport=fakes.transport())
+    printful = PrintfulClient("key", base_url=FAKE_PRINTFUL_URL, http_client=client)
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import random
+import time
+from email.parser import BytesParser
+from email.policy import default as email_policy
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+import httpx
+
+FAKE_PRINTFUL_URL = "https://printful.fake"
+FAKE_SHOPIFY_URL = "https://shop.fake/admin/api/2023-10"
+FAKE_SHOPIFY_STAGED_UPLOAD_URL = "https://shopify-staged-uploads.fake/upload"
+FAKE_SHOPIFY_BULK_RESULTS_URL = "https://shopify-bulk-results.fake"
+
+
+def fake_catalog() -> List[dict]:
+    """A small Printful catalog: `{"product": ..., "variants": [...]}` per product."""
+    out = []
+    specs = [
+        (71, "T-SHIRT", "T-Shirt", "Bella + Canvas 3001", 4011, ["S", "M", "L", "XL", "2XL"], 12.95),
+        (12, "T-SHIRT", "T-Shirt", "Gildan 64000", 474, ["S", "M", "L", "XL", "2XL", "3XL"], 9.25),
+        (146, "HOODIE", "Hoodie", "Gildan 18500", 5522, ["S", "M", "L", "XL", "2XL"], 22.75),
+        (19, "MUG", "Mug", "White Glossy Mug", 1320, ["11oz", "15oz"], 6.95),
+    ]
+    for product_id, ptype, type_name, model, first_variant, sizes, base_price in specs:
+        variants = []
+        for c, color in enumerate(["Black", "White"]):
+            for i, size in enumerate(sizes):
+                variants.append(
+                    {
+                        "id": first_variant + c * len(sizes) + i,
+                        "product_id": product_id,
+                        "name": f"{model} ({color} / {size})",
+                        "size": size,
+                        "color": color,
+                        "color_code": "#000000" if color == "Black" else "#ffffff",
+                        "price": f"{base_price + 1.5 * max(0, i - 3):.2f}",
+                        "in_stock": True,
+                    }
+                )
+        out.append(
+            {
+                "product": {
+                    "id": product_id,
+                    "type": ptype,
+                    "type_name": type_name,
+                    "title": model,
+                    "brand": model.split()[0],
+                    "model": model,
+                    "variant_count": len(variants),
+                    "files": [{"id": "default", "type": "default", "title": "Print file"}],
+                    "techniques": [{"key": "DTG", "display_name": "DTG printing", "is_default": True}],
+                    "is_discontinued": False,
+                },
+                "variants": variants,
+            }
+        )
+    return out
+
+
+def _etag(body: dict) -> str:
+    return '"%s"' % hashlib.sha1(json.dumps(body, sort_keys=True).encode()).hexdigest()
+
+
+@dataclass
+class FakeStats:
+    requests: int = 0
+    throttled: int = 0
+    injected_failures: int = 0
+    created: int = 0
+
+
+def _json(status: int, body: dict, headers: Optional[Dict[str, str]] = None) -> httpx.Response:
+    return httpx.Response(status, content=json.dumps(body).encode(), headers={"Content-Type": "application/json", **(headers or {})})
+
+
+class FakeShopify:
+    def __init__(
+        self,
+        *,
+        bucket_size: int = 40,
+        leak_rate: float = 2.0,
+        latency_s: float = 0.0,
+        failure_rate: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self._clock = clock
+        self._rng = rng or random.Random(0)
+        self._level = 0.0
+        self._updated = clock()
+        self.products: List[dict] = []
+        self.stats = FakeStats()
+        # Bulk operations complete after this many status polls.
+        self.bulk_polls_to_complete = 2
+        self.staged: Dict[str, bytes] = {}
+        self.operations: Dict[str, dict] = {}
+        self.results: Dict[str, bytes] = {}
+        self._ids = itertools.count(1)
+
+    def _create_product(self, title: str, handle: Optional[str], status: str) -> dict:
+        product = {
+            "id": 1_000_000 + len(self.products) + 1,
+            "handle": handle or f"product-{len(self.products) + 1}",
+            "title": title,
+            "status": status,
+        }
+        self.products.append(product)
+        self.stats.created += 1
+        return product
+
+    def _leak(self) -> None:
+        now = self._clock()
+        self._level = max(0.0, self._level - (now - self._updated) * self.leak_rate)
+        self._updated = now
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.stats.requests += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        self._leak()
+        if self._level + 1 > self.bucket_size:
+            self.stats.throttled += 1
+            return _json(429, {"errors": "Exceeded 2 calls per second for api client. Reduce request rates to resume uninterrupted service."}, {"Retry-After": "1.0"})
+        self._level += 1
+        headers = {"X-Shopify-Shop-Api-Call-Limit": f"{int(self._level)}/{self.bucket_size}"}
+
+        path = request.url.path
+        if path.endswith("/products.json") and request.method == "GET":
+            handle = parse_qs(request.url.query.decode()).get("handle", [None])[0]
+            found = [p for p in self.products if handle is None or p["handle"] == handle]
+            return _json(200, {"products": found}, headers)
+        if path.endswith("/products.json") and request.method == "POST":
+            body = json.loads(request.content)["product"]
+            product = self._create_product(body["title"], body.get("handle"), body.get("status", "active"))
+            if self._rng.random() < self.failure_rate:
+                self.stats.injected_failures += 1
+                return _json(502, {"errors": "Bad Gateway"}, headers)
+            return _json(201, {"product": product}, headers)
+        if path.endswith("/graphql.json") and request.method == "POST":
+            return _json(200, {"data": self._graphql(json.loads(request.content))})
+        return _json(404, {"errors": "Not Found"}, headers)
+
+    # -- GraphQL bulk operations ---------------------------------------------
+
+    def _graphql(self, body: dict) -> dict:
+        query, variables = body["query"], body.get("variables") or {}
+        if "stagedUploadsCreate" in query:
+            key = f"tmp/bulk/{next(self._ids)}/{variables['input'][0]['filename']}"
+            return {
+                "stagedUploadsCreate": {
+                    "stagedTargets": [
+                        {
+                            "url": FAKE_SHOPIFY_STAGED_UPLOAD_URL,
+                            "resourceUrl": None,
+                            "parameters": [{"name": "key", "value": key}, {"name": "Content-Type", "value": "text/jsonl"}],
+                        }
+                    ],
+                    "userErrors": [],
+                }
+            }
+        if "bulkOperationRunMutation" in query:
+            if self._busy("mutation"):
+                return {"bulkOperationRunMutation": {"bulkOperation": None, "userErrors": [self._busy("mutation")]}}
+            lines = self.staged.get(variables["stagedUploadPath"])
+            if lines is None:
+                return {"bulkOperationRunMutation": {"bulkOperation": None, "userErrors": [{"field": None, "message": "unknown staged upload"}]}}
+            return {"bulkOperationRunMutation": {"bulkOperation": self._start("mutation", lines), "userErrors": []}}
+        if "bulkOperationRunQuery" in query:
+            if self._busy("query"):
+                return {"bulkOperationRunQuery": {"bulkOperation": None, "userErrors": [self._busy("query")]}}
+            return {"bulkOperationRunQuery": {"bulkOperation": self._start("query", variables["query"].encode()), "userErrors": []}}
+        if "node(id:" in query:
+            return {"node": self._poll(variables["id"])}
+        raise ValueError("unsupported fake GraphQL operation")
+
+    def _busy(self, kind: str) -> Optional[dict]:
+        """Like Shopify, allow one running bulk operation of each kind per shop."""
+        if any(op["kind"] == kind and op["status"] == "RUNNING" for op in self.operations.values()):
+            return {"field": None, "message": f"A bulk {kind} operation for this app and shop is already in progress."}
+        return None
+
+    def _start(self, kind: str, payload: bytes) -> dict:
+        op_id = f"gid://shopify/BulkOperation/{next(self._ids)}"
+        self.operations[op_id] = {"kind": kind, "payload": payload, "polls": 0, "status": "RUNNING"}
+        return {"id": op_id, "status": "CREATED"}
+
+    def _poll(self, op_id: str) -> dict:
+        op = self.operations[op_id]
+        op["polls"] += 1
+        if op["status"] == "RUNNING" and op["polls"] >= self.bulk_polls_to_complete:
+            self.results[op_id] = self._execute(op)
+            op["status"] = "COMPLETED"
+        done = op["status"] == "COMPLETED"
+        return {
+            "id": op_id,
+            "status": op["status"],
+            "errorCode": None,
+            "objectCount": str(op.get("count", 0)),
+            "url": f"{FAKE_SHOPIFY_BULK_RESULTS_URL}/{op_id.rsplit('/', 1)[-1]}.jsonl" if done and self.results[op_id] else None,
+            "partialDataUrl": None,
+        }
+
+    def _execute(self, op: dict) -> bytes:
+        out: List[str] = []
+        if op["kind"] == "mutation":
+            for n, line in enumerate(op["payload"].decode().splitlines()):
+                if not line.strip():
+                    continue
+                data = json.loads(line)["input"]
+                product = self._create_product(data["title"], data.get("handle"), data.get("status", "DRAFT").lower())
+                payload = {"product": {"id": f"gid://shopify/Product/{product['id']}", "handle": product["handle"]}, "userErrors": []}
+                out.append(json.dumps({"data": {"productCreate": payload}, "__lineNumber": n}))
+        else:
+            query = op["payload"].decode()
+            prefix = query.split("handle:", 1)[1].split("*", 1)[0] if "handle:" in query else ""
+            for p in self.products:
+                if p["handle"].startswith(prefix):
+                    out.append(json.dumps({"id": f"gid://shopify/Product/{p['id']}", "handle": p["handle"]}))
+        op["count"] = len(out)
+        return ("\n".join(out) + "\n").encode() if out else b""
+
+    async def handle_staged_upload(self, request: httpx.Request) -> httpx.Response:
+        msg = BytesParser(policy=email_policy).parsebytes(
+            b"Content-Type: " + request.headers["content-type"].encode() + b"\r\n\r\n" + request.content
+        )
+        fields: Dict[str, bytes] = {}
+        for part in msg.iter_parts():
+            fields[part.get_param("name", header="content-disposition")] = part.get_payload(decode=True)
+        self.staged[fields["key"].decode()] = fields["file"]
+        return httpx.Response(201)
+
+    async def handle_bulk_results(self, request: httpx.Request) -> httpx.Response:
+        op_id = f"gid://shopify/BulkOperation/{request.url.path.strip('/').removesuffix('.jsonl')}"
+        data = self.results.get(op_id)
+        if data is None:
+            return httpx.Response(404)
+        return httpx.Response(200, content=data, headers={"Content-Type": "application/jsonl"})
+
+
+class FakePrintful:
+    def __init__(
+        self,
+        *,
+        limit: int = 120,
+        window_s: float = 60.0,
+        latency_s: float = 0.0,
+        failure_rate: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+        rng: Optional[random.Random] = None,
+    ):
+        self.limit = limit
+        self.window_s = window_s
+        self.latency_s = latency_s
+        self.failure_rate = failure_rate
+        self._clock = clock
+        self._rng = rng or random.Random(1)
+        self._window_start = clock()
+        self._count = 0
+        self.products: Dict[str, dict] = {}
+        self.catalog: Dict[int, dict] = {entry["product"]["id"]: entry for entry in fake_catalog()}
+        self.stats = FakeStats()
+
+    def _catalog_response(self, request: httpx.Request, body: dict, headers: Dict[str, str]) -> httpx.Response:
+        etag = _etag(body)
+        if request.headers.get("If-None-Match") == etag:
+            return httpx.Response(304, headers={**headers, "ETag": etag})
+        return _json(200, body, {**headers, "ETag": etag})
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.stats.requests += 1
+        if self.latency_s:
+            await asyncio.sleep(self.latency_s)
+        now = self._clock()
+        if now - self._window_start >= self.window_s:
+            self._window_start, self._count = now, 0
+        reset = math.ceil(max(0.0, self.window_s - (now - self._window_start)))
+        if self._count >= self.limit:
+            self.stats.throttled += 1
+            return _json(
+                429,
+                {"code": 429, "error": {"reason": "TooManyRequests"}},
+                {"Retry-After": str(reset), "X-Ratelimit-Remaining": "0", "X-Ratelimit-Reset": str(reset)},
+            )
+        self._count += 1
+        headers = {
+            "X-Ratelimit-Limit": str(self.limit),
+            "X-Ratelimit-Remaining": str(self.limit - self._count),
+            "X-Ratelimit-Reset": str(reset),
+        }
+
+        path = request.url.path
+        if path == "/products" and request.method == "GET":
+            listing = [entry["product"] for entry in self.catalog.values()]
+            return self._catalog_response(request, {"code": 200, "result": listing}, headers)
+        if path.startswith("/products/") and request.method == "GET":
+            entry = self.catalog.get(int(path.rsplit("/", 1)[1]))
+            if entry is None:
+                return _json(404, {"code": 404, "error": {"reason": "NotFound"}}, headers)
+            return self._catalog_response(request, {"code": 200, "result": entry}, headers)
+        if path.startswith("/store/products/@") and request.method == "GET":
+            product = self.products.get(path.split("@", 1)[1])
+            if product is None:
+                return _json(404, {"code": 404, "error": {"reason": "NotFound"}}, headers)
+            return _json(200, {"code": 200, "result": {"sync_product": product, "sync_variants": []}}, headers)
+        if path == "/store/products" and request.method == "POST":
+            body = json.loads(request.content)["sync_product"]
+            product = {"id": 500_000 + len(self.products) + 1, "external_id": body.get("external_id"), "name": body["name"]}
+            self.products[product["external_id"] or str(product["id"])] = product
+            self.stats.created += 1
+            if self._rng.random() < self.failure_rate:
+                self.stats.injected_failures += 1
+                return _json(500, {"code": 500, "error": {"reason": "InternalError"}}, headers)
+            return _json(200, {"code": 200, "result": product}, headers)
+        return _json(404, {"code": 404, "error": {"reason": "NotFound"}}, headers)
+
+
+@dataclass
+class FakeProviders:
+    printful: FakePrintful = field(default_factory=FakePrintful)
+    shopify: FakeShopify = field(default_factory=FakeShopify)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        if request.url.host == httpx.URL(FAKE_PRINTFUL_URL).host:
+            return await self.printful.handle(request)
+        if request.url.host == httpx.URL(FAKE_SHOPIFY_URL).host:
+            return await self.shopify.handle(request)
+        if request.url.host == httpx.URL(FAKE_SHOPIFY_STAGED_UPLOAD_URL).host:
+            return await self.shopify.handle_staged_upload(request)
+        if request.url.host == httpx.URL(FAKE_SHOPIFY_BULK_RESULTS_URL).host:
+            return await self.shopify.handle_bulk_results(request)
+        return _json(404, {"error": f"no fake for {request.url.host}"})
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
@@ -1,32 +1,117 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
 import httpx
 
+from app.integrations.rate_limit import RateLimiter, WindowLimiter, send_with_retries
+
 
 class PrintfulClient:
-    def __init__(self, api_key: str):
+    """Printful REST client.
+
+    Pass a shared `http_client` and `limiter` when publishing in bulk so every
+    caller draws from the same connection pool and rate budget.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        base_url: str = "https://api.printful.com",
+        http_client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_attempts: int = 5,
+    ):
         self.api_key = api_key
-        self.base_url = "https://api.printful.com"
+        self.base_url = base_url.rstrip("/")
+        self._client = http_client
+        self.limiter = limiter or WindowLimiter(limit=120, window_s=60)
+        self.max_attempts = max_attempts
+
+    async def _send(
+        self,
+        client: httpx.AsyncClient,
+        method: str,
+        endpoint: str,
+        json: Optional[Dict],
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        return await send_with_retries(
+            client,
+            method,
+            f"{self.base_url}{endpoint}",
+            limiter=self.limiter,
+            max_attempts=self.max_attempts,
+            # Creates are only retried when rejected unprocessed (429); see create_* for the rest.
+            **({} if method == "GET" else {"retry_statuses": {429}, "retry_transport_errors": False}),
+            json=json,
+            headers={"Authorization": f"Bearer {self.api_key}", **(headers or {})},
+            timeout=60,
+        )
 
-    async def _request(self, method: str, endpoint: str, json: Optional[Dict] = None) -> Dict[str, Any]:
-        headers = {"Authorization": f"Bearer {self.api_key}"}
-        async with httpx.AsyncClient() as client:
-            resp = await client.request(method, f"{self.base_url}{endpoint}", json=json, headers=headers, timeout=60)
-            resp.raise_for_status()
-            return resp.json()
+    async def _request(
+        self, method: str, endpoint: str, json: Optional[Dict] = None, *, allow_404: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        if self._client is not None:
+            resp = await self._send(self._client, method, endpoint, json)
+        else:
+            async with httpx.AsyncClient() as client:
+                resp = await self._send(client, method, endpoint, json)
+        if allow_404 and resp.status_code == 404:
+            return None
+        resp.raise_for_status()
+        return resp.json()
 
     async def list_products(self) -> Dict[str, Any]:
         return await self._request("GET", "/products")
 
+    async def get_if_changed(self, endpoint: str, etag: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Conditional GET: returns `(body, etag)`, or `(None, etag)` when unchanged (304)."""
+        headers = {"If-None-Match": etag} if etag else None
+        if self._client is not None:
+            resp = await self._send(self._client, "GET", endpoint, None, headers)
+        else:
+            async with httpx.AsyncClient() as client:
+                resp = await self._send(client, "GET", endpoint, None, headers)
+        if resp.status_code == 304:
+            return None, etag
+        resp.raise_for_status()
+        return resp.json(), resp.headers.get("ETag")
+
+    async def get_catalog_product(self, product_id: int, etag: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Catalog product with its variants and prices (`{"product": ..., "variants": [...]}`)."""
+        body, new_etag = await self.get_if_changed(f"/products/{product_id}", etag)
+        if body is None:
+            return None, new_etag
+        return body.get("result"), new_etag
+
+    async def get_sync_product_by_external_id(self, external_id: str) -> Optional[Dict[str, Any]]:
+        return await self._request("GET", f"/store/products/@{external_id}", allow_404=True)
+
     async def create_product_with_mockup(
         self,
         store_product_name: str,
         printful_product_id: int,
         variant_id: int,
         file_url: str,
+        *,
+        external_id: Optional[str] = None,
+        check_existing: bool = True,
     ) -> Dict[str, Any]:
+        """Create a sync product.
+
+        With `external_id` (and `check_existing`), an existing product with that id is
+        returned instead of creating a duplicate, which makes retries after ambiguous
+        failures safe. First attempts can skip the lookup to save a call.
+        """
+        if external_id and check_existing:
+            existing = await self.get_sync_product_by_external_id(external_id)
+            if existing is not None:
+                return existing
+        sync_product: Dict[str, Any] = {"name": store_product_name}
+        if external_id:
+            sync_product["external_id"] = external_id
         payload = {
-            "sync_product": {"name": store_product_name},
+            "sync_product": sync_product,
             "sync_variants": [
                 {
                     "variant_id": variant_id,
@@ -0,0 +1,208 @@
+"""Client-side rate limiting and retries for provider APIs.
+
+Each limiter paces outgoing calls against a provider's budget and re-syncs from
+the budget the provider reports in response headers, so many concurrent
+publishers share one budget without tripping 429s:
+
+- `LeakyBucketLimiter`: Shopify REST (`X-Shopify-Shop-Api-Call-Limit: 32/40`,
+  bucket of 40 draining at 2 calls/s on standard plans).
+- `WindowLimiter`: fixed-window APIs such as Printful (`X-Ratelimit-Remaining`,
+  `X-Ratelimit-Reset`, 120 calls/60 s).
+
+A 429's `Retry-After` pauses the whole limiter, not just the one caller.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Iterable, Mapping, Optional
+
+import httpx
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimiter:
+    """Base limiter: no pacing, only honours Retry-After pauses."""
+
+    def __init__(self, *, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                wait = max(self._paused_until - self._clock(), self._wait_time())
+                if wait <= 0:
+                    self._consume()
+                    return
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        """Re-sync from a response's rate-limit headers."""
+
+    def _wait_time(self) -> float:
+        return 0.0
+
+    def _consume(self) -> None:
+        pass
+
+
+class LeakyBucketLimiter(RateLimiter):
+    def __init__(
+        self,
+        capacity: int = 40,
+        leak_rate: float = 2.0,
+        *,
+        headroom: int = 2,
+        header: str = "X-Shopify-Shop-Api-Call-Limit",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(clock=clock)
+        self.capacity = capacity
+        self.leak_rate = leak_rate
+        self.headroom = headroom
+        self.header = header
+        self._level = 0.0
+        self._updated = clock()
+
+    def _leak(self) -> None:
+        now = self._clock()
+        self._level = max(0.0, self._level - (now - self._updated) * self.leak_rate)
+        self._updated = now
+
+    def _wait_time(self) -> float:
+        self._leak()
+        over = self._level + 1 - (self.capacity - self.headroom)
+        return over / self.leak_rate if over > 0 else 0.0
+
+    def _consume(self) -> None:
+        self._level += 1
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        value = headers.get(self.header)
+        if not value or "/" not in value:
+            return
+        used, _, cap = value.partition("/")
+        try:
+            used_n, cap_n = int(used), int(cap)
+        except ValueError:
+            return
+        self._leak()
+        self.capacity = cap_n
+        # The server's count lags our in-flight calls, so only ever raise our estimate.
+        self._level = max(self._level, float(used_n))
+
+
+class WindowLimiter(RateLimiter):
+    def __init__(
+        self,
+        limit: int = 120,
+        window_s: float = 60.0,
+        *,
+        remaining_header: str = "X-Ratelimit-Remaining",
+        reset_header: str = "X-Ratelimit-Reset",
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(clock=clock)
+        self.limit = limit
+        self.window_s = window_s
+        self.remaining_header = remaining_header
+        self.reset_header = reset_header
+        self._remaining = limit
+        self._reset_at = clock() + window_s
+
+    def _roll(self) -> None:
+        now = self._clock()
+        if now >= self._reset_at:
+            self._remaining = self.limit
+            self._reset_at = now + self.window_s
+
+    def _wait_time(self) -> float:
+        self._roll()
+        return 0.0 if self._remaining > 0 else self._reset_at - self._clock()
+
+    def _consume(self) -> None:
+        self._remaining -= 1
+
+    def observe(self, headers: Mapping[str, str]) -> None:
+        remaining = headers.get(self.remaining_header)
+        reset = headers.get(self.reset_header)
+        try:
+            if reset is not None:
+                self._reset_at = self._clock() + float(reset)
+            if remaining is not None:
+                self._remaining = min(self._remaining, int(remaining))
+        except ValueError:
+            pass
+
+
+class RetryableError(Exception):
+    """Retries exhausted on a retryable failure (429/5xx/transport error)."""
+
+
+async def send_with_retries(
+    client: httpx.AsyncClient,
+    method: str,
+    url: str,
+    *,
+    limiter: Optional[RateLimiter] = None,
+    max_attempts: int = 5,
+    base_delay_s: float = 0.5,
+    max_delay_s: float = 30.0,
+    retry_statuses: Iterable[int] = RETRY_STATUSES,
+    retry_transport_errors: bool = True,
+    **kwargs: Any,
+) -> httpx.Response:
+    """Send through `limiter`, retrying 429/5xx and transport errors with jittered backoff.
+
+    For non-idempotent calls pass `retry_statuses={429}` and
+    `retry_transport_errors=False`: a 429 was never processed, while a timeout or
+    5xx may have been, so those are left to the caller's existence check.
+    """
+    retry_statuses = frozenset(retry_statuses)
+    last_exc: Optional[BaseException] = None
+    for attempt in range(1, max_attempts + 1):
+        if limiter is not None:
+            await limiter.acquire()
+        delay = min(max_delay_s, base_delay_s * 2 ** (attempt - 1)) * (0.5 + random.random() / 2)
+        try:
+            resp = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if not retry_transport_errors:
+                raise
+            last_exc = e
+        else:
+            if limiter is not None:
+                limiter.observe(resp.headers)
+            if resp.status_code not in retry_statuses:
+                return resp
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if resp.status_code == 429 and limiter is not None:
+                limiter.pause(retry_after if retry_after is not None else delay)
+            if retry_after is not None:
+                delay = min(max_delay_s, retry_after)
+            last_exc = httpx.HTTPStatusError(f"HTTP {resp.status_code} for {url}", request=resp.request, response=resp)
+        if attempt < max_attempts:
+            await asyncio.sleep(delay)
+    raise RetryableError(f"{method} {url} failed after {max_attempts} attempts: {last_exc}") from last_exc
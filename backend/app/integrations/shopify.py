@@ -2,21 +2,68 @@ from typing import Any, Dict, List, Optional
 
 import httpx
 
+from app.integrations.rate_limit import LeakyBucketLimiter, RateLimiter, send_with_retries
+
 
 class ShopifyClient:
-    def __init__(self, shop_domain: str, admin_access_token: str, api_version: str = "2023-10"):
-        self.base_url = f"https://{shop_domain}/admin/api/{api_version}"
+    """Shopify Admin REST client.
+
+    Calls are paced by a leaky-bucket limiter synced from
+    `X-Shopify-Shop-Api-Call-Limit`; share one `limiter` per shop across callers.
+    """
+
+    def __init__(
+        self,
+        shop_domain: str,
+        admin_access_token: str,
+        api_version: str = "2023-10",
+        *,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        limiter: Optional[RateLimiter] = None,
+        max_attempts: int = 5,
+    ):
+        self.base_url = base_url or f"https://{shop_domain}/admin/api/{api_version}"
         self.token = admin_access_token
+        self._client = http_client
+        self.limiter = limiter or LeakyBucketLimiter(capacity=40, leak_rate=2.0)
+        self.max_attempts = max_attempts
 
-    async def _request(self, method: str, endpoint: str, json: Optional[Dict] = None) -> Dict[str, Any]:
-        headers = {
-            "X-Shopify-Access-Token": self.token,
-            "Content-Type": "application/json",
-        }
-        async with httpx.AsyncClient() as client:
-            resp = await client.request(method, f"{self.base_url}{endpoint}", json=json, headers=headers, timeout=60)
-            resp.raise_for_status()
-            return resp.json()
+    async def _send(
+        self, client: httpx.AsyncClient, method: str, endpoint: str, json: Optional[Dict], params: Optional[Dict]
+    ) -> httpx.Response:
+        return await send_with_retries(
+            client,
+            method,
+            f"{self.base_url}{endpoint}",
+            limiter=self.limiter,
+            max_attempts=self.max_attempts,
+            # Creates are only retried when rejected unprocessed (429); see create_* for the rest.
+            **({} if method == "GET" else {"retry_statuses": {429}, "retry_transport_errors": False}),
+            json=json,
+            params=params,
+            headers={
+                "X-Shopify-Access-Token": self.token,
+                "Content-Type": "application/json",
+            },
+            timeout=60,
+        )
+
+    async def _request(
+        self, method: str, endpoint: str, json: Optional[Dict] = None, params: Optional[Dict] = None
+    ) -> Dict[str, Any]:
+        if self._client is not None:
+            resp = await self._send(self._client, method, endpoint, json, params)
+        else:
+            async with httpx.AsyncClient() as client:
+                resp = await self._send(client, method, endpoint, json, params)
+        resp.raise_for_status()
+        return resp.json()
+
+    async def find_product_by_handle(self, handle: str) -> Optional[Dict[str, Any]]:
+        data = await self._request("GET", "/products.json", params={"handle": handle, "fields": "id,handle,status"})
+        products = data.get("products") or []
+        return {"product": products[0]} if products else None
 
     async def create_draft_product(
         self,
@@ -24,7 +71,20 @@ class ShopifyClient:
         body_html: str,
         images: List[str],
         tags: List[str] | None = None,
+        *,
+        handle: Optional[str] = None,
+        check_existing: bool = True,
     ) -> Dict[str, Any]:
+        """Create a draft product.
+
+        With `handle` (and `check_existing`), an existing product with that handle is
+        returned instead of creating a duplicate, which makes retries after ambiguous
+        failures safe. First attempts can skip the lookup to save a call.
+        """
+        if handle and check_existing:
+            existing = await self.find_product_by_handle(handle)
+            if existing is not None:
+                return existing
         payload: Dict[str, Any] = {
             "product": {
                 "title": title,
@@ -33,6 +93,8 @@ class ShopifyClient:
                 "status": "draft",
             }
         }
+        if handle:
+            payload["product"]["handle"] = handle
         if tags:
             payload["product"]["tags"] = ", ".join(tags)
         return await self._request("POST", "/products.json", json=payload)
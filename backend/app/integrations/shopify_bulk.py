@@ -0,0 +1,274 @@
+"""Shopify GraphQL bulk operations.
+
+One bulk operation replaces thousands of REST calls:
+
+1. `stage_upload` — `stagedUploadsCreate`, then a multipart POST of the JSONL
+   variables file to the returned upload target.
+2. `run_bulk_mutation` / `run_bulk_query` — start the operation.
+3. `wait_for_operation` — poll `node(id:)` until it completes.
+4. `stream_results` — stream the result JSONL line by line, never holding the
+   whole file in memory.
+
+`bulk_create_draft_products` and `fetch_products_by_handle` wrap these for the
+catalog sync in app.services.publishing.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+
+import httpx
+
+from app.integrations.rate_limit import send_with_retries
+
+STAGED_UPLOADS_CREATE = """
+mutation stagedUploadsCreate($input: [StagedUploadInput!]!) {
+  stagedUploadsCreate(input: $input) {
+    stagedTargets { url resourceUrl parameters { name value } }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_RUN_MUTATION = """
+mutation bulkOperationRunMutation($mutation: String!, $stagedUploadPath: String!) {
+  bulkOperationRunMutation(mutation: $mutation, stagedUploadPath: $stagedUploadPath) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_RUN_QUERY = """
+mutation bulkOperationRunQuery($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+"""
+
+BULK_OPERATION_STATUS = """
+query bulkOperation($id: ID!) {
+  node(id: $id) {
+    ... on BulkOperation { id status errorCode objectCount url partialDataUrl }
+  }
+}
+"""
+
+PRODUCT_CREATE_MUTATION = """
+mutation call($input: ProductInput!) {
+  productCreate(input: $input) {
+    product { id handle }
+    userErrors { field message }
+  }
+}
+"""
+
+TERMINAL_STATUSES = frozenset({"COMPLETED", "FAILED", "CANCELED", "EXPIRED"})
+
+
+class ShopifyBulkError(RuntimeError):
+    pass
+
+
+@dataclass
+class BulkOperation:
+    id: str
+    status: str
+    error_code: Optional[str] = None
+    object_count: int = 0
+    url: Optional[str] = None
+    partial_data_url: Optional[str] = None
+
+
+class ShopifyBulkClient:
+    def __init__(
+        self,
+        shop_domain: str,
+        admin_access_token: str,
+        api_version: str = "2023-10",
+        *,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_attempts: int = 5,
+    ):
+        self.base_url = base_url or f"https://{shop_domain}/admin/api/{api_version}"
+        self.token = admin_access_token
+        self._client = http_client
+        self.max_attempts = max_attempts
+
+    async def __aenter__(self) -> "ShopifyBulkClient":
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=60)
+            self._owns_client = True
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        if getattr(self, "_owns_client", False) and self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            raise RuntimeError("ShopifyBulkClient needs an http_client or `async with`")
+        return self._client
+
+    async def graphql(self, query: str, variables: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Run a GraphQL call, waiting out cost-based throttling."""
+        for _ in range(self.max_attempts):
+            resp = await send_with_retries(
+                self.client,
+                "POST",
+                f"{self.base_url}/graphql.json",
+                max_attempts=self.max_attempts,
+                json={"query": query, "variables": variables or {}},
+                headers={"X-Shopify-Access-Token": self.token, "Content-Type": "application/json"},
+            )
+            resp.raise_for_status()
+            body = resp.json()
+            errors = body.get("errors") or []
+            if any((e.get("extensions") or {}).get("code") == "THROTTLED" for e in errors):
+                await asyncio.sleep(self._throttle_wait(body))
+                continue
+            if errors:
+                raise ShopifyBulkError(f"GraphQL errors: {errors}")
+            return body["data"]
+        raise ShopifyBulkError("GraphQL call still throttled after retries")
+
+    @staticmethod
+    def _throttle_wait(body: Dict[str, Any]) -> float:
+        cost = (body.get("extensions") or {}).get("cost") or {}
+        status = cost.get("throttleStatus") or {}
+        needed = float(cost.get("requestedQueryCost") or 10) - float(status.get("currentlyAvailable") or 0)
+        return max(0.5, needed / float(status.get("restoreRate") or 50))
+
+    @staticmethod
+    def _check_user_errors(payload: Dict[str, Any]) -> None:
+        if payload.get("userErrors"):
+            raise ShopifyBulkError(f"user errors: {payload['userErrors']}")
+
+    async def stage_upload(self, content: bytes, *, filename: str = "bulk_vars.jsonl") -> str:
+        """Upload a JSONL variables file; returns the `stagedUploadPath` for the mutation."""
+        data = await self.graphql(
+            STAGED_UPLOADS_CREATE,
+            {
+                "input": [
+                    {
+                        "resource": "BULK_MUTATION_VARIABLES",
+                        "filename": filename,
+                        "mimeType": "text/jsonl",
+                        "httpMethod": "POST",
+                    }
+                ]
+            },
+        )
+        payload = data["stagedUploadsCreate"]
+        self._check_user_errors(payload)
+        target = payload["stagedTargets"][0]
+        params = {p["name"]: p["value"] for p in target["parameters"]}
+        resp = await self.client.post(
+            target["url"], data=params, files={"file": (filename, content, "text/jsonl")}, timeout=300
+        )
+        resp.raise_for_status()
+        return params["key"]
+
+    async def run_bulk_mutation(self, mutation: str, staged_upload_path: str) -> BulkOperation:
+        data = await self.graphql(BULK_RUN_MUTATION, {"mutation": mutation, "stagedUploadPath": staged_upload_path})
+        payload = data["bulkOperationRunMutation"]
+        self._check_user_errors(payload)
+        op = payload["bulkOperation"]
+        return BulkOperation(id=op["id"], status=op["status"])
+
+    async def run_bulk_query(self, query: str) -> BulkOperation:
+        data = await self.graphql(BULK_RUN_QUERY, {"query": query})
+        payload = data["bulkOperationRunQuery"]
+        self._check_user_errors(payload)
+        op = payload["bulkOperation"]
+        return BulkOperation(id=op["id"], status=op["status"])
+
+    async def get_operation(self, op_id: str) -> BulkOperation:
+        node = (await self.graphql(BULK_OPERATION_STATUS, {"id": op_id}))["node"]
+        return BulkOperation(
+            id=node["id"],
+            status=node["status"],
+            error_code=node.get("errorCode"),
+            object_count=int(node.get("objectCount") or 0),
+            url=node.get("url"),
+            partial_data_url=node.get("partialDataUrl"),
+        )
+
+    async def wait_for_operation(
+        self,
+        op_id: str,
+        *,
+        poll_interval_s: float = 1.0,
+        max_interval_s: float = 15.0,
+        timeout_s: float = 3600.0,
+    ) -> BulkOperation:
+        """Poll with gentle backoff until the operation reaches a terminal state."""
+        deadline = time.monotonic() + timeout_s
+        interval = poll_interval_s
+        while True:
+            op = await self.get_operation(op_id)
+            if op.status in TERMINAL_STATUSES:
+                if op.status != "COMPLETED" and not op.partial_data_url:
+                    raise ShopifyBulkError(f"bulk operation {op.id} {op.status} ({op.error_code})")
+                return op
+            if time.monotonic() > deadline:
+                raise ShopifyBulkError(f"bulk operation {op.id} still {op.status} after {timeout_s:.0f}s")
+            await asyncio.sleep(interval)
+            interval = min(max_interval_s, interval * 1.5)
+
+    async def stream_results(self, url: Optional[str]) -> AsyncIterator[Dict[str, Any]]:
+        """Yield result objects from a bulk operation's JSONL output, one line at a time."""
+        if not url:  # operations with no results have no file
+            return
+        async with self.client.stream("GET", url, timeout=300) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+    # -- catalog helpers ----------------------------------------------------
+
+    async def bulk_create_draft_products(self, products: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Create draft products (ProductInput dicts) in one bulk mutation.
+
+        Returns one `productCreate` payload per input line, in input order.
+        """
+        lines = [json.dumps({"input": {"status": "DRAFT", **p}}, separators=(",", ":")) for p in products]
+        if not lines:
+            return []
+        path = await self.stage_upload(("\n".join(lines) + "\n").encode("utf-8"))
+        op = await self.run_bulk_mutation(PRODUCT_CREATE_MUTATION, path)
+        op = await self.wait_for_operation(op.id)
+
+        results: List[Dict[str, Any]] = [{"product": None, "userErrors": [{"message": "no result"}]}] * len(lines)
+        async for row in self.stream_results(op.url or op.partial_data_url):
+            line = row.get("__lineNumber")
+            payload = ((row.get("data") or {}).get("productCreate")) or {
+                "product": None,
+                "userErrors": row.get("errors") or [{"message": "no data"}],
+            }
+            if line is not None and 0 <= int(line) < len(results):
+                results[int(line)] = payload
+        return results
+
+    async def fetch_products_by_handle(self, handle_prefix: str) -> Dict[str, str]:
+        """Map handle -> product GID for every product whose handle starts with `handle_prefix`."""
+        query = (
+            '{ products(query: "handle:%s*") { edges { node { id handle } } } }' % handle_prefix.replace('"', "")
+        )
+        op = await self.run_bulk_query(query)
+        op = await self.wait_for_operation(op.id)
+        out: Dict[str, str] = {}
+        async for row in self.stream_results(op.url):
+            if row.get("handle"):
+                out[row["handle"]] = row["id"]
+        return out
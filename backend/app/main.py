@@ -1,11 +1,16 @@
+import asyncio
+import contextlib
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
+from app.core.realtime import event_hub
+from app.core.response_cache import listen_for_invalidations
 from app.db.session import Base, engine
-from app.routers import designs, products, trends, auth, realtime
+from app.routers import analytics, assets, designs, exports, products, publishing, trends, auth, realtime
+from app.services.snapshot_storage import ensure_snapshot_partitions
 
 
 @asynccontextmanager
@@ -14,7 +19,16 @@ async def lifespan(app: FastAPI):
     if settings.env != "production":
         async with engine.begin() as conn:
             await conn.run_sync(Base.metadata.create_all)
-    yield
+            await ensure_snapshot_partitions(conn)
+    invalidator = asyncio.create_task(listen_for_invalidations()) if settings.response_cache_enabled else None
+    try:
+        yield
+    finally:
+        if invalidator is not None:
+            invalidator.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await invalidator
+        await event_hub.close()
 
 app = FastAPI(
     title="POD Trend & Design Automation API",
@@ -38,6 +52,10 @@ app.include_router(auth.router, prefix="/api/v1/auth", tags=["auth"])
 app.include_router(trends.router, prefix="/api/v1/trends", tags=["trends"])
 app.include_router(products.router, prefix="/api/v1/products", tags=["products"])
 app.include_router(designs.router, prefix="/api/v1/designs", tags=["designs"])
+app.include_router(publishing.router, prefix="/api/v1/publish", tags=["publishing"])
+app.include_router(exports.router, prefix="/api/v1/exports", tags=["exports"])
+app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["analytics"])
+app.include_router(assets.router, prefix="/assets", tags=["assets"])
 
 
 @app.get("/health")
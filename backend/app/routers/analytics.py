@@ -0,0 +1,115 @@
+"""Trend analytics, served from the precomputed rollups (app.services.trend_rollups) only."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_user
+from app.core.response_cache import response_cache
+from app.db.session import get_read_session
+from app.schemas.analytics import AnalyticsSummaryOut, DailyCountOut, NicheStatOut, ScoreHistogramOut
+from app.services.trend_rollups import HISTOGRAM_BUCKETS, daily_counts, score_histogram, top_niches
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+MAX_WINDOW_DAYS = 366
+
+
+def _since(days: int, since: Optional[date], until: Optional[date]) -> date:
+    start = since or (until or date.today()) - timedelta(days=days)
+    if until is not None and until <= start:
+        raise HTTPException(status_code=422, detail="until must be after since")
+    return start
+
+
+@router.get("/", response_model=AnalyticsSummaryOut)
+async def analytics_summary(
+    request: Request,
+    days: int = Query(default=30, ge=1, le=MAX_WINDOW_DAYS),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    source: Optional[str] = None,
+    niches: int = Query(default=10, ge=1, le=100),
+    db: AsyncSession = Depends(get_read_session),
+):
+    start = _since(days, since, until)
+
+    async def load():
+        window = dict(since=start, until=until, source=source)
+        daily = await daily_counts(db, **window)
+        items = sum(d.items for d in daily)
+        scored = sum(d.scored for d in daily)
+        score_sum = sum(d.avg_score * d.scored for d in daily if d.avg_score is not None)
+        return AnalyticsSummaryOut(
+            since=start,
+            until=until,
+            items=items,
+            scored=scored,
+            avg_score=score_sum / scored if scored else None,
+            top_niches=await top_niches(db, limit=niches, **window),
+            daily=daily,
+            histogram=ScoreHistogramOut(
+                bucket_width=100 // HISTOGRAM_BUCKETS, counts=await score_histogram(db, **window)
+            ),
+        )
+
+    return await response_cache.respond(request, AnalyticsSummaryOut, load)
+
+
+@router.get("/niches", response_model=List[NicheStatOut])
+async def analytics_niches(
+    request: Request,
+    days: int = Query(default=30, ge=1, le=MAX_WINDOW_DAYS),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    source: Optional[str] = None,
+    limit: int = Query(default=20, ge=1, le=200),
+    min_scored: int = Query(default=3, ge=1),
+    db: AsyncSession = Depends(get_read_session),
+):
+    start = _since(days, since, until)
+
+    async def load():
+        return await top_niches(db, since=start, until=until, source=source, limit=limit, min_scored=min_scored)
+
+    return await response_cache.respond(request, List[NicheStatOut], load)
+
+
+@router.get("/daily", response_model=List[DailyCountOut])
+async def analytics_daily(
+    request: Request,
+    days: int = Query(default=30, ge=1, le=MAX_WINDOW_DAYS),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    source: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_session),
+):
+    start = _since(days, since, until)
+
+    async def load():
+        return await daily_counts(db, since=start, until=until, source=source)
+
+    return await response_cache.respond(request, List[DailyCountOut], load)
+
+
+@router.get("/histogram", response_model=ScoreHistogramOut)
+async def analytics_histogram(
+    request: Request,
+    days: int = Query(default=30, ge=1, le=MAX_WINDOW_DAYS),
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    source: Optional[str] = None,
+    niche: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_session),
+):
+    start = _since(days, since, until)
+
+    async def load():
+        counts = await score_histogram(db, since=start, until=until, source=source, niche=niche)
+        return ScoreHistogramOut(bucket_width=100 // HISTOGRAM_BUCKETS, counts=counts)
+
+    return await response_cache.respond(request, ScoreHistogramOut, load)
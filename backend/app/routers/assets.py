@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+
+from app.services.asset_storage import IMMUTABLE_CACHE_CONTROL, LocalAssetStore, content_type_for, get_asset_store
+
+# Public on purpose: <img> tags cannot send bearer tokens, and keys are unguessable hashes.
+router = APIRouter()
+
+
+@router.get("/{key:path}")
+async def get_asset(key: str, request: Request):
+    # Keys are content hashes, so the key itself is a strong validator.
+    etag = f'"{key.rsplit("/", 1)[-1]}"'
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+
+    store = get_asset_store()
+    if isinstance(store, LocalAssetStore):
+        path = store.path_for(key)
+        if path is None or not path.is_file():
+            raise HTTPException(status_code=404, detail="Asset not found")
+        return FileResponse(path, media_type=content_type_for(key), headers=headers)
+
+    data = await store.get(key)
+    if data is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return Response(content=data, media_type=content_type_for(key), headers=headers)
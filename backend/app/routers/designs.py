@@ -1,15 +1,18 @@
-from typing import Optional
+from datetime import datetime
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends
 
 from app.core.auth import get_current_user, Depends, HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.db.models import DesignAsset, MarketplaceProduct
-from app.db.session import get_session
-from app.services.design_generation import DesignRequest, generate_design_for_product
+from app.db.session import get_read_session, get_session
+from app.services.design_generation import DesignRequest, create_pending_designs
+from app.services.render_cache import get_stats, lookup_renders, record_stats, render_cache_key
+from app.tasks.designs import render_designs_task
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
@@ -19,6 +22,14 @@ class DesignCreateRequest(BaseModel):
     negative_prompt: Optional[str] = None
 
 
+class DesignBatchItem(DesignCreateRequest):
+    product_id: int
+
+
+class DesignBatchRequest(BaseModel):
+    items: List[DesignBatchItem] = Field(..., min_length=1, max_length=500)
+
+
 class DesignRead(BaseModel):
     id: int
     product_id: int
@@ -28,36 +39,78 @@ class DesignRead(BaseModel):
     image_url: Optional[str]
     thumbnail_url: Optional[str]
     status: str
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
 
-@router.post("/{product_id}", response_model=DesignRead)
+class RenderCacheStats(BaseModel):
+    hits: int
+    misses: int
+    hit_rate: Optional[float]
+    entries: int
+    entry_hits_total: int
+
+
+async def _enqueue_designs(db: AsyncSession, items: List[DesignBatchItem]) -> List[DesignRead]:
+    product_ids = {item.product_id for item in items}
+    res = await db.execute(select(MarketplaceProduct.id).where(MarketplaceProduct.id.in_(product_ids)))
+    missing = product_ids - set(res.scalars().all())
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Product not found: {sorted(missing)}")
+
+    reqs = [DesignRequest(prompt=item.prompt, negative_prompt=item.negative_prompt) for item in items]
+    keys = [render_cache_key(req) for req in reqs]
+    hits = await lookup_renders(db, keys)
+    cached = [hits.get(key) for key in keys]
+
+    assets = await create_pending_designs(
+        db,
+        [(item.product_id, req) for item, req in zip(items, reqs)],
+        cached=cached,
+    )
+    await db.commit()
+    # Commit before enqueueing so the worker always sees the pending rows.
+    pending = [a.id for a in assets if a.status == "pending"]
+    if pending:
+        render_designs_task.delay(asset_ids=pending)
+    # Pending designs are counted by the render task, which may still find them cached.
+    await record_stats(sum(hit is not None for hit in cached), 0)
+    return [DesignRead.model_validate(a) for a in assets]
+
+
+@router.get("/cache/stats", response_model=RenderCacheStats)
+async def get_render_cache_stats(db: AsyncSession = Depends(get_read_session)):
+    return await get_stats(db)
+
+
+@router.post("/batch", response_model=List[DesignRead], status_code=202)
+async def create_designs_batch(
+    body: DesignBatchRequest,
+    db: AsyncSession = Depends(get_session),
+):
+    """Queue many renders at once; cached renders come back `ready`, the rest `pending`."""
+    return await _enqueue_designs(db, body.items)
+
+
+@router.post("/{product_id}", response_model=DesignRead, status_code=202)
 async def create_design_for_product(
     product_id: int,
     body: DesignCreateRequest,
     db: AsyncSession = Depends(get_session),
 ):
-    product_res = await db.execute(select(MarketplaceProduct).filter(MarketplaceProduct.id == product_id))
-    product = product_res.scalar_one_or_none()
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-
-    sd_api_base = "https://your-stable-diffusion-api.example.com"
-    asset = await generate_design_for_product(
-        db,
-        product,
-        DesignRequest(prompt=body.prompt, negative_prompt=body.negative_prompt),
-        sd_api_base=sd_api_base,
-    )
-    return DesignRead.model_validate(asset)
+    """Queue a render (or reuse a cached one); completion is published as `design_completed`."""
+    (asset,) = await _enqueue_designs(db, [DesignBatchItem(product_id=product_id, **body.model_dump())])
+    return asset
 
 
 @router.get("/{product_id}/latest", response_model=DesignRead | None)
 async def get_latest_design_for_product(
     product_id: int,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
     res = await db.execute(
         select(DesignAsset)
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select
+
+from app.core.auth import get_current_user
+from app.services.exports import MEDIA_TYPES, check_format, products_export_stmt, stream_export, trend_items_export_stmt
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+FORMAT_QUERY = Query("ndjson", pattern="^(ndjson|csv|parquet)$")
+
+
+def _export_response(stmt: Select, fmt: str, name: str) -> StreamingResponse:
+    try:
+        check_format(fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=501, detail=str(e))
+    filename = f"{name}-{datetime.utcnow():%Y%m%dT%H%M%S}.{fmt}"
+    return StreamingResponse(
+        stream_export(stmt, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
+@router.get("/trends")
+async def export_trend_items(
+    format: str = FORMAT_QUERY,
+    min_score: Optional[int] = None,
+    source: Optional[str] = None,
+    ai_status: Optional[str] = None,
+    published_since: Optional[datetime] = None,
+    published_until: Optional[datetime] = None,
+):
+    """Stream every matching trend item (no row limit)."""
+    stmt = trend_items_export_stmt(
+        min_score=min_score,
+        source=source,
+        ai_status=ai_status,
+        published_since=published_since,
+        published_until=published_until,
+    )
+    return _export_response(stmt, format, "trend_items")
+
+
+@router.get("/products")
+async def export_products(
+    format: str = FORMAT_QUERY,
+    marketplace: Optional[str] = None,
+    niche: Optional[str] = None,
+    min_score: Optional[float] = None,
+    updated_since: Optional[datetime] = None,
+):
+    """Stream every matching product with its latest snapshot (`snapshot_*`) and trend score (`trend_*`)."""
+    stmt = products_export_stmt(marketplace=marketplace, niche=niche, min_score=min_score, updated_since=updated_since)
+    return _export_response(stmt, format, "products")
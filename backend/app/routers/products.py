@@ -1,20 +1,26 @@
+from datetime import datetime, timedelta
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 
 from app.core.auth import get_current_user, Depends
 from pydantic import BaseModel
 from sqlalchemy import desc, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import fast_json
+from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.crud.product import list_product_rows
 from app.db.models import MarketplaceProduct, ProductSnapshot, TrendScore
-from app.db.session import get_session
+from app.db.session import get_read_session
+from app.services.snapshot_storage import load_snapshot_history
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
 
 
 class ProductSnapshotRead(BaseModel):
-    captured_at: str
+    captured_at: datetime
     price: float
     currency: str
     rank: int | None = None
@@ -38,6 +44,23 @@ class TrendScoreRead(BaseModel):
         from_attributes = True
 
 
+class SnapshotPointRead(BaseModel):
+    captured_at: datetime
+    granularity: str
+    samples: int
+    price: float
+    currency: str
+    rank: int | None = None
+    rank_min: int | None = None
+    rank_max: int | None = None
+    review_count: int | None = None
+    rating: float | None = None
+    estimated_sales: float | None = None
+
+    class Config:
+        from_attributes = True
+
+
 class ProductRead(BaseModel):
     id: int
     marketplace: str
@@ -58,51 +81,74 @@ class ProductRead(BaseModel):
 
 @router.get("/", response_model=List[ProductRead])
 async def list_products(
+    request: Request,
     limit: int = 20,
     marketplace: Optional[str] = None,
     min_score: float = 0.0,
-    db: AsyncSession = Depends(get_session),
+    db: AsyncSession = Depends(get_read_session),
 ):
-    stmt = select(MarketplaceProduct).limit(limit)
-    if marketplace:
-        stmt = stmt.filter(MarketplaceProduct.marketplace == marketplace)
-
-    res = await db.execute(stmt)
-    products = res.scalars().all()
-
-    items: List[ProductRead] = []
-    for p in products:
-        snap_stmt = (
-            select(ProductSnapshot)
-            .filter(ProductSnapshot.product_id == p.id)
-            .order_by(desc(ProductSnapshot.captured_at))
-            .limit(1)
-        )
-        trend_stmt = (
-            select(TrendScore)
-            .filter(TrendScore.product_id == p.id, TrendScore.overall_score >= min_score)
-            .order_by(desc(TrendScore.created_at))
-            .limit(1)
-        )
-        snap_res = await db.execute(snap_stmt)
-        trend_res = await db.execute(trend_stmt)
-        snap = snap_res.scalar_one_or_none()
-        trend = trend_res.scalar_one_or_none()
-
-        items.append(
-            ProductRead(
-                id=p.id,
-                marketplace=p.marketplace,
-                external_id=p.external_id,
-                url=p.url,
-                title=p.title,
-                description=p.description,
-                image_url=p.image_url,
-                tags=p.tags,
-                niche=p.niche,
-                latest_snapshot=ProductSnapshotRead.model_validate(snap) if snap else None,
-                latest_trend=TrendScoreRead.model_validate(trend) if trend else None,
+    if settings.api_fast_json:
+
+        async def build() -> bytes:
+            return fast_json.dumps(await list_product_rows(db, limit=limit, marketplace=marketplace, min_score=min_score))
+
+        return await response_cache.respond_json(request, build)
+
+    async def load() -> List[ProductRead]:
+        stmt = select(MarketplaceProduct).order_by(MarketplaceProduct.id).limit(limit)
+        if marketplace:
+            stmt = stmt.filter(MarketplaceProduct.marketplace == marketplace)
+
+        res = await db.execute(stmt)
+        products = res.scalars().all()
+
+        items: List[ProductRead] = []
+        for p in products:
+            snap_stmt = (
+                select(ProductSnapshot)
+                .filter(ProductSnapshot.product_id == p.id)
+                .order_by(desc(ProductSnapshot.captured_at))
+                .limit(1)
+            )
+            trend_stmt = (
+                select(TrendScore)
+                .filter(TrendScore.product_id == p.id, TrendScore.overall_score >= min_score)
+                .order_by(desc(TrendScore.created_at))
+                .limit(1)
             )
-        )
+            snap_res = await db.execute(snap_stmt)
+            trend_res = await db.execute(trend_stmt)
+            snap = snap_res.scalar_one_or_none()
+            trend = trend_res.scalar_one_or_none()
+
+            items.append(
+                ProductRead(
+                    id=p.id,
+                    marketplace=p.marketplace,
+                    external_id=p.external_id,
+                    url=p.url,
+                    title=p.title,
+                    description=p.description,
+                    image_url=p.image_url,
+                    tags=p.tags,
+                    niche=p.niche,
+                    latest_snapshot=ProductSnapshotRead.model_validate(snap) if snap else None,
+                    latest_trend=TrendScoreRead.model_validate(trend) if trend else None,
+                )
+            )
+
+        return items
+
+    return await response_cache.respond(request, List[ProductRead], load)
 
-    return items
+
+@router.get("/{product_id}/history", response_model=List[SnapshotPointRead])
+async def get_product_history(
+    product_id: int,
+    days: int = Query(default=30, ge=1, le=3650),
+    db: AsyncSession = Depends(get_read_session),
+):
+    """Snapshot history; windows beyond raw retention are served from daily/weekly rollups."""
+    since = datetime.utcnow() - timedelta(days=days)
+    points = await load_snapshot_history(db, product_id, since=since)
+    return [SnapshotPointRead.model_validate(p) for p in points]
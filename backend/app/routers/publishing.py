@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from pydantic import BaseModel, Field
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.auth import get_current_user
+from app.db.models import DesignAsset
+from app.db.session import get_read_session, get_session
+from app.services.asset_storage import is_public_url
+from app.services.printful_catalog import CatalogUnavailable, get_catalog, resolve_variant_ids
+from app.services.publishing import PublishItem, batch_progress, create_publish_jobs
+from app.tasks.publishing import publish_designs_task
+
+router = APIRouter(dependencies=[Depends(get_current_user)])
+
+
+class PublishBatchItem(BaseModel):
+    design_id: int
+    printful_product_id: Optional[int] = None
+    printful_variant_id: Optional[int] = None
+    # Resolved against the local Printful catalog when no variant id is given.
+    product_type: Optional[str] = Field(default=None, examples=["T-Shirt"])
+    size: Optional[str] = Field(default=None, examples=["L"])
+    color: Optional[str] = None
+
+
+class PublishBatchRequest(BaseModel):
+    items: List[PublishBatchItem] = Field(..., min_length=1, max_length=1000)
+
+
+class PublishBatchResponse(BaseModel):
+    batch_id: str
+    queued: int
+    already_published: int
+    task_id: Optional[str] = None
+
+
+class CatalogVariantOut(BaseModel):
+    id: int
+    product_id: int
+    product_title: str
+    name: str
+    size: str
+    color: str
+    price: float
+
+
+class PublishBatchProgress(BaseModel):
+    batch_id: str
+    total: int
+    by_status: Dict[str, int]
+
+
+@router.post("/batch", response_model=PublishBatchResponse, status_code=202)
+async def publish_batch(body: PublishBatchRequest, db: AsyncSession = Depends(get_session)):
+    design_ids = {item.design_id for item in body.items}
+    res = await db.execute(
+        select(DesignAsset.id, DesignAsset.product_id, DesignAsset.status, DesignAsset.image_url).where(
+            DesignAsset.id.in_(design_ids)
+        )
+    )
+    rows = res.all()
+    designs = {design_id: (product_id, status) for design_id, product_id, status, _ in rows}
+    missing = design_ids - designs.keys()
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Design not found: {sorted(missing)}")
+    not_ready = sorted(d for d, (_, status) in designs.items() if status != "ready")
+    if not_ready:
+        raise HTTPException(status_code=409, detail=f"Design not ready: {not_ready}")
+    # Printful and Shopify fetch the image themselves; a relative /assets URL would only fail there.
+    unreachable = sorted(design_id for design_id, _, _, url in rows if not is_public_url(url))
+    if unreachable:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Design image URL is not absolute (set ASSET_PUBLIC_BASE_URL): {unreachable}",
+        )
+
+    catalog = await get_catalog()
+    items: List[PublishItem] = []
+    for item in body.items:
+        try:
+            product_id, variant_id = resolve_variant_ids(
+                catalog,
+                product_id=item.printful_product_id,
+                variant_id=item.printful_variant_id,
+                product_type=item.product_type,
+                size=item.size,
+                color=item.color,
+            )
+        except CatalogUnavailable as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        except LookupError as e:
+            raise HTTPException(status_code=422, detail=f"Design {item.design_id}: {e}")
+        items.append(
+            PublishItem(
+                product_id=designs[item.design_id][0],
+                design_asset_id=item.design_id,
+                printful_product_id=product_id,
+                printful_variant_id=variant_id,
+            )
+        )
+
+    batch_id, jobs = await create_publish_jobs(db, items)
+    await db.commit()
+
+    pending = [job.id for job in jobs if job.status != "done"]
+    task_id = publish_designs_task.delay(job_ids=pending).id if pending else None
+    return PublishBatchResponse(
+        batch_id=batch_id, queued=len(pending), already_published=len(jobs) - len(pending), task_id=task_id
+    )
+
+
+@router.get("/catalog/variants", response_model=List[CatalogVariantOut])
+async def list_catalog_variants(
+    product_type: Optional[str] = None,
+    size: Optional[str] = None,
+    color: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """In-stock Printful variants from the local catalog snapshot, cheapest first."""
+    catalog = await get_catalog()
+    if catalog is None:
+        raise HTTPException(status_code=503, detail="Printful catalog not loaded yet")
+    variants = sorted(
+        catalog.find_variants(product_type=product_type, size=size, color=color), key=lambda v: (v.price, v.id)
+    )
+    return [
+        CatalogVariantOut(
+            id=v.id,
+            product_id=v.product_id,
+            product_title=catalog.products[v.product_id].title,
+            name=v.name,
+            size=v.size,
+            color=v.color,
+            price=v.price,
+        )
+        for v in variants[:limit]
+    ]
+
+
+@router.get("/batches/{batch_id}", response_model=PublishBatchProgress)
+async def get_publish_batch(batch_id: str, db: AsyncSession = Depends(get_read_session)):
+    by_status = await batch_progress(db, batch_id)
+    if not by_status:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    return PublishBatchProgress(batch_id=batch_id, total=sum(by_status.values()), by_status=by_status)
@@ -1,49 +1,42 @@
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import Any
 
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, WebSocket
 
-from app.core.config import settings
-import redis.asyncio as redis
+from app.core.realtime import ClientStream, event_hub
 
 router = APIRouter()
 
-CHANNEL = "trend_events"
+
+async def _send_events(websocket: WebSocket, stream: ClientStream) -> None:
+    async for event in stream.events():
+        await websocket.send_text(json.dumps(event, default=str))
+
+
+async def _wait_for_disconnect(websocket: WebSocket) -> None:
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
 
 
 @router.websocket("/ws/trends")
 async def ws_trends(websocket: WebSocket):
+    """Realtime events, throttled per connection (see app.core.realtime)."""
     await websocket.accept()
-    r = redis.from_url(settings.redis_url, decode_responses=True)
-    pubsub = r.pubsub()
-    await pubsub.subscribe(CHANNEL)
+    stream = event_hub.subscribe()
+    sender = asyncio.create_task(_send_events(websocket, stream))
+    receiver = asyncio.create_task(_wait_for_disconnect(websocket))
     try:
-        async for message in pubsub.listen():
-            if message is None:
-                continue
-            if message.get("type") != "message":
-                continue
-            data = message.get("data")
-            # Ensure JSON
-            try:
-                payload: Any = json.loads(data) if isinstance(data, str) else data
-                await websocket.send_text(json.dumps(payload))
-            except Exception:
-                await websocket.send_text(json.dumps({"type": "raw", "data": str(data)}))
-    except WebSocketDisconnect:
-        pass
+        await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
     finally:
-        try:
-            await pubsub.unsubscribe(CHANNEL)
-        except Exception:
-            pass
-        try:
-            await pubsub.close()
-        except Exception:
-            pass
-        try:
-            await r.close()
-        except Exception:
-            pass
+        event_hub.unsubscribe(stream)
+        for task in (sender, receiver):
+            task.cancel()
+        for task in (sender, receiver):
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):  # noqa: BLE001 - client went away
+                pass
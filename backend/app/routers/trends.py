@@ -2,16 +2,20 @@ from __future__ import annotations
 
 from typing import List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.auth import get_current_user
 
+from app.core import fast_json
 from app.core.config import settings
+from app.core.response_cache import response_cache
+from app.crud.trend_item import get_trend_item_row, list_niches, list_trend_item_rows
+from app.crud.trend_item import list_trend_items as crud_list_trend_items
 from app.db.models import TrendItem
-from app.db.session import get_session
-from app.schemas.trend_item import IngestRequest, IngestResponse, TrendItemOut
+from app.db.session import get_read_session, get_session
+from app.schemas.trend_item import IngestRequest, IngestResponse, NicheOut, TrendItemOut
 from app.tasks.ingest import ingest_rss_task
 
 router = APIRouter(dependencies=[Depends(get_current_user)])
@@ -19,27 +23,60 @@ router = APIRouter(dependencies=[Depends(get_current_user)])
 
 @router.get("/items", response_model=List[TrendItemOut])
 async def list_trend_items(
+    request: Request,
     limit: int = 50,
     min_score: Optional[int] = None,
     source: Optional[str] = None,
-    db: AsyncSession = Depends(get_session),
+    niche_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_session),
 ):
-    stmt = select(TrendItem).order_by(TrendItem.ai_score_0_100.desc().nullslast(), TrendItem.published_at.desc().nullslast()).limit(limit)
-    if min_score is not None:
-        stmt = stmt.where(TrendItem.ai_score_0_100 >= min_score)
-    if source:
-        stmt = stmt.where(TrendItem.source.ilike(f"%{source}%"))
-    res = await db.execute(stmt)
-    return res.scalars().all()
+    filters = dict(limit=limit, min_score=min_score, source=source, niche_id=niche_id)
+    if settings.api_fast_json:
+
+        async def build() -> bytes:
+            return fast_json.dumps(await list_trend_item_rows(db, **filters))
+
+        return await response_cache.respond_json(request, build)
+
+    async def load():
+        return await crud_list_trend_items(db, **filters)
+
+    return await response_cache.respond(request, List[TrendItemOut], load)
+
+
+@router.get("/niches", response_model=List[NicheOut])
+async def list_trend_niches(
+    request: Request,
+    limit: int = Query(default=100, ge=1, le=1000),
+    min_items: int = Query(default=1, ge=1),
+    db: AsyncSession = Depends(get_read_session),
+):
+    async def load():
+        return await list_niches(db, limit=limit, min_items=min_items)
+
+    return await response_cache.respond(request, List[NicheOut], load)
 
 
 @router.get("/items/{item_id}", response_model=TrendItemOut)
-async def get_trend_item(item_id: int, db: AsyncSession = Depends(get_session)):
-    res = await db.execute(select(TrendItem).where(TrendItem.id == item_id))
-    item = res.scalar_one_or_none()
-    if not item:
-        raise HTTPException(status_code=404, detail="Trend item not found")
-    return item
+async def get_trend_item(request: Request, item_id: int, db: AsyncSession = Depends(get_session)):
+    if settings.api_fast_json:
+
+        async def build() -> bytes:
+            row = await get_trend_item_row(db, item_id)
+            if row is None:
+                raise HTTPException(status_code=404, detail="Trend item not found")
+            return fast_json.dumps(row)
+
+        return await response_cache.respond_json(request, build)
+
+    async def load():
+        res = await db.execute(select(TrendItem).where(TrendItem.id == item_id))
+        item = res.scalar_one_or_none()
+        if not item:
+            raise HTTPException(status_code=404, detail="Trend item not found")
+        return item
+
+    return await response_cache.respond(request, TrendItemOut, load)
 
 
 @router.post("/ingest", response_model=IngestResponse)
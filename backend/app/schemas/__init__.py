@@ -1,10 +1,16 @@
+from .analytics import AnalyticsSummaryOut, DailyCountOut, NicheStatOut, ScoreHistogramOut  # noqa
 from .trend import TrendCreate, TrendRead  # noqa
-from .trend_item import IngestRequest, IngestResponse, TrendItemOut  # noqa
+from .trend_item import IngestRequest, IngestResponse, NicheOut, TrendItemOut  # noqa
 
 __all__ = [
+    "AnalyticsSummaryOut",
+    "DailyCountOut",
+    "NicheStatOut",
+    "ScoreHistogramOut",
     "TrendCreate",
     "TrendRead",
     "TrendItemOut",
     "IngestRequest",
     "IngestResponse",
+    "NicheOut",
 ]
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from datetime import date
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class NicheStatOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    niche: str
+    items: int
+    scored: int
+    avg_score: Optional[float] = None
+    max_score: Optional[int] = None
+
+
+class DailyCountOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    day: date
+    source: str
+    items: int
+    scored: int
+    avg_score: Optional[float] = None
+
+
+class ScoreHistogramOut(BaseModel):
+    bucket_width: int = 10
+    counts: List[int]
+
+
+class AnalyticsSummaryOut(BaseModel):
+    since: date
+    until: Optional[date] = None
+    items: int
+    scored: int
+    avg_score: Optional[float] = None
+    top_niches: List[NicheStatOut]
+    daily: List[DailyCountOut]
+    histogram: ScoreHistogramOut
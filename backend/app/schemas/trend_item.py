@@ -19,10 +19,21 @@ class TrendItemOut(BaseModel):
 
     ai_score_0_100: Optional[int] = Field(default=None, ge=0, le=100)
     ai_niche: Optional[str] = None
+    niche_id: Optional[int] = None
     ai_status: Optional[str] = None
     ai_error: Optional[str] = None
 
 
+class NicheOut(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    slug: str
+    name: str
+    items: int
+    aliases: int
+
+
 class IngestRequest(BaseModel):
     urls: Optional[list[str]] = None
     max_items_per_feed: int = Field(default=25, ge=1, le=200)
@@ -1,3 +1,7 @@
 from .base import RawListing, BaseScraper  # noqa
 from .amazon import AmazonScraper  # noqa
 from .etsy import EtsyScraper  # noqa
+from .orchestrator import MarketplaceLimits, ScrapeOrchestrator  # noqa
+from .browser import BrowserPool  # noqa
+from .fixtures import HTMLFixtureServer, directory_source, mapping_source  # noqa
+from .http_cache import CacheMiss, CachedResponse, ResponseCache  # noqa
@@ -11,7 +11,8 @@ class AmazonScraper(BaseScraper):
     async def search_trending(self, query: str, *, limit: int = 50) -> AsyncIterator[RawListing]:
         """Stub implementation returning demo listings.
 
-        Replace this with real Playwright logic to scrape Amazon.
+        Replace this with real Playwright logic to scrape Amazon, rendering pages
+        via `self.render_html(...)` (pooled pages from `BrowserPool`).
         """
         items = [
             RawListing(
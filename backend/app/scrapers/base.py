@@ -2,7 +2,14 @@ from __future__ import annotations
 
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import AsyncIterator, Dict, Optional
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional
+
+import httpx
+
+from .http_cache import CachedResponse, ResponseCache
+
+if TYPE_CHECKING:
+    from .browser import BrowserPool
 
 
 @dataclass
@@ -18,7 +25,53 @@ class RawListing:
 
 
 class BaseScraper(ABC):
+    """Marketplace scraper.
+
+    Browser-based implementations render pages through a shared `BrowserPool`
+    (see app.scrapers.browser) instead of launching a browser per search; plain
+    HTTP fetches go through `fetch()`, which consults the on-disk `ResponseCache`
+    (see app.scrapers.http_cache). `base_url` lets tests point a scraper at an
+    `HTMLFixtureServer`. Without an explicit `http_cache` the cache is built from
+    the `SCRAPER_CACHE_*` settings; pass one instance to several scrapers to share
+    its size accounting. Call `aclose()` when done to release the HTTP client.
+    """
+
     marketplace: str
+    base_url: str = ""
+
+    def __init__(
+        self,
+        *,
+        browser_pool: Optional["BrowserPool"] = None,
+        base_url: Optional[str] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
+        http_cache: Optional[ResponseCache] = None,
+    ):
+        self.browser_pool = browser_pool
+        if base_url is not None:
+            self.base_url = base_url.rstrip("/")
+        self.http_client = http_client
+        self._owns_client = http_client is None
+        self.http_cache = http_cache if http_cache is not None else ResponseCache()
+
+    async def fetch(self, url: str, *, params: Optional[Dict[str, str]] = None) -> CachedResponse:
+        """GET `url`, served from / stored in `http_cache` according to its mode."""
+        if self.http_client is None:
+            self.http_client = httpx.AsyncClient(
+                timeout=30, follow_redirects=True, headers={"User-Agent": "pod-trend-bot/1.0"}
+            )
+        return await self.http_cache.fetch(self.http_client, url, params=params)
+
+    async def aclose(self) -> None:
+        """Close the HTTP client if this scraper created it (injected clients are left open)."""
+        if self._owns_client and self.http_client is not None:
+            await self.http_client.aclose()
+            self.http_client = None
+
+    async def render_html(self, url: str) -> str:
+        if self.browser_pool is None:
+            raise RuntimeError(f"{type(self).__name__} needs a BrowserPool to render pages")
+        return await self.browser_pool.fetch_html(url)
 
     @abstractmethod
     async def search_trending(self, query: str, *, limit: int = 50) -> AsyncIterator[RawListing]:
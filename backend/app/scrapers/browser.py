@@ -0,0 +1,194 @@
+"""Pooled headless-browser runtime for scrapers.
+
+Launching Chromium costs on the order of a second, and a fresh context/page adds
+more, so a `BrowserPool` starts one browser per process with a fixed set of
+long-lived contexts and hands out reusable pages. Every context intercepts
+requests and aborts images, fonts, media and known analytics/ad hosts, which
+scrapers never need and which dominate page-load time.
+
+Playwright is optional (see requirements.txt); `start()` raises a clear error when
+it is not installed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Optional, Sequence
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+
+try:
+    from playwright.async_api import async_playwright
+except ImportError:  # pragma: no cover - optional dependency
+    async_playwright = None
+
+BLOCKED_RESOURCE_TYPES = frozenset({"image", "font", "media"})
+
+BLOCKED_HOST_SUFFIXES = (
+    "google-analytics.com",
+    "googletagmanager.com",
+    "doubleclick.net",
+    "googlesyndication.com",
+    "amazon-adsystem.com",
+    "facebook.net",
+    "hotjar.com",
+    "segment.io",
+    "scorecardresearch.com",
+    "bat.bing.com",
+)
+
+
+def should_block(resource_type: str, url: str, *, blocked_hosts: Sequence[str] = BLOCKED_HOST_SUFFIXES) -> bool:
+    if resource_type in BLOCKED_RESOURCE_TYPES:
+        return True
+    host = urlsplit(url).hostname or ""
+    return any(host == h or host.endswith("." + h) for h in blocked_hosts)
+
+
+@dataclass
+class _PooledPage:
+    page: Any
+    uses: int = 0
+
+
+class BrowserPool:
+    """A fixed pool of browser contexts with recycled pages.
+
+    Usage::
+
+        pool = BrowserPool()
+        await pool.start()
+        async with pool.page() as page:
+            await page.goto(url)
+            html = await page.content()
+        await pool.close()
+
+    At most `contexts * pages_per_context` pages are open at once; callers beyond
+    that wait. A page is closed and replaced after `max_page_uses` uses, or as soon
+    as a caller's block raises, so leaked state (cookies aside, which are per
+    context) cannot accumulate.
+    """
+
+    def __init__(
+        self,
+        *,
+        contexts: Optional[int] = None,
+        pages_per_context: Optional[int] = None,
+        max_page_uses: Optional[int] = None,
+        headless: Optional[bool] = None,
+        block_resources: bool = True,
+        user_agent: Optional[str] = None,
+        navigation_timeout_ms: int = 30_000,
+    ):
+        self.num_contexts = contexts or settings.scraper_browser_contexts
+        self.pages_per_context = pages_per_context or settings.scraper_pages_per_context
+        self.max_page_uses = max_page_uses or settings.scraper_page_max_uses
+        self.headless = settings.scraper_headless if headless is None else headless
+        self.block_resources = block_resources
+        self.user_agent = user_agent
+        self.navigation_timeout_ms = navigation_timeout_ms
+
+        self._playwright: Any = None
+        self._browser: Any = None
+        self._contexts: List[Any] = []
+        self._idle: List[asyncio.Queue] = []
+        self._open_pages: List[int] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._next_context = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.num_contexts * self.pages_per_context
+
+    async def start(self) -> None:
+        if self._browser is not None:
+            return
+        if async_playwright is None:
+            raise RuntimeError("playwright is not installed; `pip install playwright && playwright install chromium`")
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        for _ in range(self.num_contexts):
+            ctx = await self._browser.new_context(user_agent=self.user_agent, java_script_enabled=True)
+            ctx.set_default_navigation_timeout(self.navigation_timeout_ms)
+            if self.block_resources:
+                await ctx.route("**/*", self._route)
+            self._contexts.append(ctx)
+            self._idle.append(asyncio.Queue())
+            self._open_pages.append(0)
+        self._slots = asyncio.Semaphore(self.capacity)
+
+    async def close(self) -> None:
+        for ctx in self._contexts:
+            try:
+                await ctx.close()
+            except Exception:
+                pass
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+        self._contexts, self._idle, self._open_pages = [], [], []
+        self._browser = self._playwright = self._slots = None
+
+    async def __aenter__(self) -> "BrowserPool":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    @staticmethod
+    async def _route(route: Any) -> None:
+        request = route.request
+        if should_block(request.resource_type, request.url):
+            await route.abort()
+        else:
+            await route.continue_()
+
+    async def _checkout(self) -> tuple[int, _PooledPage]:
+        # Prefer an idle page anywhere; otherwise open one on the least-loaded context.
+        for i, idle in enumerate(self._idle):
+            if not idle.empty():
+                return i, idle.get_nowait()
+        i = min(range(len(self._contexts)), key=lambda j: self._open_pages[j])
+        page = await self._contexts[i].new_page()
+        self._open_pages[i] += 1
+        return i, _PooledPage(page=page)
+
+    async def _discard(self, ctx_index: int, pooled: _PooledPage) -> None:
+        self._open_pages[ctx_index] -= 1
+        try:
+            await pooled.page.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def page(self) -> AsyncIterator[Any]:
+        if self._slots is None:
+            await self.start()
+        assert self._slots is not None
+        async with self._slots:
+            ctx_index, pooled = await self._checkout()
+            try:
+                yield pooled.page
+            except BaseException:
+                await self._discard(ctx_index, pooled)
+                raise
+            pooled.uses += 1
+            if pooled.uses >= self.max_page_uses or pooled.page.is_closed():
+                await self._discard(ctx_index, pooled)
+                return
+            try:
+                await pooled.page.goto("about:blank")
+            except Exception:
+                await self._discard(ctx_index, pooled)
+                return
+            self._idle[ctx_index].put_nowait(pooled)
+
+    async def fetch_html(self, url: str, *, wait_until: str = "domcontentloaded") -> str:
+        async with self.page() as page:
+            await page.goto(url, wait_until=wait_until)
+            return await page.content()
@@ -0,0 +1,138 @@
+"""Local HTML fixture server for scraper tests and benchmarks.
+
+Serves canned pages over real HTTP on 127.0.0.1 so the same `search_trending`
+code path (browser pool or plain HTTP) can run offline against recorded
+marketplace pages. Fixtures come from a pluggable `FixtureSource`: an in-memory
+mapping, a directory on disk, or any callable.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import mimetypes
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple, Union
+from urllib.parse import unquote, urlsplit
+
+Fixture = Tuple[int, str, bytes]  # (status, content type, body)
+FixtureSource = Callable[[str], Optional[Fixture]]
+
+
+def mapping_source(pages: Dict[str, Union[str, bytes]]) -> FixtureSource:
+    """Serve `pages` keyed by path, or by path + query string for exact matches."""
+
+    def source(target: str) -> Optional[Fixture]:
+        body = pages.get(target)
+        if body is None:
+            body = pages.get(urlsplit(target).path)
+        if body is None:
+            return None
+        data = body.encode("utf-8") if isinstance(body, str) else body
+        return 200, "text/html; charset=utf-8", data
+
+    return source
+
+
+def directory_source(root: Union[str, Path]) -> FixtureSource:
+    """Serve files under `root`; `/s` maps to `root/s.html` or `root/s/index.html`."""
+    base = Path(root).resolve()
+
+    def source(target: str) -> Optional[Fixture]:
+        rel = unquote(urlsplit(target).path).lstrip("/")
+        for candidate in (base / rel, base / f"{rel}.html", base / rel / "index.html"):
+            path = candidate.resolve()
+            if base not in path.parents and path != base:
+                return None
+            if path.is_file():
+                ctype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                return 200, ctype, path.read_bytes()
+        return None
+
+    return source
+
+
+class HTMLFixtureServer:
+    """Minimal async HTTP/1.1 server over a `FixtureSource`.
+
+    Usage::
+
+        async with HTMLFixtureServer(mapping_source({"/s": "<html>..</html>"})) as srv:
+            html = await pool.fetch_html(srv.url("/s?k=cat"))
+
+    `request_log` records every request target, which lets tests assert on what a
+    scraper actually fetched.
+    """
+
+    def __init__(self, source: FixtureSource, *, host: str = "127.0.0.1", port: int = 0, latency_s: float = 0.0):
+        self.source = source
+        self.host = host
+        self.port = port
+        self.latency_s = latency_s
+        self.request_log: list[str] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._writers: set[asyncio.StreamWriter] = set()
+
+    def url(self, path: str = "/") -> str:
+        return f"http://{self.host}:{self.port}{path if path.startswith('/') else '/' + path}"
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Drop idle keep-alive connections so their handlers exit cleanly.
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "HTMLFixtureServer":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.close()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                parts = request_line.decode("latin-1").split()
+                if len(parts) < 2:
+                    break
+                method, target = parts[0], parts[1]
+                keep_alive = True
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "connection" and value.strip().lower() == "close":
+                        keep_alive = False
+
+                self.request_log.append(target)
+                if self.latency_s:
+                    await asyncio.sleep(self.latency_s)
+                fixture = self.source(target)
+                status, ctype, body = fixture or (404, "text/plain", b"fixture not found")
+                reason = "OK" if status == 200 else "Not Found"
+                head = (
+                    f"HTTP/1.1 {status} {reason}\r\n"
+                    f"Content-Type: {ctype}\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+                )
+                writer.write(head.encode("latin-1") + (b"" if method == "HEAD" else body))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
@@ -0,0 +1,242 @@
+"""Content-addressed on-disk cache for scraper HTTP responses.
+
+Each response is stored once under `sha256(method, url, body)` as a single
+gzip-compressed file (metadata header + body), written atomically. Hits refresh
+the file's mtime, so size-based eviction drops the least recently used entries.
+
+Modes:
+- ``off``: no caching.
+- ``cache``: serve entries younger than the TTL, otherwise fetch and store.
+- ``record``: always fetch and overwrite (refreshes recordings).
+- ``replay``: serve stored entries regardless of age and never touch the network;
+  a miss raises `CacheMiss`. Used to benchmark and regression-test parsers offline.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import struct
+import time
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Union
+from urllib.parse import urlencode, urlsplit, urlunsplit, parse_qsl
+
+import httpx
+
+from app.core.config import settings
+
+MODES = ("off", "cache", "record", "replay")
+
+
+class CacheMiss(LookupError):
+    """Raised in replay mode when no recording exists for a request."""
+
+
+@dataclass
+class CachedResponse:
+    url: str
+    status_code: int
+    headers: Dict[str, str]
+    content: bytes
+    stored_at: float = 0.0
+    from_cache: bool = False
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise httpx.HTTPStatusError(
+                f"HTTP {self.status_code} for {self.url}",
+                request=httpx.Request("GET", self.url),
+                response=httpx.Response(self.status_code, content=self.content),
+            )
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+    bytes_stored: int = 0
+
+
+def _canonical_url(url: str, params: Optional[Mapping[str, str]] = None) -> str:
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params:
+        query.extend((k, str(v)) for k, v in params.items())
+    return urlunsplit((parts.scheme, parts.netloc.lower(), parts.path or "/", urlencode(sorted(query)), ""))
+
+
+def cache_key(method: str, url: str, body: Optional[bytes] = None) -> str:
+    h = hashlib.sha256()
+    h.update(method.upper().encode())
+    h.update(b"\0")
+    h.update(url.encode())
+    h.update(b"\0")
+    h.update(body or b"")
+    return h.hexdigest()
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        root: Union[str, Path, None] = None,
+        *,
+        mode: Optional[str] = None,
+        ttl_s: Optional[int] = None,
+        max_bytes: Optional[int] = None,
+        compresslevel: int = 6,
+    ):
+        self.root = Path(root or settings.scraper_cache_dir)
+        self.mode = mode or settings.scraper_cache_mode
+        if self.mode not in MODES:
+            raise ValueError(f"unknown cache mode {self.mode!r}; expected one of {MODES}")
+        self.ttl_s = settings.scraper_cache_ttl_s if ttl_s is None else ttl_s
+        self.max_bytes = settings.scraper_cache_max_mb * 1024 * 1024 if max_bytes is None else max_bytes
+        self.compresslevel = compresslevel
+        self.stats = CacheStats()
+        self._size: Optional[int] = None
+        self._evict_lock = asyncio.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.gz"
+
+    # -- serialization -----------------------------------------------------
+
+    def _encode(self, resp: CachedResponse) -> bytes:
+        meta = json.dumps(
+            {"url": resp.url, "status": resp.status_code, "headers": resp.headers, "stored_at": resp.stored_at}
+        ).encode()
+        return gzip.compress(struct.pack(">I", len(meta)) + meta + resp.content, compresslevel=self.compresslevel)
+
+    @staticmethod
+    def _decode(blob: bytes) -> CachedResponse:
+        raw = gzip.decompress(blob)
+        (n,) = struct.unpack(">I", raw[:4])
+        meta = json.loads(raw[4 : 4 + n])
+        return CachedResponse(
+            url=meta["url"],
+            status_code=meta["status"],
+            headers=meta["headers"],
+            content=raw[4 + n :],
+            stored_at=meta["stored_at"],
+            from_cache=True,
+        )
+
+    # -- sync file ops (run in a thread) -------------------------------------
+
+    def _read(self, key: str) -> Optional[CachedResponse]:
+        path = self._path(key)
+        try:
+            blob = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)  # LRU touch
+        except OSError:
+            pass
+        return self._decode(blob)
+
+    def _write(self, key: str, resp: CachedResponse) -> int:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        blob = self._encode(resp)
+        old = path.stat().st_size if path.exists() else 0
+        # Unique per write: two tasks in one process may store the same key at once.
+        tmp = path.with_suffix(f".tmp{os.getpid()}-{uuid.uuid4().hex}")
+        tmp.write_bytes(blob)
+        os.replace(tmp, path)
+        return len(blob) - old
+
+    def _scan_size(self) -> int:
+        return sum(p.stat().st_size for p in self.root.glob("*/*.gz")) if self.root.exists() else 0
+
+    def _evict_to(self, target: int) -> tuple[int, int]:
+        entries = sorted(
+            ((p.stat().st_mtime, p.stat().st_size, p) for p in self.root.glob("*/*.gz")),
+            key=lambda e: e[0],
+        )
+        size = sum(e[1] for e in entries)
+        evicted = 0
+        for _, n, path in entries:
+            if size <= target:
+                break
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                continue
+            size -= n
+            evicted += 1
+        return size, evicted
+
+    # -- public API ---------------------------------------------------------
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        if self.mode in ("off", "record"):
+            return None
+        resp = await asyncio.to_thread(self._read, key)
+        if resp is None:
+            return None
+        if self.mode == "cache" and time.time() - resp.stored_at > self.ttl_s:
+            return None
+        return resp
+
+    async def put(self, key: str, resp: CachedResponse) -> None:
+        if self.mode in ("off", "replay"):
+            return
+        resp.stored_at = time.time()
+        delta = await asyncio.to_thread(self._write, key, resp)
+        self.stats.stores += 1
+        async with self._evict_lock:
+            if self._size is None:
+                self._size = await asyncio.to_thread(self._scan_size)
+            else:
+                self._size += delta
+            if self._size > self.max_bytes:
+                # Evict down to 90% so we don't rescan on every subsequent write.
+                self._size, evicted = await asyncio.to_thread(self._evict_to, int(self.max_bytes * 0.9))
+                self.stats.evictions += evicted
+        self.stats.bytes_stored = self._size or 0
+
+    async def fetch(
+        self,
+        client: httpx.AsyncClient,
+        url: str,
+        *,
+        method: str = "GET",
+        params: Optional[Mapping[str, str]] = None,
+        headers: Optional[Mapping[str, str]] = None,
+        content: Optional[bytes] = None,
+    ) -> CachedResponse:
+        canonical = _canonical_url(url, params)
+        key = cache_key(method, canonical, content)
+
+        cached = await self.get(key)
+        if cached is not None:
+            self.stats.hits += 1
+            return cached
+        self.stats.misses += 1
+        if self.mode == "replay":
+            raise CacheMiss(f"no recording for {method} {canonical}")
+
+        r = await client.request(method, canonical, headers=headers, content=content)
+        resp = CachedResponse(
+            url=str(r.url),
+            status_code=r.status_code,
+            headers={k: v for k, v in r.headers.items() if k.lower() not in ("content-encoding", "content-length")},
+            content=r.content,
+        )
+        # Only successful responses are worth replaying.
+        if r.status_code < 400:
+            await self.put(key, resp)
+        return resp
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from app.core.config import settings
+
+from .base import BaseScraper, RawListing
+
+ListingSink = Callable[[List[RawListing]], Awaitable[None]]
+
+_DONE = object()
+
+
+@dataclass
+class MarketplaceLimits:
+    """Per-marketplace politeness.
+
+    `concurrency` caps simultaneous searches on one marketplace; `min_interval_s`
+    spaces out the start of consecutive searches on it.
+    """
+
+    concurrency: int = 2
+    min_interval_s: float = 1.0
+
+
+@dataclass
+class OrchestratorStats:
+    listings: int = 0
+    duplicates: int = 0
+    batches: int = 0
+    per_marketplace: Dict[str, int] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+
+
+class _Gate:
+    def __init__(self, limits: MarketplaceLimits):
+        self.limits = limits
+        self.semaphore = asyncio.Semaphore(max(1, limits.concurrency))
+        self._lock = asyncio.Lock()
+        self._next_start = 0.0
+
+    async def wait_turn(self) -> None:
+        async with self._lock:
+            delay = self._next_start - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_start = time.monotonic() + self.limits.min_interval_s
+
+
+class ScrapeOrchestrator:
+    """Run every scraper over every keyword concurrently and feed a batched sink.
+
+    Searches on different marketplaces never wait on each other; searches on the
+    same marketplace are bounded by its `MarketplaceLimits`. Listings from all
+    searches are merged through a bounded queue (backpressure on scrapers when the
+    writer falls behind) and handed to `sink` in batches of up to `batch_size`, or
+    whatever has arrived after `flush_interval_s`. The sink is called from a single
+    task, so it can safely own one DB session. `aclose()` releases the scrapers'
+    HTTP clients once the orchestrator is no longer needed.
+    """
+
+    def __init__(
+        self,
+        scrapers: Sequence[BaseScraper],
+        *,
+        limits: Optional[Dict[str, MarketplaceLimits]] = None,
+        default_limits: Optional[MarketplaceLimits] = None,
+        batch_size: int = 200,
+        flush_interval_s: float = 1.0,
+        queue_size: int = 1000,
+        dedupe: bool = True,
+    ):
+        self.scrapers = list(scrapers)
+        self.limits = limits or {}
+        self.default_limits = default_limits or MarketplaceLimits(
+            concurrency=settings.scraper_concurrency_per_marketplace,
+            min_interval_s=settings.scraper_min_interval_s,
+        )
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.queue_size = queue_size
+        self.dedupe = dedupe
+
+    async def run(self, keywords: Iterable[str], *, limit: int, sink: ListingSink) -> OrchestratorStats:
+        stats = OrchestratorStats()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        gates = {
+            s.marketplace: _Gate(self.limits.get(s.marketplace, self.default_limits)) for s in self.scrapers
+        }
+        jobs = [(scraper, kw) for kw in dict.fromkeys(keywords) for scraper in self.scrapers]
+
+        async def produce(scraper: BaseScraper, keyword: str) -> None:
+            gate = gates[scraper.marketplace]
+            async with gate.semaphore:
+                await gate.wait_turn()
+                try:
+                    async for listing in scraper.search_trending(keyword, limit=limit):
+                        await queue.put(listing)
+                except Exception as e:  # noqa: BLE001
+                    stats.errors.append(f"{scraper.marketplace} search failed for {keyword!r}: {e}")
+
+        async def produce_all() -> None:
+            try:
+                await asyncio.gather(*(produce(s, kw) for s, kw in jobs))
+            finally:
+                await queue.put(_DONE)
+
+        producer = asyncio.create_task(produce_all())
+        try:
+            await self._consume(queue, sink, stats)
+        finally:
+            if not producer.done():
+                producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+        return stats
+
+    async def aclose(self) -> None:
+        await asyncio.gather(*(s.aclose() for s in self.scrapers), return_exceptions=True)
+
+    async def _consume(self, queue: asyncio.Queue, sink: ListingSink, stats: OrchestratorStats) -> None:
+        seen: Set[Tuple[str, str]] = set()
+        batch: List[RawListing] = []
+        done = False
+        while not done:
+            deadline = time.monotonic() + self.flush_interval_s
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _DONE:
+                    done = True
+                    break
+                key = (item.marketplace, item.product_id)
+                if self.dedupe and key in seen:
+                    stats.duplicates += 1
+                    continue
+                seen.add(key)
+                batch.append(item)
+
+            if batch:
+                await sink(batch)
+                stats.batches += 1
+                stats.listings += len(batch)
+                for listing in batch:
+                    stats.per_marketplace[listing.marketplace] = stats.per_marketplace.get(listing.marketplace, 0) + 1
+                batch = []
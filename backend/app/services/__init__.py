@@ -1,5 +1,8 @@
-from .scoring import score_listing  # noqa
+from .scoring import score_listing, score_listings  # noqa
 from .embeddings import OpenAIEmbeddingClient, simple_cluster  # noqa
 from .trend_scoring import compute_trend_metrics  # noqa
-from .audience import infer_audience_from_text  # noqa
+from .batch_trend_scoring import compute_trend_metrics_batch, score_all_products  # noqa
+from .trend_state import score_new_snapshots, state_to_metrics, update_state  # noqa
+from .audience import infer_audience_from_text, infer_audiences_from_texts  # noqa
 from .pricing import recommend_price  # noqa
+from .batch_pricing import compute_price_bands, reprice_catalog  # noqa
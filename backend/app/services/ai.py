@@ -34,11 +34,14 @@ class OpenAIResponsesClient:
         base_url: Optional[str] = None,
         model: Optional[str] = None,
         timeout_s: Optional[int] = None,
+        http_client: Optional[httpx.AsyncClient] = None,
     ):
         self.api_key = api_key or settings.openai_api_key
         self.base_url = (base_url or settings.openai_base_url).rstrip("/")
         self.model = model or settings.openai_model
         self.timeout_s = timeout_s or settings.openai_timeout_s
+        # Optional shared client (keeps connections alive across calls).
+        self.http_client = http_client
 
     def _headers(self) -> Dict[str, str]:
         if not self.api_key:
@@ -66,11 +69,16 @@ class OpenAIResponsesClient:
         if settings.openai_reasoning:
             payload["reasoning"] = {"effort": settings.openai_reasoning}
 
-        async with httpx.AsyncClient(timeout=self.timeout_s) as client:
-            r = await client.post(f"{self.base_url}/responses", headers=self._headers(), json=payload)
-            if r.status_code >= 400:
-                raise AIError(f"OpenAI error {r.status_code}: {r.text}")
-            data = r.json()
+        if self.http_client is not None:
+            r = await self.http_client.post(
+                f"{self.base_url}/responses", headers=self._headers(), json=payload, timeout=self.timeout_s
+            )
+        else:
+            async with httpx.AsyncClient(timeout=self.timeout_s) as client:
+                r = await client.post(f"{self.base_url}/responses", headers=self._headers(), json=payload)
+        if r.status_code >= 400:
+            raise AIError(f"OpenAI error {r.status_code}: {r.text}")
+        data = r.json()
 
         # The Responses API returns content items; `output_text` is easiest when present.
         # Fall back to scanning output.
@@ -0,0 +1,376 @@
+"""Incremental Parquet export of trend history for offline analysis.
+
+`export_analytics` appends rows that are new since the last run to hive-partitioned
+Parquet files under `ANALYTICS_EXPORT_DIR` (a local path or any URI pyarrow
+understands, e.g. ``s3://bucket/analytics``)::
+
+    snapshots/date=2024-05-01/marketplace=etsy/part-<run>.parquet
+    trend_scores/date=2024-05-01/marketplace=etsy/part-<run>.parquet
+    trend_items/date=2024-05-01/part-<run>.parquet
+    manifest.json
+
+Files are never rewritten. `manifest.json` records every committed file and the
+per-dataset watermark. It is replaced atomically after each dataset, so a crashed
+run leaves only orphan files that readers never see, and the next run retries
+from the old watermark.
+
+Each dataset is exported in (timestamp, id) keyset order: `captured_at` for
+snapshots and `created_at` for scores, which are append-only, and `updated_at`
+for trend items, which are updated in place (AI scoring runs after ingest), so
+an item may appear more than once; `AnalyticsStore.scan(..., latest=True)`
+keeps each item's newest version. A row is only exported once its timestamp is
+older than `ANALYTICS_EXPORT_LAG_S`. Ids and timestamps are assigned before
+commit, so a row from a transaction still open (or not yet replicated) at
+export time would otherwise land behind the watermark and never be exported.
+The scans use `ix_trend_scores_created_id`, `ix_trend_items_updated_id` and
+partition pruning on `product_snapshots`, so a run reads only the new rows.
+
+`AnalyticsStore` is the query helper: partition-pruned scans into Arrow tables
+(`.to_pandas()` for dataframes) without touching Postgres. Requires pyarrow.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import Select, and_, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import MarketplaceProduct, ProductSnapshot, TrendItem, TrendScore
+from app.services.exports import arrow_type
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pads
+    import pyarrow.fs as pafs
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+MANIFEST = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+@dataclass(frozen=True)
+class AnalyticsDataset:
+    name: str
+    build: Callable[[], Select]
+    watermark: str  # timestamp column of the (timestamp, id) keyset
+    date_column: str
+    by_marketplace: bool
+
+
+def _snapshots() -> Select:
+    return select(
+        ProductSnapshot.id,
+        ProductSnapshot.product_id,
+        ProductSnapshot.captured_at,
+        ProductSnapshot.price,
+        ProductSnapshot.currency,
+        ProductSnapshot.rank,
+        ProductSnapshot.review_count,
+        ProductSnapshot.rating,
+        ProductSnapshot.estimated_sales,
+        MarketplaceProduct.marketplace,
+    ).join(MarketplaceProduct, MarketplaceProduct.id == ProductSnapshot.product_id)
+
+
+def _trend_scores() -> Select:
+    return select(
+        TrendScore.id,
+        TrendScore.product_id,
+        TrendScore.snapshot_id,
+        TrendScore.overall_score,
+        TrendScore.demand_score,
+        TrendScore.competition_score,
+        TrendScore.momentum_score,
+        TrendScore.cluster_label,
+        TrendScore.niche,
+        TrendScore.created_at,
+        MarketplaceProduct.marketplace,
+    ).join(MarketplaceProduct, MarketplaceProduct.id == TrendScore.product_id)
+
+
+def _trend_items() -> Select:
+    return select(
+        TrendItem.id,
+        TrendItem.source,
+        TrendItem.title,
+        TrendItem.url,
+        TrendItem.published_at,
+        TrendItem.ai_score_0_100,
+        TrendItem.ai_niche,
+        TrendItem.ai_status,
+        TrendItem.created_at,
+        TrendItem.updated_at,
+    )
+
+
+DATASETS: Dict[str, AnalyticsDataset] = {
+    d.name: d
+    for d in (
+        AnalyticsDataset("snapshots", _snapshots, "captured_at", "captured_at", True),
+        AnalyticsDataset("trend_scores", _trend_scores, "created_at", "created_at", True),
+        AnalyticsDataset("trend_items", _trend_items, "updated_at", "created_at", False),
+    )
+}
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise RuntimeError("Analytics export requires pyarrow (pip install pyarrow)")
+
+
+def _encode_watermark(at: datetime, row_id: int) -> Dict[str, Any]:
+    return {"at": at.isoformat(), "id": int(row_id)}
+
+
+def _watermark_condition(stmt: Select, dataset: AnalyticsDataset, watermark: Dict[str, Any]):
+    """Rows past the stored (timestamp, id) watermark.
+
+    The plain `ts >= at` lets Postgres prune `product_snapshots` partitions and use the
+    timestamp indexes; the row comparison alone would do neither.
+    """
+    ts_col, id_col = stmt.selected_columns[dataset.watermark], stmt.selected_columns["id"]
+    at = datetime.fromisoformat(watermark["at"])
+    return and_(ts_col >= at, tuple_(ts_col, id_col) > tuple_(at, int(watermark["id"])))
+
+
+class AnalyticsStore:
+    """Parquet files + manifest under `root`; also the read-side query helper."""
+
+    def __init__(self, root: Optional[str] = None):
+        _require_pyarrow()
+        root = root or settings.analytics_export_dir
+        if "://" in root:
+            self.fs, self.base = pafs.FileSystem.from_uri(root)
+        else:
+            self.fs, self.base = pafs.LocalFileSystem(), os.path.abspath(root)
+        self.base = self.base.rstrip("/")
+
+    def path(self, *parts: str) -> str:
+        return "/".join([self.base, *parts])
+
+    # -- manifest -------------------------------------------------------------
+
+    def load_manifest(self) -> Dict[str, Any]:
+        try:
+            with self.fs.open_input_stream(self.path(MANIFEST)) as f:
+                manifest = json.loads(f.read())
+        except FileNotFoundError:
+            return {"version": MANIFEST_VERSION, "datasets": {}, "runs": []}
+        if manifest.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"unsupported analytics manifest version {manifest.get('version')!r}")
+        return manifest
+
+    def save_manifest(self, manifest: Dict[str, Any]) -> None:
+        self.fs.create_dir(self.base, recursive=True)
+        tmp = self.path(f"{MANIFEST}.{uuid.uuid4().hex}.tmp")
+        with self.fs.open_output_stream(tmp) as f:
+            f.write(json.dumps(manifest, indent=1, default=str).encode("utf-8"))
+        self.fs.move(tmp, self.path(MANIFEST))
+
+    def files(self, name: str) -> List[str]:
+        entry = self.load_manifest()["datasets"].get(name) or {}
+        return [self.path(f["path"]) for f in entry.get("files", [])]
+
+    # -- query helper ---------------------------------------------------------
+
+    def dataset(self, name: str) -> "pads.Dataset":
+        spec = DATASETS[name]
+        fields = [pa.field("date", pa.date32())]
+        if spec.by_marketplace:
+            fields.append(pa.field("marketplace", pa.string()))
+        return pads.dataset(
+            self.files(name),
+            filesystem=self.fs,
+            format="parquet",
+            partitioning=pads.partitioning(pa.schema(fields), flavor="hive"),
+            partition_base_dir=self.path(name),
+        )
+
+    def scan(
+        self,
+        name: str,
+        *,
+        columns: Optional[Sequence[str]] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None,
+        marketplace: Optional[str] = None,
+        filter: Optional["pc.Expression"] = None,
+        latest: bool = False,
+    ) -> "pa.Table":
+        """Read `name`, pruning partitions by date range [since, until) and marketplace.
+
+        `latest=True` keeps one row per id (the highest `updated_at`), for datasets
+        exported by `updated_at`.
+        """
+        expr = filter
+        for cond in (
+            pads.field("date") >= since if since else None,
+            pads.field("date") < until if until else None,
+            pads.field("marketplace") == marketplace if marketplace else None,
+        ):
+            if cond is not None:
+                expr = cond if expr is None else expr & cond
+        if not self.files(name):
+            return pa.table({c: [] for c in columns or ["id"]})
+        read_columns = None
+        if columns is not None:
+            read_columns = list(dict.fromkeys([*columns, *(("id", "updated_at") if latest else ())]))
+        table = self.dataset(name).to_table(columns=read_columns, filter=expr)
+        if latest and table.num_rows:
+            table = table.sort_by([("id", "ascending"), ("updated_at", "descending")])
+            ids = table["id"].to_numpy()
+            table = table.filter(pa.array(np.r_[True, ids[1:] != ids[:-1]]))
+            if columns is not None:
+                table = table.select(list(columns))
+        return table
+
+
+class _PartitionWriters:
+    """One ParquetWriter per (date, marketplace) partition touched in this run."""
+
+    def __init__(self, store: AnalyticsStore, dataset: AnalyticsDataset, schema: "pa.Schema", run_id: str):
+        self.store, self.dataset, self.schema, self.run_id = store, dataset, schema, run_id
+        self._writers: Dict[Tuple[str, ...], Tuple[str, Any]] = {}
+        self.rows: Dict[Tuple[str, ...], int] = {}
+
+    def _writer(self, key: Tuple[str, ...]) -> Any:
+        if key not in self._writers:
+            parts = [self.dataset.name, f"date={key[0]}"]
+            if self.dataset.by_marketplace:
+                parts.append(f"marketplace={key[1]}")
+            rel = "/".join([*parts, f"part-{self.run_id}.parquet"])
+            self.store.fs.create_dir(self.store.path(*parts), recursive=True)
+            writer = pq.ParquetWriter(self.store.path(rel), self.schema, filesystem=self.store.fs, compression="zstd")
+            self._writers[key] = (rel, writer)
+        return self._writers[key][1]
+
+    def write(self, key: Tuple[str, ...], columns: List[List[Any]]) -> None:
+        arrays = [pa.array(col, type=field.type) for col, field in zip(columns, self.schema)]
+        self._writer(key).write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        self.rows[key] = self.rows.get(key, 0) + len(columns[0])
+
+    def close(self) -> List[Dict[str, Any]]:
+        files = []
+        for key, (rel, writer) in self._writers.items():
+            writer.close()
+            files.append(
+                {
+                    "path": rel,
+                    "rows": self.rows[key],
+                    "date": key[0],
+                    **({"marketplace": key[1]} if self.dataset.by_marketplace else {}),
+                    "bytes": self.store.fs.get_file_info(self.store.path(rel)).size,
+                }
+            )
+        return files
+
+    def abort(self) -> None:
+        for rel, writer in self._writers.values():
+            try:
+                writer.close()
+                self.store.fs.delete_file(self.store.path(rel))
+            except Exception:  # noqa: BLE001 - best-effort cleanup of uncommitted files
+                pass
+
+
+async def export_dataset(
+    db: AsyncSession,
+    store: AnalyticsStore,
+    dataset: AnalyticsDataset,
+    manifest: Dict[str, Any],
+    *,
+    run_id: str,
+    chunk_size: int,
+    lag_s: float,
+    now: Optional[datetime] = None,
+) -> int:
+    """Append rows past the dataset's watermark and older than the safety lag.
+
+    Updates `manifest` in place. Returns rows written.
+    """
+    entry = manifest["datasets"].setdefault(dataset.name, {"watermark": None, "rows": 0, "files": []})
+
+    stmt = dataset.build()
+    wm_col = stmt.selected_columns[dataset.watermark]
+    if entry.get("watermark") is not None:
+        stmt = stmt.where(_watermark_condition(stmt, dataset, entry["watermark"]))
+    stmt = stmt.where(wm_col < (now or datetime.utcnow()) - timedelta(seconds=lag_s))
+    stmt = stmt.order_by(wm_col, stmt.selected_columns["id"])
+
+    selected = list(stmt.selected_columns)
+    names = [c.name for c in selected]
+    date_idx = names.index(dataset.date_column)
+    wm_idx = names.index(dataset.watermark)
+    id_idx = names.index("id")
+    mk_idx = names.index("marketplace") if dataset.by_marketplace else None
+    # The marketplace is a partition (directory) key, not a column in the files.
+    keep = [i for i in range(len(names)) if i != mk_idx]
+    schema = pa.schema([pa.field(names[i], arrow_type(selected[i].type)) for i in keep])
+
+    writers = _PartitionWriters(store, dataset, schema, run_id)
+    written = 0
+    try:
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            groups: Dict[Tuple[str, ...], List[Sequence[Any]]] = {}
+            for row in rows:
+                day = row[date_idx].date().isoformat()
+                key = (day, row[mk_idx] or "unknown") if mk_idx is not None else (day,)
+                groups.setdefault(key, []).append(row)
+            for key, group in groups.items():
+                writers.write(key, [[r[i] for r in group] for i in keep])
+            written += len(rows)
+            last = rows[-1]
+        files = writers.close()
+    except BaseException:
+        writers.abort()
+        raise
+
+    if written:
+        entry["watermark"] = _encode_watermark(last[wm_idx], last[id_idx])
+        entry["rows"] = int(entry.get("rows", 0)) + written
+        entry["files"].extend({**f, "run_id": run_id} for f in files)
+    return written
+
+
+async def export_analytics(
+    db: AsyncSession,
+    *,
+    root: Optional[str] = None,
+    datasets: Optional[Sequence[str]] = None,
+    chunk_size: Optional[int] = None,
+    lag_s: Optional[float] = None,
+) -> Dict[str, int]:
+    """Export new rows of every dataset; the manifest is committed after each one."""
+    store = AnalyticsStore(root)
+    manifest = store.load_manifest()
+    now = datetime.utcnow()
+    run_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+    counts: Dict[str, int] = {}
+    for name in datasets or list(DATASETS):
+        counts[name] = await export_dataset(
+            db,
+            store,
+            DATASETS[name],
+            manifest,
+            run_id=run_id,
+            chunk_size=chunk_size or settings.analytics_export_chunk_size,
+            lag_s=settings.analytics_export_lag_s if lag_s is None else lag_s,
+            now=now,
+        )
+        if counts[name]:
+            store.save_manifest(manifest)
+    manifest["runs"] = (manifest.get("runs", []) + [{"run_id": run_id, "at": datetime.utcnow().isoformat(), "rows": counts}])[-200:]
+    store.save_manifest(manifest)
+    return counts
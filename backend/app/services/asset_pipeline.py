@@ -0,0 +1,156 @@
+"""Download, dedupe and resize generated design images.
+
+`AssetPipeline.store` takes a render (bytes, or a URL downloaded once), hashes
+it, and — unless that hash is already stored — writes the original plus WebP
+variants at each configured width. Resizing is CPU-bound, so it runs in a shared
+process pool (`ASSET_PROCESS_WORKERS`; 0 runs it in a thread instead). Celery's
+prefork children are daemonic and may not start a pool of their own; they call
+`disable_process_pool()` and resize in a thread, the worker's processes already
+providing the parallelism.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence
+
+import httpx
+from PIL import Image
+
+from app.core.config import settings
+from app.services.asset_storage import EXTENSIONS, AssetStore, asset_key, content_hash, get_asset_store
+
+
+def make_variants(data: bytes, widths: Sequence[int], *, quality: int = 80) -> Dict[int, bytes]:
+    """WebP encodings of `data` at each width (never upscaled). Runs in worker processes."""
+    out: Dict[int, bytes] = {}
+    with Image.open(io.BytesIO(data)) as src:
+        src.load()
+        img = src.convert("RGBA" if "A" in src.getbands() else "RGB")
+    # Largest first, each derived from the previous: cheaper than always resizing the original.
+    current = img
+    for width in sorted(set(widths), reverse=True):
+        if width < current.width:
+            height = max(1, round(current.height * width / current.width))
+            current = current.resize((width, height), Image.LANCZOS)
+        buf = io.BytesIO()
+        current.save(buf, "WEBP", quality=quality, method=4)
+        out[width] = buf.getvalue()
+    return out
+
+
+def sniff_content_type(data: bytes) -> str:
+    if data.startswith(b"\x89PNG"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    if data[:4] == b"GIF8":
+        return "image/gif"
+    return "application/octet-stream"
+
+
+_executor: Optional[Executor] = None
+_process_pool_allowed = True
+
+
+def disable_process_pool() -> None:
+    """Resize in a thread from now on (for processes that cannot have children)."""
+    global _process_pool_allowed
+    _process_pool_allowed = False
+    shutdown_executor()
+
+
+def get_executor() -> Optional[Executor]:
+    """Shared process pool, created on first use; None means run in a thread."""
+    global _executor
+    if _executor is None and _process_pool_allowed and settings.asset_process_workers > 0:
+        _executor = ProcessPoolExecutor(max_workers=settings.asset_process_workers)
+    return _executor
+
+
+def shutdown_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+
+
+@dataclass
+class StoredAsset:
+    content_hash: str
+    key: str
+    image_url: str
+    thumbnail_url: str
+    variant_urls: Dict[int, str] = field(default_factory=dict)
+    deduplicated: bool = False
+
+
+class AssetPipeline:
+    def __init__(
+        self,
+        store: Optional[AssetStore] = None,
+        *,
+        http_client: Optional[httpx.AsyncClient] = None,
+        widths: Optional[Sequence[int]] = None,
+        thumbnail_width: Optional[int] = None,
+    ):
+        self.store = store or get_asset_store()
+        self.http_client = http_client
+        self.widths = sorted(set(widths or settings.asset_variant_widths))
+        self.thumbnail_width = thumbnail_width or settings.asset_thumbnail_width
+        if self.thumbnail_width not in self.widths:
+            self.widths = sorted({*self.widths, self.thumbnail_width})
+
+    async def _download(self, url: str) -> bytes:
+        if self.http_client is not None:
+            r = await self.http_client.get(url)
+            r.raise_for_status()
+            return r.content
+        async with httpx.AsyncClient(timeout=60, follow_redirects=True) as client:
+            r = await client.get(url)
+            r.raise_for_status()
+            return r.content
+
+    def _result(self, digest: str, ext: str, *, deduplicated: bool) -> StoredAsset:
+        variants = {w: self.store.url_for(asset_key(digest, "webp", variant=f"w{w}")) for w in self.widths}
+        return StoredAsset(
+            content_hash=digest,
+            key=asset_key(digest, ext),
+            image_url=self.store.url_for(asset_key(digest, ext)),
+            thumbnail_url=variants[self.thumbnail_width],
+            variant_urls=variants,
+            deduplicated=deduplicated,
+        )
+
+    async def store_image(self, *, data: Optional[bytes] = None, url: Optional[str] = None) -> StoredAsset:
+        if data is None:
+            if not url:
+                raise ValueError("store_image needs image bytes or a URL")
+            data = await self._download(url)
+
+        ctype = sniff_content_type(data)
+        ext = EXTENSIONS.get(ctype)
+        if ext is None:
+            raise ValueError(f"unsupported image content ({ctype})")
+        digest = content_hash(data)
+        original_key = asset_key(digest, ext)
+
+        # Variants are written before the original, so an existing original means a complete set.
+        if await self.store.exists(original_key):
+            return self._result(digest, ext, deduplicated=True)
+
+        loop = asyncio.get_running_loop()
+        variants = await loop.run_in_executor(get_executor(), make_variants, data, self.widths)
+        await asyncio.gather(
+            *(
+                self.store.put(asset_key(digest, "webp", variant=f"w{w}"), blob, "image/webp")
+                for w, blob in variants.items()
+            )
+        )
+        await self.store.put(original_key, data, ctype)
+        return self._result(digest, ext, deduplicated=False)
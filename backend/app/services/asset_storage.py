@@ -0,0 +1,190 @@
+"""Content-addressed storage for generated design images.
+
+Every object is stored under a key derived from the SHA-256 of the original image
+(`ab/abcdef....png`, variants as `ab/abcdef..._w256.webp`), so identical renders are
+stored once and a key's bytes never change. That is what lets `/assets/{key}` be
+served with `immutable` cache headers.
+
+Backends:
+- ``local``: files under `ASSET_STORAGE_DIR`, served by the API's `/assets` route.
+  Workers write the files, so the directory must be shared with the API (a common
+  volume); use ``s3`` when they run on separate machines.
+- ``s3``: any S3-compatible bucket (requires boto3). URLs point at
+  `ASSET_PUBLIC_BASE_URL` (e.g. a CDN in front of the bucket).
+"""
+
+from __future__ import annotations
+
+import abc
+import asyncio
+import hashlib
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+from urllib.parse import urlsplit
+
+from app.core.config import settings
+
+try:
+    import boto3
+except ImportError:  # pragma: no cover - optional dependency
+    boto3 = None
+
+EXTENSIONS = {"image/png": "png", "image/jpeg": "jpg", "image/webp": "webp", "image/gif": "gif"}
+CONTENT_TYPES = {ext: ctype for ctype, ext in EXTENSIONS.items()}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def asset_key(digest: str, ext: str, *, variant: Optional[str] = None) -> str:
+    name = f"{digest}_{variant}" if variant else digest
+    return f"{digest[:2]}/{name}.{ext}"
+
+
+def is_public_url(url: Optional[str]) -> bool:
+    """True for absolute http(s) URLs, which external services can fetch."""
+    if not url:
+        return False
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and bool(parts.netloc)
+
+
+def content_type_for(key: str) -> str:
+    return CONTENT_TYPES.get(key.rsplit(".", 1)[-1].lower(), "application/octet-stream")
+
+
+class AssetStore(abc.ABC):
+    def __init__(self, public_base_url: str):
+        self.public_base_url = public_base_url.rstrip("/")
+
+    def url_for(self, key: str) -> str:
+        return f"{self.public_base_url}/{key}"
+
+    @abc.abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abc.abstractmethod
+    async def put(self, key: str, data: bytes, content_type: str) -> None: ...
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[bytes]: ...
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None: ...
+
+
+class LocalAssetStore(AssetStore):
+    def __init__(self, root: str | Path, *, public_base_url: str = "/assets"):
+        super().__init__(public_base_url)
+        self.root = Path(root).resolve()
+
+    def path_for(self, key: str) -> Optional[Path]:
+        """Filesystem path for `key`, or None if it escapes the store root."""
+        path = (self.root / key).resolve()
+        return path if self.root in path.parents else None
+
+    def _write(self, key: str, data: bytes) -> None:
+        path = self.path_for(key)
+        if path is None:
+            raise ValueError(f"invalid asset key {key!r}")
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f"{path.suffix}.tmp{os.getpid()}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    async def exists(self, key: str) -> bool:
+        path = self.path_for(key)
+        return path is not None and await asyncio.to_thread(path.is_file)
+
+    async def put(self, key: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(self._write, key, data)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        path = self.path_for(key)
+        if path is None:
+            return None
+        try:
+            return await asyncio.to_thread(path.read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def delete(self, key: str) -> None:
+        path = self.path_for(key)
+        if path is not None:
+            await asyncio.to_thread(path.unlink, True)
+
+
+class S3AssetStore(AssetStore):
+    """S3-compatible bucket; boto3 calls run in threads."""
+
+    def __init__(
+        self,
+        bucket: str,
+        *,
+        public_base_url: str,
+        prefix: str = "",
+        endpoint_url: Optional[str] = None,
+        region: Optional[str] = None,
+    ):
+        if boto3 is None:
+            raise RuntimeError("S3 asset storage requires boto3 (pip install boto3)")
+        super().__init__(public_base_url)
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=region)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    async def exists(self, key: str) -> bool:
+        def head() -> bool:
+            try:
+                self.client.head_object(Bucket=self.bucket, Key=self._key(key))
+                return True
+            except self.client.exceptions.ClientError:
+                return False
+
+        return await asyncio.to_thread(head)
+
+    async def put(self, key: str, data: bytes, content_type: str) -> None:
+        await asyncio.to_thread(
+            self.client.put_object,
+            Bucket=self.bucket,
+            Key=self._key(key),
+            Body=data,
+            ContentType=content_type,
+            CacheControl=IMMUTABLE_CACHE_CONTROL,
+        )
+
+    async def get(self, key: str) -> Optional[bytes]:
+        def fetch() -> Optional[bytes]:
+            try:
+                return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"].read()
+            except self.client.exceptions.NoSuchKey:
+                return None
+
+        return await asyncio.to_thread(fetch)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(self.client.delete_object, Bucket=self.bucket, Key=self._key(key))
+
+
+@lru_cache(maxsize=1)
+def get_asset_store() -> AssetStore:
+    if settings.asset_storage == "s3":
+        if not settings.asset_s3_bucket:
+            raise RuntimeError("ASSET_S3_BUCKET must be set when ASSET_STORAGE=s3")
+        return S3AssetStore(
+            settings.asset_s3_bucket,
+            public_base_url=settings.asset_public_base_url,
+            prefix=settings.asset_s3_prefix,
+            endpoint_url=settings.asset_s3_endpoint_url,
+            region=settings.asset_s3_region,
+        )
+    if settings.asset_storage != "local":
+        raise ValueError(f"unknown asset storage {settings.asset_storage!r}; expected 'local' or 's3'")
+    return LocalAssetStore(settings.asset_storage_dir, public_base_url=settings.asset_public_base_url)
@@ -1,16 +1,10 @@
 from dataclasses import dataclass
-from typing import List
+from typing import List, Sequence
 
-KEYWORD_SEGMENTS = {
-    "cat": "Cat lovers / Pet owners",
-    "dog": "Dog lovers / Pet owners",
-    "mom": "Moms / Parents",
-    "dad": "Dads / Parents",
-    "teacher": "Teachers / Educators",
-    "gamer": "Gamers",
-    "fitness": "Fitness / Gym enthusiasts",
-    "anime": "Anime / Otaku fans",
-}
+from app.services.keywords import KeywordRule, audience_matcher, tone_matcher
+
+# Segment per keyword, as loaded from the keyword rules data.
+KEYWORD_SEGMENTS = {r.term: r.group for r in audience_matcher().rules}
 
 
 @dataclass
@@ -21,22 +15,17 @@ class AudienceInsight:
     tone: str
 
 
-def infer_audience_from_text(text: str) -> List[AudienceInsight]:
-    text_l = text.lower()
-    insights: List[AudienceInsight] = []
-
-    for kw, seg in KEYWORD_SEGMENTS.items():
-        if kw in text_l:
-            demographics = "Likely adults" if kw in {"mom", "dad", "teacher"} else "Mixed ages"
-            tone = "Fun / playful" if any(x in text_l for x in ["funny", "humor", "sarcastic"]) else "Neutral"
-            insights.append(
-                AudienceInsight(
-                    segment_name=seg,
-                    demographics=demographics,
-                    interests=f"Interests related to {seg}",
-                    tone=tone,
-                )
-            )
+def _insights(segments: Sequence[KeywordRule], tones: Sequence[KeywordRule]) -> List[AudienceInsight]:
+    tone = tones[0].group if tones else "Neutral"
+    insights: List[AudienceInsight] = [
+        AudienceInsight(
+            segment_name=rule.group,
+            demographics=rule.meta.get("demographics", "Mixed ages"),
+            interests=f"Interests related to {rule.group}",
+            tone=tone,
+        )
+        for rule in segments
+    ]
 
     if not insights:
         insights.append(
@@ -49,3 +38,14 @@ def infer_audience_from_text(text: str) -> List[AudienceInsight]:
         )
 
     return insights
+
+
+def infer_audience_from_text(text: str) -> List[AudienceInsight]:
+    return _insights(audience_matcher().match(text), tone_matcher().match(text))
+
+
+def infer_audiences_from_texts(texts: Sequence[str]) -> List[List[AudienceInsight]]:
+    """Batch form of `infer_audience_from_text`: one regex pass per rule set over all texts."""
+    segments = audience_matcher().match_many(texts)
+    tones = tone_matcher().match_many(texts)
+    return [_insights(s, t) for s, t in zip(segments, tones)]
@@ -0,0 +1,197 @@
+"""Whole-catalog price recommendations.
+
+Takes each product's latest snapshot price, normalizes it to USD, groups products
+by their latest `cluster_label` (falling back to niche, then marketplace) and
+computes per-group medians and quantile bands for every group at once with NumPy
+segment arithmetic. Recommendations are converted back to each product's own
+currency and bulk-inserted as `PriceRecommendation` rows.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import insert, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import MarketplaceProduct, PriceRecommendation, ProductSnapshot, TrendScore
+
+
+@dataclass
+class PricingRow:
+    product_id: int
+    group: str
+    price: float
+    currency: str
+
+
+@dataclass
+class PriceBands:
+    product_id: np.ndarray
+    recommended_min: np.ndarray
+    recommended_max: np.ndarray
+    currency: List[str]
+    median_usd: np.ndarray
+    group_size: np.ndarray
+
+
+def _group_quantile(sorted_prices: np.ndarray, starts: np.ndarray, counts: np.ndarray, q: float) -> np.ndarray:
+    """Linear-interpolated quantile of each contiguous sorted segment (numpy's default method)."""
+    pos = starts + q * (counts - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    return sorted_prices[lo] + (sorted_prices[hi] - sorted_prices[lo]) * (pos - lo)
+
+
+def compute_price_bands(
+    rows: Sequence[PricingRow],
+    *,
+    fx_rates_to_usd: Optional[Dict[str, float]] = None,
+    min_group_size: Optional[int] = None,
+    low_q: Optional[float] = None,
+    high_q: Optional[float] = None,
+) -> PriceBands:
+    """Vectorized price bands for every row.
+
+    Groups with at least `min_group_size` priced members get the [low_q, high_q]
+    quantile band; smaller groups get median +/-15% (as `recommend_price`); a
+    product alone in its group, or priced in a currency without an FX rate, gets
+    +/-10% around its own price.
+    """
+    rates = fx_rates_to_usd or settings.fx_rates_to_usd
+    min_group_size = min_group_size or settings.pricing_min_group_size
+    low_q = settings.pricing_band_low_quantile if low_q is None else low_q
+    high_q = settings.pricing_band_high_quantile if high_q is None else high_q
+
+    n = len(rows)
+    product_id = np.fromiter((r.product_id for r in rows), dtype=np.int64, count=n)
+    price = np.fromiter((r.price for r in rows), dtype=np.float64, count=n)
+    rate = np.fromiter((rates.get(r.currency.upper(), np.nan) for r in rows), dtype=np.float64, count=n)
+    currency = [r.currency for r in rows]
+    if n == 0:
+        return PriceBands(product_id, price, price, currency, price, product_id)
+
+    price_usd = price * rate
+    peer = (price > 0) & ~np.isnan(price_usd)
+
+    _, codes = np.unique(np.array([r.group for r in rows], dtype=object), return_inverse=True)
+    codes = codes.astype(np.int64)
+
+    # Peers only: sort by (group, usd price) and compute per-group stats over segments.
+    peer_idx = np.flatnonzero(peer)
+    order = peer_idx[np.lexsort((price_usd[peer_idx], codes[peer_idx]))]
+    sorted_prices = price_usd[order]
+    n_groups = int(codes.max()) + 1
+    counts = np.bincount(codes[order], minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+
+    has_peers = counts > 0
+    safe_counts = np.where(has_peers, counts, 1)
+    safe_starts = np.where(has_peers, starts, 0)
+    if len(sorted_prices) == 0:
+        sorted_prices = np.zeros(1)
+    median = np.where(has_peers, _group_quantile(sorted_prices, safe_starts, safe_counts, 0.5), np.nan)
+    q_low = np.where(has_peers, _group_quantile(sorted_prices, safe_starts, safe_counts, low_q), np.nan)
+    q_high = np.where(has_peers, _group_quantile(sorted_prices, safe_starts, safe_counts, high_q), np.nan)
+
+    g = codes
+    size = counts[g]
+    wide = size >= min_group_size
+    lo_usd = np.where(wide, q_low[g], median[g] * 0.85)
+    hi_usd = np.where(wide, q_high[g], median[g] * 1.15)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        lo = lo_usd / rate
+        hi = hi_usd / rate
+    own = ~peer | (size <= 1)
+    lo = np.where(own, price * 0.9, lo)
+    hi = np.where(own, price * 1.1, hi)
+
+    return PriceBands(
+        product_id=product_id,
+        recommended_min=lo,
+        recommended_max=hi,
+        currency=currency,
+        median_usd=np.where(own, np.nan, median[g]),
+        group_size=np.where(own, 0, size),
+    )
+
+
+async def load_pricing_rows(db: AsyncSession) -> List[PricingRow]:
+    """Latest snapshot price and latest cluster/niche per product, in one query."""
+    snap = (
+        select(ProductSnapshot.price, ProductSnapshot.currency)
+        .where(ProductSnapshot.product_id == MarketplaceProduct.id)
+        .order_by(ProductSnapshot.captured_at.desc())
+        .limit(1)
+        .lateral("latest_snapshot")
+    )
+    score = (
+        select(TrendScore.cluster_label, TrendScore.niche)
+        .where(TrendScore.product_id == MarketplaceProduct.id)
+        .order_by(TrendScore.created_at.desc())
+        .limit(1)
+        .lateral("latest_score")
+    )
+    stmt = (
+        select(
+            MarketplaceProduct.id,
+            MarketplaceProduct.marketplace,
+            MarketplaceProduct.niche,
+            snap.c.price,
+            snap.c.currency,
+            score.c.cluster_label,
+            score.c.niche,
+        )
+        .select_from(MarketplaceProduct)
+        .join(snap, true())
+        .outerjoin(score, true())
+    )
+    res = await db.execute(stmt)
+    rows: List[PricingRow] = []
+    for pid, marketplace, product_niche, price, currency, cluster_label, score_niche in res.all():
+        if cluster_label:
+            group = f"cluster:{cluster_label}"
+        elif score_niche or product_niche:
+            group = f"niche:{(score_niche or product_niche).strip().lower()}"
+        else:
+            group = f"marketplace:{marketplace}"
+        rows.append(PricingRow(product_id=pid, group=group, price=price, currency=currency or "USD"))
+    return rows
+
+
+async def reprice_catalog(db: AsyncSession, *, chunk_size: int = 5_000) -> Dict[str, int]:
+    """Recompute and bulk-insert a `PriceRecommendation` for every priced product."""
+    rows = await load_pricing_rows(db)
+    bands = compute_price_bands(rows)
+
+    now = datetime.utcnow()
+    records = []
+    for i, pid in enumerate(bands.product_id.tolist()):
+        median = bands.median_usd[i]
+        if median != median:  # NaN: no usable peers
+            rationale = "No peer data; +/-10% around current price."
+        else:
+            rationale = (
+                f"Based on median price of {median:.2f} USD across {int(bands.group_size[i])} "
+                f"listings in {rows[i].group}."
+            )
+        records.append(
+            {
+                "product_id": pid,
+                "recommended_min": float(bands.recommended_min[i]),
+                "recommended_max": float(bands.recommended_max[i]),
+                "currency": bands.currency[i],
+                "rationale": rationale,
+                "created_at": now,
+            }
+        )
+
+    for i in range(0, len(records), chunk_size):
+        await db.execute(insert(PriceRecommendation), records[i : i + chunk_size])
+    await db.commit()
+    return {"products": len(records), "groups": len({r.group for r in rows})}
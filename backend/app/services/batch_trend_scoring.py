@@ -0,0 +1,253 @@
+"""Vectorized trend scoring over every product.
+
+Loads snapshot history as columnar NumPy arrays sorted by (product_id,
+captured_at) and computes the same demand / competition / momentum values as
+`compute_trend_metrics` for all products in a chunk at once, using segment
+reductions (`np.*.reduceat`) instead of a Python loop per product.
+
+History past raw retention comes from the daily/weekly rollups, one row per
+bucket carrying its rank range and first sales value, exactly as
+`load_snapshot_history` feeds `compute_trend_metrics`.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from sqlalchemy import Float, Integer, cast, insert, literal, null, select, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import MarketplaceProduct, ProductSnapshot, SnapshotRollup, TrendScore
+
+
+@dataclass
+class SnapshotColumns:
+    """Snapshot history as parallel arrays, grouped by product and time-ordered within a product.
+
+    Missing values are NaN in the float columns. Rollup rows have snapshot_id -1
+    and fill the optional rank_min / rank_max / sales_first columns (NaN for raw rows).
+    """
+
+    product_id: np.ndarray  # int64
+    snapshot_id: np.ndarray  # int64
+    rank: np.ndarray  # float64
+    review_count: np.ndarray  # float64
+    estimated_sales: np.ndarray  # float64
+    rank_min: Optional[np.ndarray] = None  # float64
+    rank_max: Optional[np.ndarray] = None  # float64
+    sales_first: Optional[np.ndarray] = None  # float64
+
+    @classmethod
+    def from_rows(cls, rows: List[tuple]) -> "SnapshotColumns":
+        """Build from `(product_id, snapshot_id, rank, review_count, estimated_sales[, rank_min, rank_max, sales_first])` rows."""
+        if not rows:
+            empty_i = np.empty(0, dtype=np.int64)
+            empty_f = np.empty(0, dtype=np.float64)
+            return cls(empty_i, empty_i, empty_f, empty_f, empty_f)
+        columns = list(zip(*rows))
+        product_id, snapshot_id, rank, review_count, sales = columns[:5]
+        # dtype=float maps None -> NaN
+        extra = {}
+        if len(columns) == 8:
+            extra = {
+                name: np.asarray(col, dtype=np.float64)
+                for name, col in zip(("rank_min", "rank_max", "sales_first"), columns[5:])
+            }
+        return cls(
+            product_id=np.asarray(product_id, dtype=np.int64),
+            snapshot_id=np.asarray([-1 if sid is None else sid for sid in snapshot_id], dtype=np.int64),
+            rank=np.asarray(rank, dtype=np.float64),
+            review_count=np.asarray(review_count, dtype=np.float64),
+            estimated_sales=np.asarray(sales, dtype=np.float64),
+            **extra,
+        )
+
+
+@dataclass
+class BatchTrendMetrics:
+    product_id: np.ndarray
+    latest_snapshot_id: np.ndarray  # -1 where the latest history point is a rollup bucket
+    overall_score: np.ndarray
+    demand_score: np.ndarray
+    competition_score: np.ndarray
+    momentum_score: np.ndarray  # NaN where compute_trend_metrics returns None
+
+
+def compute_trend_metrics_batch(cols: SnapshotColumns) -> BatchTrendMetrics:
+    """Vectorized equivalent of `compute_trend_metrics` for every product in `cols`."""
+    pid = cols.product_id
+    n = len(pid)
+    if n == 0:
+        empty_f = np.empty(0, dtype=np.float64)
+        return BatchTrendMetrics(pid, cols.snapshot_id, empty_f, empty_f, empty_f, empty_f)
+
+    starts = np.flatnonzero(np.r_[True, pid[1:] != pid[:-1]])
+    last = np.r_[starts[1:], n] - 1
+    idx = np.arange(n)
+
+    # Index of the last / first non-null sales value within each product segment.
+    sales = cols.estimated_sales
+    has_sales = ~np.isnan(sales)
+    last_sales_idx = np.maximum.accumulate(np.where(has_sales, idx, -1))[last]
+    first_sales_idx = np.minimum.accumulate(np.where(has_sales, idx, n)[::-1])[::-1][starts]
+    has_any_sales = last_sales_idx >= starts
+    sales_count = np.add.reduceat(has_sales.astype(np.int64), starts)
+    last_sales = np.where(has_any_sales, sales[np.clip(last_sales_idx, 0, n - 1)], 0.0)
+    first_sales = np.where(has_any_sales, sales[np.clip(first_sales_idx, 0, n - 1)], 0.0)
+    if cols.sales_first is not None:
+        # A rollup as the first sales point contributes its bucket's first value.
+        bucket_first = cols.sales_first[np.clip(first_sales_idx, 0, n - 1)]
+        first_sales = np.where(has_any_sales & ~np.isnan(bucket_first), bucket_first, first_sales)
+
+    demand_raw = last_sales + np.nan_to_num(cols.review_count[last], nan=0.0)
+    demand = np.where(demand_raw > 0, np.clip(np.log1p(np.maximum(demand_raw, 0.0)) / 10, 0.0, 1.0), 0.0)
+
+    rank = cols.rank
+    rank_lo, rank_hi = rank, rank
+    if cols.rank_min is not None:
+        rank_lo = np.fmin(np.fmin(rank, cols.rank_min), cols.rank_max)
+        rank_hi = np.fmax(np.fmax(rank, cols.rank_min), cols.rank_max)
+    best = np.minimum.reduceat(np.where(np.isnan(rank_lo), np.inf, rank_lo), starts)
+    worst = np.maximum.reduceat(np.where(np.isnan(rank_hi), -np.inf, rank_hi), starts)
+    latest_rank = rank[last]
+    with np.errstate(invalid="ignore"):
+        span = np.where(worst != best, worst - best, 1.0)
+        competition = np.where(
+            np.isnan(latest_rank), 0.0, np.clip((worst - latest_rank) / span, 0.0, 1.0)
+        )
+    competition = np.nan_to_num(competition, nan=0.0)
+
+    momentum_ok = (sales_count >= 2) & (first_sales > 0)
+    safe_first = np.where(first_sales > 0, first_sales, 1.0)
+    momentum = np.where(momentum_ok, np.clip((last_sales - first_sales) / safe_first, -1.0, 1.0), np.nan)
+
+    overall = 0.6 * demand + 0.3 * (1 - competition) + 0.1 * np.nan_to_num(momentum, nan=0.0)
+
+    return BatchTrendMetrics(
+        product_id=pid[starts],
+        latest_snapshot_id=cols.snapshot_id[last],
+        overall_score=overall,
+        demand_score=demand,
+        competition_score=competition,
+        momentum_score=momentum,
+    )
+
+
+async def load_snapshot_columns(
+    db: AsyncSession,
+    *,
+    min_product_id: int,
+    max_product_id: int,
+    since: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+) -> SnapshotColumns:
+    """Raw snapshots plus, when the window reaches past raw retention, rollup buckets."""
+    raw = select(
+        ProductSnapshot.product_id,
+        ProductSnapshot.id.label("snapshot_id"),
+        ProductSnapshot.captured_at.label("at"),
+        literal(1).label("is_raw"),
+        ProductSnapshot.rank,
+        ProductSnapshot.review_count,
+        ProductSnapshot.estimated_sales,
+        cast(null(), Integer).label("rank_min"),
+        cast(null(), Integer).label("rank_max"),
+        cast(null(), Float).label("sales_first"),
+    ).where(ProductSnapshot.product_id >= min_product_id, ProductSnapshot.product_id <= max_product_id)
+    if since is not None:
+        raw = raw.where(ProductSnapshot.captured_at >= since)
+
+    raw_horizon = (now or datetime.utcnow()) - timedelta(days=settings.snapshot_raw_retention_days)
+    if since is not None and since >= raw_horizon:
+        source = raw.subquery()
+    else:
+        rolled = select(
+            SnapshotRollup.product_id,
+            cast(null(), ProductSnapshot.id.type),
+            SnapshotRollup.last_captured_at,
+            literal(0),
+            SnapshotRollup.rank_last,
+            SnapshotRollup.review_count_last,
+            SnapshotRollup.sales_last,
+            SnapshotRollup.rank_min,
+            SnapshotRollup.rank_max,
+            SnapshotRollup.sales_first,
+        ).where(SnapshotRollup.product_id >= min_product_id, SnapshotRollup.product_id <= max_product_id)
+        if since is not None:
+            rolled = rolled.where(SnapshotRollup.last_captured_at >= since)
+        source = union_all(raw, rolled).subquery()
+
+    c = source.c
+    # Rollups sort before raw rows at the same instant, as in load_snapshot_history.
+    stmt = select(
+        c.product_id, c.snapshot_id, c.rank, c.review_count, c.estimated_sales, c.rank_min, c.rank_max, c.sales_first
+    ).order_by(c.product_id, c.at, c.is_raw, c.snapshot_id)
+    res = await db.execute(stmt)
+    return SnapshotColumns.from_rows(res.all())
+
+
+async def score_all_products(
+    db: AsyncSession,
+    *,
+    chunk_size: int = 50_000,
+    since: Optional[datetime] = None,
+) -> Dict[str, int]:
+    """Score every product and bulk-insert one `TrendScore` row per product.
+
+    Works through products in id-ordered chunks (bounded memory), committing once
+    per chunk. Scores are computed over the full history (raw snapshots plus
+    rollups), or since `since`; products without history are skipped.
+    """
+    after_id = 0
+    products = 0
+    written = 0
+    while True:
+        res = await db.execute(
+            select(MarketplaceProduct.id, MarketplaceProduct.niche)
+            .where(MarketplaceProduct.id > after_id)
+            .order_by(MarketplaceProduct.id)
+            .limit(chunk_size)
+        )
+        chunk = res.all()
+        if not chunk:
+            break
+        products += len(chunk)
+        after_id = chunk[-1][0]
+        niches = {pid: niche for pid, niche in chunk}
+
+        cols = await load_snapshot_columns(db, min_product_id=chunk[0][0], max_product_id=after_id, since=since)
+        metrics = compute_trend_metrics_batch(cols)
+        if len(metrics.product_id) == 0:
+            continue
+
+        now = datetime.utcnow()
+        momentum = metrics.momentum_score
+        rows = [
+            {
+                "product_id": pid,
+                "snapshot_id": sid if sid >= 0 else None,
+                "overall_score": overall,
+                "demand_score": demand,
+                "competition_score": competition,
+                "momentum_score": None if mom != mom else mom,  # NaN -> NULL
+                "niche": niches.get(pid),
+                "created_at": now,
+            }
+            for pid, sid, overall, demand, competition, mom in zip(
+                metrics.product_id.tolist(),
+                metrics.latest_snapshot_id.tolist(),
+                metrics.overall_score.tolist(),
+                metrics.demand_score.tolist(),
+                metrics.competition_score.tolist(),
+                momentum.tolist(),
+            )
+        ]
+        await db.execute(insert(TrendScore), rows)
+        await db.commit()
+        written += len(rows)
+
+    return {"products": products, "scores_written": written}
@@ -1,10 +1,15 @@
 from dataclasses import dataclass
-from typing import Optional
+from datetime import datetime
+from typing import Any, Optional, Sequence, Tuple
 
 import httpx
+from sqlalchemy import insert, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import DesignAsset, MarketplaceProduct
+from app.core.config import settings
+from app.db.models import DesignAsset
+
+PLACEHOLDER_IMAGE_URL = "https://placehold.co/800x800?text=AI+Design"
 
 
 @dataclass
@@ -15,14 +20,15 @@ class DesignRequest:
     guidance_scale: float = 7.5
 
 
-async def generate_design_for_product(
-    db: AsyncSession,
-    product: MarketplaceProduct,
+async def render_txt2img(
     req: DesignRequest,
     *,
-    sd_api_base: str,
+    client: httpx.AsyncClient,
+    sd_api_base: Optional[str] = None,
     sd_api_key: Optional[str] = None,
-) -> DesignAsset:
+    timeout_s: Optional[int] = None,
+) -> Tuple[str, str]:
+    """Call the Stable Diffusion `txt2img` endpoint; returns (image_url, thumbnail_url)."""
     payload = {
         "prompt": req.prompt,
         "negative_prompt": req.negative_prompt or "",
@@ -30,27 +36,99 @@ async def generate_design_for_product(
         "guidance_scale": req.guidance_scale,
     }
     headers = {}
-    if sd_api_key:
-        headers["Authorization"] = f"Bearer {sd_api_key}"
-
-    async with httpx.AsyncClient() as client:
-        resp = await client.post(f"{sd_api_base}/txt2img", json=payload, headers=headers, timeout=120)
-        resp.raise_for_status()
-        data = resp.json()
-
-    image_url = data.get("image_url") or "https://placehold.co/800x800?text=AI+Design"
-    thumb = data.get("thumbnail_url") or image_url
-
-    asset = DesignAsset(
-        product_id=product.id,
-        prompt=req.prompt,
-        negative_prompt=req.negative_prompt,
-        provider="stable-diffusion",
-        image_url=image_url,
-        thumbnail_url=thumb,
-        status="ready",
+    api_key = sd_api_key or settings.sd_api_key
+    if api_key:
+        headers["Authorization"] = f"Bearer {api_key}"
+
+    resp = await client.post(
+        f"{sd_api_base or settings.sd_api_base}/txt2img",
+        json=payload,
+        headers=headers,
+        timeout=timeout_s or settings.sd_timeout_s,
+    )
+    resp.raise_for_status()
+    data = resp.json()
+
+    image_url = data.get("image_url") or PLACEHOLDER_IMAGE_URL
+    return image_url, data.get("thumbnail_url") or image_url
+
+
+async def create_pending_designs(
+    db: AsyncSession,
+    items: Sequence[Tuple[int, DesignRequest]],
+    *,
+    provider: Optional[str] = None,
+    cached: Optional[Sequence[Optional[Any]]] = None,
+) -> list[DesignAsset]:
+    """Insert one DesignAsset per (product_id, request) in a single statement, in order.
+
+    `cached` aligns with `items`; where it holds a render-cache entry the asset is
+    created `ready` with that image, otherwise `pending`. Flushes only; the caller
+    commits before enqueueing the render task.
+    """
+    if not items:
+        return []
+    now = datetime.utcnow()
+    cached = cached or [None] * len(items)
+    rows = []
+    for (product_id, req), hit in zip(items, cached):
+        row = {
+            "product_id": product_id,
+            "prompt": req.prompt,
+            "negative_prompt": req.negative_prompt,
+            "provider": provider or settings.design_renderer,
+            "status": "pending",
+            "created_at": now,
+            "image_url": None,
+            "thumbnail_url": None,
+            "content_hash": None,
+            "completed_at": None,
+        }
+        if hit is not None:
+            row.update(
+                status="ready",
+                image_url=hit.image_url,
+                thumbnail_url=hit.thumbnail_url,
+                content_hash=hit.content_hash,
+                completed_at=now,
+            )
+        rows.append(row)
+    res = await db.execute(insert(DesignAsset).returning(DesignAsset, sort_by_parameter_order=True), rows)
+    return list(res.scalars().all())
+
+
+async def mark_design_ready(
+    db: AsyncSession,
+    asset_id: int,
+    *,
+    image_url: str,
+    thumbnail_url: str,
+    content_hash: Optional[str] = None,
+) -> None:
+    await db.execute(
+        update(DesignAsset)
+        .where(DesignAsset.id == asset_id)
+        .values(
+            image_url=image_url,
+            thumbnail_url=thumbnail_url,
+            content_hash=content_hash,
+            status="ready",
+            error=None,
+            completed_at=datetime.utcnow(),
+        )
+    )
+
+
+async def mark_design_failed(db: AsyncSession, asset_id: int, *, error: str) -> None:
+    await db.execute(
+        update(DesignAsset)
+        .where(DesignAsset.id == asset_id)
+        .values(status="failed", error=error[:2000], completed_at=datetime.utcnow())
+    )
+
+
+async def load_pending_designs(db: AsyncSession, asset_ids: Sequence[int]) -> list[DesignAsset]:
+    res = await db.execute(
+        select(DesignAsset).where(DesignAsset.id.in_(asset_ids), DesignAsset.status == "pending")
     )
-    db.add(asset)
-    await db.commit()
-    await db.refresh(asset)
-    return asset
+    return list(res.scalars().all())
@@ -17,18 +17,30 @@ def _cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
 
 
 class OpenAIEmbeddingClient:
-    def __init__(self, api_key: str | None = None, model: str = "text-embedding-3-small"):
+    def __init__(
+        self,
+        api_key: str | None = None,
+        model: str | None = None,
+        http_client: httpx.AsyncClient | None = None,
+    ):
         self.api_key = api_key or settings.openai_api_key
-        self.model = model
-        self.base_url = "https://api.openai.com/v1/embeddings"
+        self.model = model or settings.openai_embedding_model
+        self.base_url = f"{settings.openai_base_url.rstrip('/')}/embeddings"
+        # Optional shared client (keeps connections alive across calls).
+        self.http_client = http_client
 
     async def embed_texts(self, texts: Iterable[str]) -> List[List[float]]:
         payload = {"input": list(texts), "model": self.model}
         headers = {"Authorization": f"Bearer {self.api_key}"}
-        async with httpx.AsyncClient() as client:
-            r = await client.post(self.base_url, json=payload, headers=headers, timeout=60)
+        if self.http_client is not None:
+            r = await self.http_client.post(self.base_url, json=payload, headers=headers, timeout=60)
             r.raise_for_status()
             data = r.json()
+        else:
+            async with httpx.AsyncClient() as client:
+                r = await client.post(self.base_url, json=payload, headers=headers, timeout=60)
+                r.raise_for_status()
+                data = r.json()
         return [d["embedding"] for d in data["data"]]
 
 
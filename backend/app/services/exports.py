@@ -0,0 +1,218 @@
+"""Streaming dataset exports (NDJSON, CSV, Parquet).
+
+Rows come from a server-side cursor (`AsyncSession.stream` with `yield_per`) and
+are encoded one chunk at a time, so memory stays constant regardless of how many
+rows match. Each chunk is flushed to the client before the next is fetched.
+
+The session is opened inside the generator, not taken from a request dependency:
+dependency cleanup runs before a streamed body is sent, which would close the
+cursor underneath us. Parquet requires pyarrow (optional); each chunk becomes
+one row group.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Sequence
+
+import orjson
+from sqlalchemy import Boolean, Date, DateTime, Float, Integer, Numeric, Select, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.crud.product import products_with_latest_stmt
+from app.crud.trend_item import TREND_ITEM_OUT_FIELDS
+from app.db.models import MarketplaceProduct, TrendItem
+from app.db.session import AsyncReadSessionLocal
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+
+def check_format(fmt: str) -> None:
+    if fmt not in MEDIA_TYPES:
+        raise ValueError(f"Unknown export format {fmt!r}; expected one of {', '.join(MEDIA_TYPES)}")
+    if fmt == "parquet" and pa is None:
+        raise RuntimeError("Parquet export requires pyarrow (pip install pyarrow)")
+
+
+def select_columns(model: Any, names: Sequence[str]) -> Select:
+    return select(*(model.__table__.c[name] for name in names))
+
+
+def trend_items_export_stmt(
+    *,
+    min_score: Optional[int] = None,
+    source: Optional[str] = None,
+    ai_status: Optional[str] = None,
+    published_since: Optional[datetime] = None,
+    published_until: Optional[datetime] = None,
+) -> Select:
+    stmt = select_columns(TrendItem, [*TREND_ITEM_OUT_FIELDS, "created_at", "updated_at"]).order_by(TrendItem.id)
+    if min_score is not None:
+        stmt = stmt.where(TrendItem.ai_score_0_100 >= min_score)
+    if source:
+        stmt = stmt.where(TrendItem.source.ilike(f"%{source}%"))
+    if ai_status:
+        stmt = stmt.where(TrendItem.ai_status == ai_status)
+    if published_since is not None:
+        stmt = stmt.where(TrendItem.published_at >= published_since)
+    if published_until is not None:
+        stmt = stmt.where(TrendItem.published_at < published_until)
+    return stmt
+
+
+def products_export_stmt(
+    *,
+    marketplace: Optional[str] = None,
+    niche: Optional[str] = None,
+    min_score: Optional[float] = None,
+    updated_since: Optional[datetime] = None,
+) -> Select:
+    """Products with their latest snapshot and latest trend score, flattened (`snapshot_*`, `trend_*`)."""
+    stmt = products_with_latest_stmt().order_by(MarketplaceProduct.id)
+    if marketplace:
+        stmt = stmt.where(MarketplaceProduct.marketplace == marketplace)
+    if niche:
+        stmt = stmt.where(MarketplaceProduct.niche.ilike(f"%{niche}%"))
+    if min_score is not None:
+        stmt = stmt.where(stmt.selected_columns.trend_overall_score >= min_score)
+    if updated_since is not None:
+        stmt = stmt.where(MarketplaceProduct.updated_at >= updated_since)
+    return stmt
+
+
+def arrow_type(sa_type: Any) -> Any:
+    """Arrow type for a SQLAlchemy column type (pyarrow required)."""
+    if isinstance(sa_type, Boolean):
+        return pa.bool_()
+    if isinstance(sa_type, Integer):
+        return pa.int64()
+    if isinstance(sa_type, (Float, Numeric)):
+        return pa.float64()
+    if isinstance(sa_type, DateTime):
+        return pa.timestamp("us")
+    if isinstance(sa_type, Date):
+        return pa.date32()
+    return pa.string()
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class _NdjsonEncoder:
+    def __init__(self, columns: List[str], _types: List[Any]):
+        self.columns = columns
+
+    def header(self) -> bytes:
+        return b""
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        cols = self.columns
+        return b"".join(orjson.dumps(dict(zip(cols, row))) + b"\n" for row in rows)
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class _CsvEncoder:
+    def __init__(self, columns: List[str], _types: List[Any]):
+        self.columns = columns
+        self._buf = io.StringIO()
+        self._writer = csv.writer(self._buf)
+
+    def _drain(self) -> bytes:
+        data = self._buf.getvalue().encode("utf-8")
+        self._buf.seek(0)
+        self._buf.truncate(0)
+        return data
+
+    def header(self) -> bytes:
+        self._writer.writerow(self.columns)
+        return self._drain()
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        self._writer.writerows([_csv_value(v) for v in row] for row in rows)
+        return self._drain()
+
+    def footer(self) -> bytes:
+        return b""
+
+
+class _ParquetEncoder:
+    """Writes one row group per chunk into a sink that is drained after every write."""
+
+    def __init__(self, columns: List[str], types: List[Any]):
+        self.columns = columns
+        self.schema = pa.schema([pa.field(name, arrow_type(t)) for name, t in zip(columns, types)])
+        self._sink = io.BytesIO()
+        self._writer = pq.ParquetWriter(self._sink, self.schema, compression="zstd")
+
+    def _drain(self) -> bytes:
+        data = self._sink.getvalue()
+        self._sink.seek(0)
+        self._sink.truncate(0)
+        return data
+
+    def header(self) -> bytes:
+        return self._drain()
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        arrays = [pa.array([row[i] for row in rows], type=field.type) for i, field in enumerate(self.schema)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self.schema))
+        return self._drain()
+
+    def footer(self) -> bytes:
+        self._writer.close()
+        return self._drain()
+
+
+ENCODERS: Dict[str, Callable[[List[str], List[Any]], Any]] = {
+    "ndjson": _NdjsonEncoder,
+    "csv": _CsvEncoder,
+    "parquet": _ParquetEncoder,
+}
+
+
+async def stream_export(
+    stmt: Select,
+    fmt: str,
+    *,
+    sessionmaker: async_sessionmaker[AsyncSession] = AsyncReadSessionLocal,
+    chunk_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """Yield `stmt`'s rows encoded as `fmt`, one chunk at a time, from a server-side cursor."""
+    check_format(fmt)
+    chunk_size = chunk_size or settings.export_chunk_size
+    columns = [c.name for c in stmt.selected_columns]
+    types = [c.type for c in stmt.selected_columns]
+    encoder = ENCODERS[fmt](columns, types)
+    head = encoder.header()
+    if head:
+        yield head
+    async with sessionmaker() as db:
+        result = await db.stream(stmt.execution_options(yield_per=chunk_size))
+        async for partition in result.partitions():
+            data = encoder.encode(partition)
+            if data:
+                yield data
+    tail = encoder.footer()
+    if tail:
+        yield tail
@@ -16,7 +16,17 @@ def _clean_html(text: str) -> str:
     return soup.get_text(" ", strip=True)
 
 
-async def fetch_rss(url: str, *, timeout_s: int = 30) -> feedparser.FeedParserDict:
+async def fetch_rss(
+    url: str,
+    *,
+    timeout_s: int = 30,
+    client: Optional[httpx.AsyncClient] = None,
+) -> feedparser.FeedParserDict:
+    if client is not None:
+        r = await client.get(url, timeout=timeout_s)
+        r.raise_for_status()
+        return feedparser.parse(r.text)
+
     async with httpx.AsyncClient(timeout=timeout_s, headers={"User-Agent": "pod-trend-bot/1.0"}) as client:
         r = await client.get(url)
         r.raise_for_status()
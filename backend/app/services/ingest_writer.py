@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.product import bulk_insert_snapshots, bulk_upsert_products
+from app.crud.trend import bulk_create_trends
+from app.scrapers.base import RawListing
+from app.services.scoring import score_listings
+from app.services.trend_state import score_new_snapshots
+
+
+@dataclass
+class WriteStats:
+    listings: int = 0
+    products: int = 0
+    chunks: int = 0
+
+
+class BulkIngestWriter:
+    """Persist scraped listings with a fixed number of round-trips per chunk.
+
+    Per chunk: one product upsert on (marketplace, external_id), batched snapshot
+    and trend inserts, one incremental scoring pass, and a single commit.
+    """
+
+    def __init__(self, db: AsyncSession, *, chunk_size: int = 500):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.stats = WriteStats()
+
+    async def write(self, listings: Sequence[RawListing]) -> int:
+        for i in range(0, len(listings), self.chunk_size):
+            await self._write_chunk(listings[i : i + self.chunk_size])
+        return len(listings)
+
+    async def _write_chunk(self, listings: Sequence[RawListing]) -> None:
+        if not listings:
+            return
+        product_ids = await bulk_upsert_products(self.db, listings)
+
+        captured_at = datetime.utcnow()
+        snapshots = await bulk_insert_snapshots(
+            self.db,
+            [
+                {
+                    "product_id": product_ids[(listing.marketplace, listing.product_id)],
+                    "captured_at": captured_at,
+                    "price": listing.price,
+                    "currency": listing.currency,
+                }
+                for listing in listings
+            ],
+        )
+        await score_new_snapshots(self.db, snapshots)
+        await bulk_create_trends(self.db, score_listings(listings))
+        await self.db.commit()
+
+        self.stats.listings += len(listings)
+        self.stats.products += len(product_ids)
+        self.stats.chunks += 1
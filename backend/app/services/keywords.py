@@ -0,0 +1,149 @@
+"""Shared keyword-rule engine for listing scoring and audience inference.
+
+Rules (term, group, weight, metadata) are loaded from data
+(`data/keyword_rules.json` by default, overridable via `KEYWORD_RULES_PATH`) and
+compiled into a single word-boundary regex whose alternation is factored as a
+character trie, so matching cost grows with text length rather than with the
+number of rules. Terms match whole words only ("catalog" is not "cat"), with an
+optional plural suffix ("cats" is "cat").
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from app.core.config import settings
+
+DEFAULT_RULES_PATH = Path(__file__).parent / "data" / "keyword_rules.json"
+
+
+@dataclass
+class KeywordRule:
+    term: str
+    group: str
+    weight: float = 0.0
+    meta: Dict[str, str] = field(default_factory=dict)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        terminal = "" in node
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch != ""]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy: longer continuations are tried first, the bare prefix is the fallback.
+            body = f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class KeywordMatcher:
+    """Compiled matcher over a set of `KeywordRule`s."""
+
+    def __init__(self, rules: Sequence[KeywordRule]):
+        self.rules = list(rules)
+        self._by_term: Dict[str, List[int]] = {}
+        for i, rule in enumerate(self.rules):
+            self._by_term.setdefault(rule.term.lower(), []).append(i)
+        if self._by_term:
+            self._regex: Optional[re.Pattern] = re.compile(
+                r"\b(" + _trie_pattern(self._by_term) + r")(?:e?s)?\b", re.IGNORECASE
+            )
+        else:
+            self._regex = None
+
+    def _rule_ids(self, text: str) -> List[int]:
+        if self._regex is None or not text:
+            return []
+        ids = {i for m in self._regex.finditer(text) for i in self._by_term.get(m.group(1).lower(), ())}
+        return sorted(ids)
+
+    def match(self, text: str) -> List[KeywordRule]:
+        """Rules whose term occurs in `text`, in rule-definition order, each at most once."""
+        return [self.rules[i] for i in self._rule_ids(text)]
+
+    def match_many(self, texts: Sequence[str]) -> List[List[KeywordRule]]:
+        """`match` over a batch, in a single regex pass over the joined texts."""
+        if self._regex is None:
+            return [[] for _ in texts]
+        starts: List[int] = []
+        pos = 0
+        for t in texts:
+            starts.append(pos)
+            pos += len(t) + 1
+        joined = "\n".join(texts)
+        hits: List[set] = [set() for _ in texts]
+        for m in self._regex.finditer(joined):
+            idx = bisect.bisect_right(starts, m.start()) - 1
+            hits[idx].update(self._by_term.get(m.group(1).lower(), ()))
+        return [[self.rules[i] for i in sorted(h)] for h in hits]
+
+    def groups(self, text: str) -> List[str]:
+        return list(dict.fromkeys(r.group for r in self.match(text)))
+
+    @staticmethod
+    def weight_of(matched: Sequence[KeywordRule]) -> float:
+        """Sum of weights, counting each group once (at its highest matched weight)."""
+        best: Dict[str, float] = {}
+        for r in matched:
+            best[r.group] = max(best.get(r.group, r.weight), r.weight)
+        return sum(best.values())
+
+    def score(self, text: str) -> float:
+        return self.weight_of(self.match(text))
+
+
+def load_rules(path: Optional[str] = None) -> dict:
+    with open(path or settings.keyword_rules_path or DEFAULT_RULES_PATH, encoding="utf-8") as fh:
+        return json.load(fh)
+
+
+@lru_cache(maxsize=1)
+def scoring_matcher() -> KeywordMatcher:
+    data = load_rules()
+    return KeywordMatcher(
+        [
+            KeywordRule(term=term, group=g["group"], weight=float(g["weight"]))
+            for g in data.get("scoring", [])
+            for term in g["terms"]
+        ]
+    )
+
+
+@lru_cache(maxsize=1)
+def audience_matcher() -> KeywordMatcher:
+    data = load_rules()
+    return KeywordMatcher(
+        [
+            KeywordRule(
+                term=r["term"],
+                group=r["segment"],
+                meta={"demographics": r.get("demographics", "Mixed ages")},
+            )
+            for r in data.get("audience", [])
+        ]
+    )
+
+
+@lru_cache(maxsize=1)
+def tone_matcher() -> KeywordMatcher:
+    data = load_rules()
+    return KeywordMatcher(
+        [KeywordRule(term=term, group=tone) for tone, terms in data.get("tone", {}).items() for term in terms]
+    )
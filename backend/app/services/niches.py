@@ -0,0 +1,386 @@
+"""Niche canonicalization: map free-text `ai_niche` strings onto `CanonicalNiche` rows.
+
+Each string is first normalized (`normalize_niche`: case, punctuation, simple
+plurals), so "Cat Lovers" and "cat lover" share one key without any model call.
+Keys are then resolved in order through:
+
+1. a per-process memo (`niche_memo`),
+2. the `niche_aliases` table (one query per batch),
+3. the embedding index: unseen keys are embedded in one batch and matched against
+   the canonical centroids by cosine similarity. A match at or above
+   `NICHE_MATCH_THRESHOLD` joins that niche and nudges its centroid (running
+   mean); otherwise the key founds a new canonical niche.
+
+The centroids and member counts in the database are authoritative: a batch's
+matches are folded into the locked rows, so concurrent workers compose and a
+rollback leaves nothing behind. The per-process index (`niche_index`) is only a
+read cache of committed centroids, reloaded every `NICHE_INDEX_TTL_S`.
+
+Without an embedding client (no OpenAI key, or the call fails) step 3 falls back
+to exact normalized-key matching, and those niches get a centroid later.
+Assignments are written to `niche_aliases` and never change, which is what makes
+memoizing them safe.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict, defaultdict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import CanonicalNiche, NicheAlias, TrendItem
+from app.services.embeddings import OpenAIEmbeddingClient, embedding_from_json, embedding_to_json
+
+log = logging.getLogger(__name__)
+
+_MAX_LEN = 255
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _singular(token: str) -> str:
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("sses", "shes", "ches", "xes", "zes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+def normalize_niche(text: Optional[str]) -> str:
+    """Lowercase, strip accents/punctuation, singularize simple plurals. "" for blank input."""
+    if not text:
+        return ""
+    s = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode().lower()
+    s = s.replace("&", " and ")
+    tokens = [_singular(t) for t in _NON_ALNUM.split(s) if t]
+    return " ".join(tokens)[:_MAX_LEN]
+
+
+class NicheMemo:
+    """Bounded LRU of normalized niche key -> canonical niche id."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[int]:
+        niche_id = self._entries.get(key)
+        if niche_id is not None:
+            self._entries.move_to_end(key)
+        return niche_id
+
+    def put(self, key: str, niche_id: int) -> None:
+        self._entries[key] = niche_id
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class NicheIndex:
+    """In-memory centroid matrix for one embedding model, unit-normalized for cosine search.
+
+    The shared `niche_index` is never written by an assignment (see `_absorb_matches`).
+    """
+
+    def __init__(self) -> None:
+        self.model: Optional[str] = None
+        self.ids: List[int] = []
+        self.members: List[int] = []
+        self._pos: Dict[int, int] = {}
+        self._centroids = np.zeros((0, 0), dtype=np.float32)  # running means
+        self._unit = np.zeros((0, 0), dtype=np.float32)
+        self.max_id = 0
+        self.loaded_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def reset(self, model: Optional[str]) -> None:
+        self.__init__()
+        self.model = model
+
+    @staticmethod
+    def _unit_rows(m: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(m, axis=1, keepdims=True)
+        return m / np.where(norms == 0, 1, norms)
+
+    def add(self, niche_id: int, centroid: Sequence[float], members: int) -> None:
+        vec = np.asarray(centroid, dtype=np.float32).reshape(1, -1)
+        if len(self.ids) and vec.shape[1] != self._centroids.shape[1]:
+            return  # different model/dimension; ignored
+        self._centroids = vec if not len(self.ids) else np.vstack([self._centroids, vec])
+        self._unit = self._unit_rows(self._centroids)
+        self._pos[niche_id] = len(self.ids)
+        self.ids.append(niche_id)
+        self.members.append(members)
+        self.max_id = max(self.max_id, niche_id)
+
+    def best(self, vec: np.ndarray) -> Tuple[Optional[int], float]:
+        if not self.ids or vec.shape[0] != self._unit.shape[1]:
+            return None, 0.0
+        sims = self._unit @ vec
+        i = int(np.argmax(sims))
+        return self.ids[i], float(sims[i])
+
+    def absorb(self, niche_id: int, vec: np.ndarray) -> Tuple[List[float], int]:
+        """Fold `vec` into the niche's running-mean centroid; returns (centroid, members)."""
+        i = self._pos[niche_id]
+        n = self.members[i]
+        self._centroids[i] = (self._centroids[i] * n + vec) / (n + 1)
+        self._unit[i] = self._unit_rows(self._centroids[i : i + 1])[0]
+        self.members[i] = n + 1
+        return self._centroids[i].tolist(), n + 1
+
+
+niche_memo = NicheMemo(settings.niche_memo_max_entries)
+niche_index = NicheIndex()
+
+
+def _unit(vec: Sequence[float]) -> np.ndarray:
+    v = np.asarray(vec, dtype=np.float32)
+    norm = float(np.linalg.norm(v))
+    return v / norm if norm else v
+
+
+async def _sync_index(db: AsyncSession, index: NicheIndex, model: str) -> None:
+    """Reload the index after its TTL or a model change; otherwise load only niches created since."""
+    if index.model != model or time.monotonic() - index.loaded_at > settings.niche_index_ttl_s:
+        index.reset(model)
+        index.loaded_at = time.monotonic()
+    res = await db.execute(
+        select(CanonicalNiche.id, CanonicalNiche.centroid_json, CanonicalNiche.members)
+        .where(
+            CanonicalNiche.id > index.max_id,
+            CanonicalNiche.provider == model,
+            CanonicalNiche.centroid_json.is_not(None),
+        )
+        .order_by(CanonicalNiche.id)
+    )
+    for niche_id, centroid_json, members in res.all():
+        index.add(niche_id, embedding_from_json(centroid_json), max(members, 1))
+
+
+async def _get_or_create_niche(
+    db: AsyncSession, key: str, name: str, *, model: Optional[str] = None, vec: Optional[np.ndarray] = None
+) -> Tuple[int, bool]:
+    """(id, created) for the canonical niche with slug `key`; concurrent creators converge on one row."""
+    values = dict(slug=key, name=name[:_MAX_LEN], members=1 if vec is not None else 0)
+    if vec is not None:
+        values.update(provider=model, dim=int(vec.shape[0]), centroid_json=embedding_to_json(vec.tolist()))
+    res = await db.execute(
+        pg_insert(CanonicalNiche).values(**values).on_conflict_do_nothing(index_elements=["slug"]).returning(CanonicalNiche.id)
+    )
+    niche_id = res.scalar_one_or_none()
+    if niche_id is not None:
+        return niche_id, True
+    res = await db.execute(select(CanonicalNiche.id).where(CanonicalNiche.slug == key))
+    return res.scalar_one(), False
+
+
+async def canonicalize_niches(
+    db: AsyncSession,
+    raw_niches: Iterable[Optional[str]],
+    *,
+    embedder: Optional[OpenAIEmbeddingClient] = None,
+    threshold: Optional[float] = None,
+    memo: NicheMemo = niche_memo,
+    index: NicheIndex = niche_index,
+) -> Dict[str, int]:
+    """Canonical niche id per normalized key (`normalize_niche`) of `raw_niches`; blanks are skipped. Flushes only."""
+    threshold = settings.niche_match_threshold if threshold is None else threshold
+    raw_by_key: Dict[str, str] = {}
+    for raw in raw_niches:
+        key = normalize_niche(raw)
+        if key:
+            raw_by_key.setdefault(key, raw.strip())
+
+    resolved: Dict[str, int] = {}
+    for key in raw_by_key:
+        niche_id = memo.get(key)
+        if niche_id is not None:
+            resolved[key] = niche_id
+
+    missing = [k for k in raw_by_key if k not in resolved]
+    if missing:
+        res = await db.execute(select(NicheAlias.alias, NicheAlias.canonical_niche_id).where(NicheAlias.alias.in_(missing)))
+        for key, niche_id in res.tuples().all():
+            resolved[key] = niche_id
+            memo.put(key, niche_id)
+        missing = [k for k in missing if k not in resolved]
+
+    # Assignments made below are only memoized once committed (found in niche_aliases by a later call).
+    if missing:
+        similarities = await _assign(db, missing, raw_by_key, resolved, embedder=embedder, threshold=threshold, index=index)
+        await db.execute(
+            pg_insert(NicheAlias)
+            .values(
+                [dict(alias=k, canonical_niche_id=resolved[k], similarity=similarities.get(k)) for k in missing]
+            )
+            .on_conflict_do_nothing(index_elements=["alias"])
+        )
+        # Another worker may have aliased the same key first; its assignment wins.
+        res = await db.execute(select(NicheAlias.alias, NicheAlias.canonical_niche_id).where(NicheAlias.alias.in_(missing)))
+        resolved.update(res.tuples().all())
+        await db.flush()
+    return resolved
+
+
+async def _assign(
+    db: AsyncSession,
+    keys: List[str],
+    raw_by_key: Dict[str, str],
+    resolved: Dict[str, int],
+    *,
+    embedder: Optional[OpenAIEmbeddingClient],
+    threshold: float,
+    index: NicheIndex,
+) -> Dict[str, float]:
+    """Resolve `keys` into `resolved`, creating canonical niches as needed; returns match similarities."""
+    vectors: Optional[List[List[float]]] = None
+    if embedder is not None and embedder.api_key:
+        try:
+            vectors = await embedder.embed_texts(keys)
+        except Exception as e:  # noqa: BLE001 - fall back to exact matching
+            log.warning("niche embedding failed, using exact matching: %s", e)
+
+    if vectors is None:
+        for key in keys:
+            resolved[key], _ = await _get_or_create_niche(db, key, raw_by_key[key])
+        return {}
+
+    await _sync_index(db, index, embedder.model)
+    # Niches created by this (uncommitted) batch are matched from a local index, so a
+    # rollback never leaves ids in the shared one that do not exist.
+    fresh = NicheIndex()
+    similarities: Dict[str, float] = {}
+    matched: Dict[int, List[np.ndarray]] = defaultdict(list)
+    for key, raw_vec in zip(keys, vectors):
+        vec = _unit(raw_vec)
+        niche_id, sim = index.best(vec)
+        target = index
+        fresh_id, fresh_sim = fresh.best(vec)
+        if fresh_id is not None and fresh_sim > sim:
+            niche_id, sim, target = fresh_id, fresh_sim, fresh
+        if niche_id is not None and sim >= threshold:
+            if target is fresh:
+                fresh.absorb(niche_id, vec)  # local only, for matching the rest of the batch
+            matched[niche_id].append(vec)
+            resolved[key], similarities[key] = niche_id, sim
+            continue
+        niche_id, created = await _get_or_create_niche(db, key, raw_by_key[key], model=embedder.model, vec=vec)
+        if created:
+            fresh.add(niche_id, vec, 1)
+        resolved[key] = niche_id
+    await _absorb_matches(db, matched)
+    return similarities
+
+
+async def _absorb_matches(db: AsyncSession, matched: Dict[int, List[np.ndarray]]) -> None:
+    """Fold matched vectors into their niches' running-mean centroids. Flushes only.
+
+    The mean starts from the row as locked, not from the in-process index, and rows are
+    locked in id order so two writers cannot deadlock.
+    """
+    if not matched:
+        return
+    res = await db.execute(
+        select(CanonicalNiche.id, CanonicalNiche.centroid_json, CanonicalNiche.members)
+        .where(CanonicalNiche.id.in_(sorted(matched)))
+        .order_by(CanonicalNiche.id)
+        .with_for_update()
+    )
+    for niche_id, centroid_json, members in res.all():
+        vecs = matched[niche_id]
+        total = np.sum(vecs, axis=0)
+        if centroid_json is not None:
+            n = max(members, 1)
+            total = total + np.asarray(embedding_from_json(centroid_json), dtype=np.float32) * n
+        else:
+            n = 0
+        await db.execute(
+            update(CanonicalNiche)
+            .where(CanonicalNiche.id == niche_id)
+            .values(
+                centroid_json=embedding_to_json((total / (n + len(vecs))).tolist()),
+                members=CanonicalNiche.members + len(vecs),
+            )
+        )
+
+
+async def embed_missing_centroids(db: AsyncSession, embedder: OpenAIEmbeddingClient, *, batch_size: int = 256) -> int:
+    """Give niches created by the exact-match fallback (or under another model) a centroid from their name."""
+    res = await db.execute(
+        select(CanonicalNiche.id, CanonicalNiche.name)
+        .where((CanonicalNiche.centroid_json.is_(None)) | (CanonicalNiche.provider != embedder.model))
+        .order_by(CanonicalNiche.id)
+        .limit(batch_size)
+    )
+    rows = res.all()
+    if not rows:
+        return 0
+    vectors = await embedder.embed_texts([name for _, name in rows])
+    for (niche_id, _), vec in zip(rows, vectors):
+        await db.execute(
+            update(CanonicalNiche)
+            .where(CanonicalNiche.id == niche_id)
+            .values(provider=embedder.model, dim=len(vec), centroid_json=embedding_to_json(_unit(vec).tolist()), members=1)
+        )
+    await db.flush()
+    return len(rows)
+
+
+async def assign_trend_item_niches(
+    db: AsyncSession, items: Sequence[TrendItem], *, embedder: Optional[OpenAIEmbeddingClient] = None
+) -> int:
+    """Set `niche_id` on items from their `ai_niche`; returns how many were assigned. Flushes only."""
+    pending = [item for item in items if item.ai_niche and item.niche_id is None]
+    if not pending:
+        return 0
+    mapping = await canonicalize_niches(db, [item.ai_niche for item in pending], embedder=embedder)
+    assigned = 0
+    for item in pending:
+        niche_id = mapping.get(normalize_niche(item.ai_niche))
+        if niche_id is not None:
+            item.niche_id = niche_id
+            assigned += 1
+    await db.flush()
+    return assigned
+
+
+async def backfill_trend_item_niches(
+    db: AsyncSession, *, embedder: Optional[OpenAIEmbeddingClient] = None, batch_size: int = 500
+) -> Dict[str, int]:
+    """Canonicalize scored items that have no niche yet (older items, failed assignments), one batch per commit."""
+    assigned = batches = 0
+    last_id = 0
+    while True:
+        res = await db.execute(
+            select(TrendItem)
+            .where(TrendItem.id > last_id, TrendItem.ai_niche.is_not(None), TrendItem.niche_id.is_(None))
+            .order_by(TrendItem.id)
+            .limit(batch_size)
+        )
+        items = res.scalars().all()
+        if not items:
+            break
+        last_id = items[-1].id
+        assigned += await assign_trend_item_niches(db, items, embedder=embedder)
+        await db.commit()
+        batches += 1
+    return {"assigned": assigned, "batches": batches}
@@ -0,0 +1,409 @@
+"""Shared, indexed snapshot of the Printful catalog.
+
+Picking a `printful_product_id`/`variant_id` for a design needs the whole catalog
+(products, variants, print areas, prices), which almost never changes. The
+`refresh_printful_catalog` task (on worker start and from beat) keeps a
+gzip-compressed JSON snapshot in Redis, where the API and every worker can read
+it. Each process keeps the decoded catalog in memory and only re-reads it when
+the stored version changes (checked at most every
+`PRINTFUL_CATALOG_CHECK_INTERVAL_S`), so the publish path resolves variants from
+memory and never waits on catalog calls.
+
+Refreshes are conditional. The product list is fetched with `If-None-Match`,
+and product details are only re-fetched when their list entry changed or
+their copy is older than `PRINTFUL_CATALOG_PRODUCT_MAX_AGE_S`; those
+re-fetches are conditional too.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import redis.asyncio as redis
+
+from app.core.config import settings
+from app.integrations.printful import PrintfulClient
+
+log = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+
+SIZE_ALIASES = {
+    "XXS": "2XS",
+    "XXL": "2XL",
+    "XXXL": "3XL",
+    "XXXXL": "4XL",
+    "XXXXXL": "5XL",
+    "SMALL": "S",
+    "MEDIUM": "M",
+    "LARGE": "L",
+    "X-LARGE": "XL",
+}
+
+
+class CatalogUnavailable(RuntimeError):
+    """No catalog snapshot has been fetched yet."""
+
+
+def normalize_type(value: str) -> str:
+    return "".join(ch for ch in value.lower() if ch.isalnum())
+
+
+def normalize_size(value: str) -> str:
+    size = value.strip().upper().replace(" ", "")
+    return SIZE_ALIASES.get(size, size)
+
+
+@dataclass
+class CatalogVariant:
+    id: int
+    product_id: int
+    name: str
+    size: str
+    color: str
+    color_code: Optional[str]
+    price: float
+    in_stock: bool = True
+
+
+@dataclass
+class CatalogProduct:
+    id: int
+    type: str
+    type_name: str
+    title: str
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    print_areas: List[str] = field(default_factory=list)
+    techniques: List[str] = field(default_factory=list)
+    is_discontinued: bool = False
+    variants: List[CatalogVariant] = field(default_factory=list)
+    # Revalidation state for the conditional refresh.
+    fingerprint: str = ""
+    etag: Optional[str] = None
+    fetched_at: float = 0.0
+
+
+def _fingerprint(entry: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(entry, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def _parse_product(entry: Dict[str, Any], details: Dict[str, Any], *, etag: Optional[str], fetched_at: float) -> CatalogProduct:
+    info = details.get("product") or entry
+    product_id = int(info["id"])
+    variants = [
+        CatalogVariant(
+            id=int(v["id"]),
+            product_id=product_id,
+            name=v.get("name") or "",
+            size=normalize_size(v.get("size") or ""),
+            color=v.get("color") or "",
+            color_code=v.get("color_code"),
+            price=float(v.get("price") or 0),
+            in_stock=bool(v.get("in_stock", True)),
+        )
+        for v in details.get("variants") or []
+    ]
+    return CatalogProduct(
+        id=product_id,
+        type=info.get("type") or "",
+        type_name=info.get("type_name") or "",
+        title=info.get("title") or info.get("model") or "",
+        brand=info.get("brand"),
+        model=info.get("model"),
+        print_areas=[f.get("type") for f in info.get("files") or [] if f.get("type")],
+        techniques=[t.get("key") for t in info.get("techniques") or [] if t.get("key")],
+        is_discontinued=bool(info.get("is_discontinued", False)),
+        variants=variants,
+        fingerprint=_fingerprint(entry),
+        etag=etag,
+        fetched_at=fetched_at,
+    )
+
+
+class PrintfulCatalog:
+    """Catalog snapshot with lookup indexes by id, product type and size."""
+
+    def __init__(self, products: Iterable[CatalogProduct], *, etag: Optional[str] = None, fetched_at: float = 0.0):
+        self.products: Dict[int, CatalogProduct] = {p.id: p for p in products}
+        self.etag = etag
+        self.fetched_at = fetched_at
+        self.variants: Dict[int, CatalogVariant] = {}
+        self._by_type: Dict[str, List[int]] = {}
+        self._by_product_size: Dict[Tuple[int, str], List[CatalogVariant]] = {}
+        for product in self.products.values():
+            for key in {normalize_type(product.type), normalize_type(product.type_name)} - {""}:
+                self._by_type.setdefault(key, []).append(product.id)
+            for v in product.variants:
+                self.variants[v.id] = v
+                self._by_product_size.setdefault((product.id, v.size), []).append(v)
+
+    def __len__(self) -> int:
+        return len(self.products)
+
+    def types(self) -> List[str]:
+        return sorted({p.type_name or p.type for p in self.products.values()})
+
+    def products_of_type(self, product_type: str) -> List[CatalogProduct]:
+        ids = self._by_type.get(normalize_type(product_type), [])
+        return [self.products[i] for i in ids if not self.products[i].is_discontinued]
+
+    def find_variants(
+        self,
+        *,
+        product_type: Optional[str] = None,
+        product_id: Optional[int] = None,
+        size: Optional[str] = None,
+        color: Optional[str] = None,
+        in_stock: bool = True,
+    ) -> List[CatalogVariant]:
+        if product_id is not None:
+            products = [self.products[product_id]] if product_id in self.products else []
+        elif product_type:
+            products = self.products_of_type(product_type)
+        else:
+            products = list(self.products.values())
+        size_key = normalize_size(size) if size else None
+        out: List[CatalogVariant] = []
+        for product in products:
+            candidates = self._by_product_size.get((product.id, size_key), []) if size_key else product.variants
+            out.extend(
+                v
+                for v in candidates
+                if (not in_stock or v.in_stock) and (not color or v.color.lower() == color.lower())
+            )
+        return out
+
+    def resolve(
+        self,
+        *,
+        product_type: Optional[str] = None,
+        product_id: Optional[int] = None,
+        size: Optional[str] = None,
+        color: Optional[str] = None,
+        preferred_product_id: Optional[int] = None,
+    ) -> Optional[CatalogVariant]:
+        """Best in-stock variant for the request: the preferred product first, then the cheapest."""
+        variants = self.find_variants(product_type=product_type, product_id=product_id, size=size, color=color)
+        if not variants:
+            return None
+        return min(variants, key=lambda v: (v.product_id != preferred_product_id, v.price, v.id))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "version": FORMAT_VERSION,
+            "etag": self.etag,
+            "fetched_at": self.fetched_at,
+            "products": [asdict(p) for p in self.products.values()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "PrintfulCatalog":
+        if data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"unsupported catalog snapshot version {data.get('version')!r}")
+        products = []
+        for raw in data.get("products") or []:
+            raw = dict(raw)
+            variants = [CatalogVariant(**v) for v in raw.pop("variants", [])]
+            products.append(CatalogProduct(**raw, variants=variants))
+        return cls(products, etag=data.get("etag"), fetched_at=float(data.get("fetched_at") or 0))
+
+
+CATALOG_KEY = "printful_catalog:snapshot"
+CATALOG_VERSION_KEY = "printful_catalog:version"
+
+# Raw bytes (the snapshot is gzip); workers may pass their own client.
+catalog_redis = redis.from_url(settings.redis_url)
+
+
+def encode_catalog(catalog: PrintfulCatalog) -> bytes:
+    return gzip.compress(json.dumps(catalog.to_dict(), separators=(",", ":")).encode("utf-8"))
+
+
+def decode_catalog(blob: bytes) -> PrintfulCatalog:
+    return PrintfulCatalog.from_dict(json.loads(gzip.decompress(blob)))
+
+
+async def save_catalog(catalog: PrintfulCatalog, *, client: Optional[redis.Redis] = None) -> str:
+    """Store the snapshot and its version together, so readers never see a mismatched pair."""
+    blob = encode_catalog(catalog)
+    version = hashlib.sha256(blob).hexdigest()[:16]
+    pipe = (client or catalog_redis).pipeline(transaction=True)
+    pipe.set(CATALOG_KEY, blob)
+    pipe.set(CATALOG_VERSION_KEY, version)
+    await pipe.execute()
+    return version
+
+
+async def _read(client: redis.Redis) -> Tuple[Optional[str], Optional[PrintfulCatalog]]:
+    version, blob = await client.mget(CATALOG_VERSION_KEY, CATALOG_KEY)
+    if blob is None:
+        return None, None
+    version = version.decode() if isinstance(version, bytes) else version
+    try:
+        return version, decode_catalog(blob)
+    except (OSError, ValueError, TypeError) as e:
+        log.warning("Ignoring unreadable Printful catalog snapshot %s: %s", version, e)
+        return version, None
+
+
+async def load_catalog(*, client: Optional[redis.Redis] = None) -> Optional[PrintfulCatalog]:
+    return (await _read(client or catalog_redis))[1]
+
+
+@dataclass
+class _Loaded:
+    version: Optional[str] = None
+    catalog: Optional[PrintfulCatalog] = None
+    checked_at: float = float("-inf")
+
+
+_loaded = _Loaded()
+
+
+async def get_catalog(*, client: Optional[redis.Redis] = None) -> Optional[PrintfulCatalog]:
+    """The current snapshot, re-read from Redis only when its version changes.
+
+    If Redis is unreachable the last loaded catalog keeps being served.
+    """
+    now = time.monotonic()
+    if now - _loaded.checked_at < settings.printful_catalog_check_interval_s:
+        return _loaded.catalog
+    r = client or catalog_redis
+    try:
+        version = await r.get(CATALOG_VERSION_KEY)
+        version = version.decode() if isinstance(version, bytes) else version
+        if version is None or version != _loaded.version:
+            _loaded.version, _loaded.catalog = await _read(r) if version is not None else (None, None)
+    except Exception as e:  # noqa: BLE001
+        log.warning("Printful catalog lookup failed: %s", e)
+        return _loaded.catalog
+    _loaded.checked_at = now
+    return _loaded.catalog
+
+
+def resolve_variant_ids(
+    catalog: Optional[PrintfulCatalog],
+    *,
+    product_id: Optional[int] = None,
+    variant_id: Optional[int] = None,
+    product_type: Optional[str] = None,
+    size: Optional[str] = None,
+    color: Optional[str] = None,
+) -> Tuple[int, int]:
+    """Pick `(printful_product_id, variant_id)` for a publish request from the local snapshot.
+
+    Explicit ids win (checked against the catalog when one is loaded); type/size/color
+    are resolved to the cheapest in-stock match; no criteria at all means the
+    configured default product. Raises LookupError when nothing matches.
+    """
+    if variant_id:
+        if catalog is None:
+            return product_id or settings.printful_default_product_id, variant_id
+        variant = catalog.variants.get(variant_id)
+        if variant is None or (product_id and variant.product_id != product_id):
+            raise LookupError(f"Printful variant {variant_id} not in catalog" + (f" product {product_id}" if product_id else ""))
+        return variant.product_id, variant.id
+    if not (product_id or product_type or size or color):
+        return settings.printful_default_product_id, settings.printful_default_variant_id
+    if catalog is None:
+        raise CatalogUnavailable("Printful catalog not loaded yet; pass printful_variant_id or retry later")
+    variant = catalog.resolve(
+        product_type=product_type,
+        product_id=product_id,
+        size=size,
+        color=color,
+        preferred_product_id=settings.printful_default_product_id,
+    )
+    if variant is None:
+        wanted = ", ".join(f"{k}={v}" for k, v in (("product", product_id), ("type", product_type), ("size", size), ("color", color)) if v)
+        raise LookupError(f"No in-stock Printful variant for {wanted}")
+    return variant.product_id, variant.id
+
+
+@dataclass
+class RefreshStats:
+    unchanged: bool = False
+    products: int = 0
+    fetched: int = 0
+    revalidated: int = 0
+    reused: int = 0
+    removed: int = 0
+    failed: int = 0
+
+
+async def refresh_catalog(
+    client: PrintfulClient,
+    current: Optional[PrintfulCatalog] = None,
+    *,
+    product_max_age_s: Optional[float] = None,
+    concurrency: int = 4,
+) -> Tuple[PrintfulCatalog, RefreshStats]:
+    """Bring `current` up to date with as few (and as cheap) calls as possible.
+
+    A product whose details can't be fetched keeps its previous copy, so one
+    failing call never drops products from the snapshot.
+    """
+    max_age = settings.printful_catalog_product_max_age_s if product_max_age_s is None else product_max_age_s
+    stats = RefreshStats()
+    now = time.time()
+    old = current.products if current else {}
+
+    listing, list_etag = await client.get_if_changed("/products", current.etag if current else None)
+    if listing is None and current is not None:
+        entries = None
+        stats.unchanged = True
+    else:
+        entries = {int(e["id"]): e for e in (listing or {}).get("result") or []}
+
+    if entries is None:
+        # List unchanged: only revalidate details that have aged out.
+        entries_by_id = {pid: None for pid in old}
+    else:
+        entries_by_id = entries
+        stats.removed = len(old.keys() - entries.keys())
+
+    sem = asyncio.Semaphore(concurrency)
+    products: Dict[int, CatalogProduct] = {}
+
+    async def sync(product_id: int, entry: Optional[Dict[str, Any]]) -> None:
+        prev = old.get(product_id)
+        changed = prev is None or (entry is not None and prev.fingerprint != _fingerprint(entry))
+        if not changed and now - prev.fetched_at < max_age:
+            products[product_id] = prev
+            stats.reused += 1
+            return
+        async with sem:
+            try:
+                details, etag = await client.get_catalog_product(product_id, None if changed else prev.etag)
+            except Exception as e:  # noqa: BLE001
+                log.warning("Printful catalog product %s refresh failed: %s", product_id, e)
+                stats.failed += 1
+                if prev is not None:
+                    products[product_id] = prev
+                return
+        if details is None:  # 304: same details, fresh timestamp
+            products[product_id] = replace(prev, fetched_at=now, etag=etag or prev.etag)
+            stats.revalidated += 1
+            return
+        product = _parse_product(entry or {"id": product_id}, details, etag=etag, fetched_at=now)
+        if prev is not None and entry is None:
+            product.fingerprint = prev.fingerprint
+        products[product_id] = product
+        stats.fetched += 1
+
+    await asyncio.gather(*(sync(pid, entry) for pid, entry in entries_by_id.items()))
+    stats.products = len(products)
+    catalog = PrintfulCatalog(
+        (products[pid] for pid in entries_by_id if pid in products),
+        etag=list_etag if entries is not None else current.etag,
+        fetched_at=now,
+    )
+    return catalog, stats
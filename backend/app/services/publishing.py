@@ -0,0 +1,393 @@
+"""Bulk publishing of designs to Printful and Shopify.
+
+`create_publish_jobs` records one `PublishJob` per (product, design asset) pair;
+`PublishPipeline.run` works through them concurrently. Both provider clients are
+shared across all jobs, so their rate limiters pace the batch as a whole against
+each provider's budget (see app.integrations.rate_limit).
+
+A job runs two steps — Printful sync product, then Shopify draft — and commits
+after each. Provider calls carry a stable external id / handle derived from the
+design asset, so a retried job resumes where it stopped and never publishes the
+same design twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+import httpx
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.db.models import DesignAsset, MarketplaceProduct, PublishJob
+from app.integrations.printful import PrintfulClient
+from app.integrations.rate_limit import LeakyBucketLimiter, RetryableError, WindowLimiter
+from app.integrations.shopify import ShopifyClient
+from app.integrations.shopify_bulk import ShopifyBulkClient
+from app.services.asset_storage import is_public_url
+
+ProgressCallback = Callable[[dict], Awaitable[None]]
+
+AWAITING_SHOPIFY = "awaiting_shopify"
+
+
+@dataclass
+class PublishItem:
+    product_id: int
+    design_asset_id: int
+    printful_product_id: Optional[int] = None
+    printful_variant_id: Optional[int] = None
+
+
+@dataclass
+class PublishStats:
+    done: int = 0
+    failed: int = 0
+    errors: List[str] = field(default_factory=list)
+
+
+DESIGN_HANDLE_PREFIX = "pod-design-"
+
+
+def design_external_id(design_asset_id: int) -> str:
+    return f"{DESIGN_HANDLE_PREFIX}{design_asset_id}"
+
+
+async def create_publish_jobs(db: AsyncSession, items: Sequence[PublishItem]) -> Tuple[str, List[PublishJob]]:
+    """Insert jobs for `items` under a new batch id; designs already published keep their job.
+
+    Returns the batch id and every job covering `items` (new or existing). Flushes only.
+    """
+    batch_id = str(uuid.uuid4())
+    if not items:
+        return batch_id, []
+    now = datetime.utcnow()
+    await db.execute(
+        pg_insert(PublishJob)
+        .values(
+            [
+                {
+                    "batch_id": batch_id,
+                    "product_id": item.product_id,
+                    "design_asset_id": item.design_asset_id,
+                    "printful_product_id": item.printful_product_id or settings.printful_default_product_id,
+                    "printful_variant_id": item.printful_variant_id or settings.printful_default_variant_id,
+                    "status": "pending",
+                    "attempts": 0,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for item in items
+            ]
+        )
+        .on_conflict_do_nothing(constraint="uq_publish_jobs_design_asset")
+    )
+    design_ids = [i.design_asset_id for i in items]
+    # Unfinished jobs from earlier batches are re-queued under this one.
+    await db.execute(
+        update(PublishJob)
+        .where(PublishJob.design_asset_id.in_(design_ids), PublishJob.status != "done")
+        .values(batch_id=batch_id, status="pending", updated_at=now)
+    )
+    res = await db.execute(select(PublishJob).where(PublishJob.design_asset_id.in_(design_ids)))
+    return batch_id, list(res.scalars().all())
+
+
+async def batch_progress(db: AsyncSession, batch_id: str) -> Dict[str, int]:
+    res = await db.execute(
+        select(PublishJob.status, func.count()).where(PublishJob.batch_id == batch_id).group_by(PublishJob.status)
+    )
+    return {status: int(n) for status, n in res.all()}
+
+
+def build_printful_client(http_client: Optional[httpx.AsyncClient] = None) -> PrintfulClient:
+    if not settings.printful_api_key:
+        raise RuntimeError("PRINTFUL_API_KEY must be set")
+    return PrintfulClient(
+        settings.printful_api_key,
+        base_url=settings.printful_base_url,
+        http_client=http_client,
+        limiter=WindowLimiter(limit=settings.printful_rate_limit, window_s=settings.printful_rate_window_s),
+        max_attempts=settings.publish_max_attempts,
+    )
+
+
+def build_clients(http_client: Optional[httpx.AsyncClient] = None) -> Tuple[PrintfulClient, ShopifyClient]:
+    if not (settings.printful_api_key and settings.shopify_shop_domain and settings.shopify_admin_token):
+        raise RuntimeError("PRINTFUL_API_KEY, SHOPIFY_SHOP_DOMAIN and SHOPIFY_ADMIN_TOKEN must be set to publish")
+    printful = build_printful_client(http_client)
+    shopify = ShopifyClient(
+        settings.shopify_shop_domain,
+        settings.shopify_admin_token,
+        settings.shopify_api_version,
+        http_client=http_client,
+        limiter=LeakyBucketLimiter(capacity=settings.shopify_bucket_size, leak_rate=settings.shopify_leak_rate),
+        max_attempts=settings.publish_max_attempts,
+    )
+    return printful, shopify
+
+
+def build_bulk_client(http_client: Optional[httpx.AsyncClient] = None) -> ShopifyBulkClient:
+    if not (settings.shopify_shop_domain and settings.shopify_admin_token):
+        raise RuntimeError("SHOPIFY_SHOP_DOMAIN and SHOPIFY_ADMIN_TOKEN must be set to publish")
+    return ShopifyBulkClient(
+        settings.shopify_shop_domain,
+        settings.shopify_admin_token,
+        settings.shopify_api_version,
+        http_client=http_client,
+        max_attempts=settings.publish_max_attempts,
+    )
+
+
+async def awaiting_shopify_job_ids(db: AsyncSession, *, limit: int) -> List[int]:
+    res = await db.execute(
+        select(PublishJob.id).where(PublishJob.status == AWAITING_SHOPIFY).order_by(PublishJob.id).limit(limit)
+    )
+    return list(res.scalars().all())
+
+
+async def sync_shopify_bulk(
+    db: AsyncSession,
+    client: ShopifyBulkClient,
+    job_ids: Sequence[int],
+    *,
+    on_progress: Optional[ProgressCallback] = None,
+) -> PublishStats:
+    """Finish the Shopify step of `awaiting_shopify` jobs with two bulk operations.
+
+    A bulk query first reconciles drafts that already exist (matched by the design
+    handle, e.g. from an earlier interrupted sync); one bulk mutation then creates
+    the rest. Commits once at the end, then reports one `publish_progress` event
+    per publish batch. Shopify allows one bulk operation per shop at a time, so
+    callers must serialize syncs; on `ShopifyBulkError` nothing is committed and
+    the jobs stay `awaiting_shopify` for the next attempt.
+    """
+    stats = PublishStats()
+    res = await db.execute(
+        select(PublishJob, MarketplaceProduct, DesignAsset)
+        .join(MarketplaceProduct, MarketplaceProduct.id == PublishJob.product_id)
+        .join(DesignAsset, DesignAsset.id == PublishJob.design_asset_id)
+        .where(PublishJob.id.in_(job_ids), PublishJob.status == AWAITING_SHOPIFY)
+    )
+    rows = list(res.all())
+    if not rows:
+        return stats
+
+    existing = await client.fetch_products_by_handle(DESIGN_HANDLE_PREFIX)
+    to_create = [row for row in rows if design_external_id(row[2].id) not in existing]
+    created = await client.bulk_create_draft_products(
+        [
+            {
+                "title": product.title[:255],
+                "descriptionHtml": product.description or "",
+                "handle": design_external_id(design.id),
+                "tags": [t.strip() for t in (product.tags or "").split(",") if t.strip()],
+                "images": [{"src": design.image_url}],
+            }
+            for _, product, design in to_create
+        ]
+    )
+    outcome = {job.id: payload for (job, _, _), payload in zip(to_create, created)}
+    now = datetime.utcnow()
+    updates = []
+    per_batch: Dict[str, List[int]] = {}
+    for job, _, design in rows:
+        gid = existing.get(design_external_id(design.id))
+        error = None
+        if gid is None:
+            payload = outcome.get(job.id) or {}
+            gid = (payload.get("product") or {}).get("id")
+            if gid is None:
+                error = f"productCreate failed: {payload.get('userErrors')}"
+        counts = per_batch.setdefault(job.batch_id, [0, 0])
+        if gid is not None:
+            stats.done += 1
+            counts[0] += 1
+        else:
+            stats.failed += 1
+            counts[1] += 1
+            stats.errors.append(f"job {job.id}: {error}")
+        updates.append(
+            {
+                "job_id": job.id,
+                "shopify_product_id": gid.rsplit("/", 1)[-1] if gid else None,
+                "status": "done" if gid else "failed",
+                "error": error,
+                "updated_at": now,
+            }
+        )
+
+    await db.execute(
+        update(PublishJob.__table__)
+        .where(PublishJob.__table__.c.id == bindparam("job_id"))
+        .values(
+            shopify_product_id=bindparam("shopify_product_id"),
+            status=bindparam("status"),
+            error=bindparam("error"),
+            updated_at=bindparam("updated_at"),
+        ),
+        updates,
+    )
+    await db.commit()
+    if on_progress is not None:
+        for batch_id, (done, failed) in per_batch.items():
+            await on_progress(
+                {"type": "publish_progress", "batch_id": batch_id, "stage": "shopify_bulk", "done": done, "failed": failed}
+            )
+    return stats
+
+
+def _is_transient(exc: BaseException) -> bool:
+    if isinstance(exc, (RetryableError, httpx.TransportError)):
+        return True
+    return isinstance(exc, httpx.HTTPStatusError) and exc.response.status_code >= 500
+
+
+class PublishPipeline:
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        printful: PrintfulClient,
+        shopify: ShopifyClient,
+        *,
+        concurrency: Optional[int] = None,
+        max_attempts: Optional[int] = None,
+        on_progress: Optional[ProgressCallback] = None,
+        shopify_step: bool = True,
+        retry_backoff_s: float = 2.0,
+    ):
+        """With `shopify_step=False` jobs stop after Printful in `awaiting_shopify`
+        for `sync_shopify_bulk` to finish in one bulk operation."""
+        self.shopify_step = shopify_step
+        self.retry_backoff_s = retry_backoff_s
+        self.sessionmaker = sessionmaker
+        self.printful = printful
+        self.shopify = shopify
+        self.concurrency = concurrency or settings.publish_concurrency
+        self.max_attempts = max_attempts or settings.publish_max_attempts
+        self.on_progress = on_progress
+        self.stats = PublishStats()
+
+    async def run(self, job_ids: Sequence[int]) -> PublishStats:
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for job_id in job_ids:
+            queue.put_nowait(job_id)
+
+        async def worker() -> None:
+            # One session per worker, reused across its jobs.
+            async with self.sessionmaker() as db:
+                while True:
+                    try:
+                        job_id = queue.get_nowait()
+                    except asyncio.QueueEmpty:
+                        return
+                    await self._run_job(db, job_id)
+
+        await asyncio.gather(*(worker() for _ in range(min(self.concurrency, len(job_ids)) or 1)))
+        return self.stats
+
+    async def _load(self, db: AsyncSession, job_id: int):
+        res = await db.execute(
+            select(PublishJob, MarketplaceProduct, DesignAsset)
+            .join(MarketplaceProduct, MarketplaceProduct.id == PublishJob.product_id)
+            .join(DesignAsset, DesignAsset.id == PublishJob.design_asset_id)
+            .where(PublishJob.id == job_id)
+            .execution_options(populate_existing=True)
+        )
+        return res.one_or_none()
+
+    async def _set(self, db: AsyncSession, job_id: int, **values) -> None:
+        # synchronize_session=False: the loaded job keeps the values it had when the
+        # run started (`_run_job` tracks its own progress on it explicitly).
+        await db.execute(
+            update(PublishJob)
+            .where(PublishJob.id == job_id)
+            .values(updated_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        await db.commit()
+
+    async def _run_job(self, db: AsyncSession, job_id: int) -> None:
+        row = await self._load(db, job_id)
+        if row is None:
+            return
+        job, product, design = row
+        if job.status == "done":
+            return
+        if design.status != "ready" or not design.image_url:
+            await self._finish(db, job, "failed", error=f"design {design.id} is not ready")
+            return
+        if not is_public_url(design.image_url):
+            error = f"design {design.id} image URL {design.image_url!r} is not absolute; set ASSET_PUBLIC_BASE_URL"
+            await self._finish(db, job, "failed", error=error)
+            return
+
+        external_id = design_external_id(design.id)
+        # Attempts are counted across runs, so a re-queued job gets a fresh budget.
+        first, last = job.attempts + 1, job.attempts + self.max_attempts
+        for attempt in range(first, last + 1):
+            await self._set(db, job.id, status="running", attempts=attempt)
+            try:
+                if not job.printful_sync_product_id:
+                    data = await self.printful.create_product_with_mockup(
+                        product.title[:200],
+                        job.printful_product_id,
+                        job.printful_variant_id,
+                        design.image_url,
+                        external_id=external_id,
+                        check_existing=attempt > 1,
+                    )
+                    result = data.get("result") or {}
+                    job.printful_sync_product_id = str((result.get("sync_product") or result).get("id", ""))
+                    await self._set(db, job.id, printful_sync_product_id=job.printful_sync_product_id)
+
+                if not self.shopify_step:
+                    await self._set(db, job.id, status=AWAITING_SHOPIFY)
+                    return
+
+                if not job.shopify_product_id:
+                    data = await self.shopify.create_draft_product(
+                        product.title[:255],
+                        product.description or "",
+                        [design.image_url],
+                        tags=[t.strip() for t in (product.tags or "").split(",") if t.strip()] or None,
+                        handle=external_id,
+                        check_existing=attempt > 1,
+                    )
+                    job.shopify_product_id = str((data.get("product") or {}).get("id", ""))
+                    await self._set(db, job.id, shopify_product_id=job.shopify_product_id)
+
+                await self._finish(db, job, "done")
+                return
+            except Exception as e:  # noqa: BLE001
+                if not _is_transient(e) or attempt == last:
+                    await self._finish(db, job, "failed", error=str(e) or type(e).__name__)
+                    return
+                # Provider-level retries already backed off; give the limiter a moment more.
+                await asyncio.sleep(min(30.0, self.retry_backoff_s * (attempt - first + 1)))
+
+    async def _finish(self, db: AsyncSession, job: PublishJob, status: str, *, error: Optional[str] = None) -> None:
+        await self._set(db, job.id, status=status, error=error[:2000] if error else None)
+        if status == "done":
+            self.stats.done += 1
+        else:
+            self.stats.failed += 1
+            self.stats.errors.append(f"job {job.id}: {error}")
+        if self.on_progress is not None:
+            await self.on_progress(
+                {
+                    "type": "publish_progress",
+                    "batch_id": job.batch_id,
+                    "job_id": job.id,
+                    "design_id": job.design_asset_id,
+                    "status": status,
+                    "done": self.stats.done,
+                    "failed": self.stats.failed,
+                }
+            )
@@ -0,0 +1,204 @@
+"""Reuse cache for design renders.
+
+Renders are keyed by a hash of the renderer plus the *normalized* request
+(case/whitespace/Unicode-folded prompt, order-insensitive negative-prompt terms,
+steps, guidance scale), so repeated or trivially different prompts resolve to the
+image already in asset storage instead of being re-rendered.
+
+Hit/miss counters live in Redis (best-effort, like realtime events) so they
+aggregate across API and worker processes. Each design is counted once: the API
+records the hits it serves directly, and the render task records a hit or miss
+for every asset it picks up (another job may have rendered it meanwhile). `evict_render_cache` drops idle and
+least-recently-hit entries and deletes their stored objects once no DesignAsset
+references them any more.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import redis.asyncio as redis
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import DesignAsset, DesignRenderCache
+from app.services.asset_storage import AssetStore, asset_key, get_asset_store
+from app.services.design_generation import DesignRequest
+
+STATS_KEY = "design_render_cache:stats"
+
+# Shared by the API process; workers pass their runtime client instead.
+stats_redis = redis.from_url(settings.redis_url, decode_responses=True)
+
+_WS = re.compile(r"\s+")
+_TRAILING = re.compile(r"[\s.,;:!]+$")
+
+
+def normalize_prompt(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return _TRAILING.sub("", _WS.sub(" ", text).strip())
+
+
+def normalize_negative_prompt(text: Optional[str]) -> str:
+    """Negative prompts are term lists; order and duplicates don't change the render."""
+    terms = {normalize_prompt(t) for t in (text or "").split(",")}
+    return ",".join(sorted(t for t in terms if t))
+
+
+def render_cache_key(req: DesignRequest, renderer: Optional[str] = None) -> str:
+    parts = (
+        renderer or settings.design_renderer,
+        normalize_prompt(req.prompt),
+        normalize_negative_prompt(req.negative_prompt),
+        str(int(req.steps)),
+        f"{float(req.guidance_scale):.2f}",
+    )
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    cache_key: str
+    image_url: str
+    thumbnail_url: Optional[str]
+    content_hash: Optional[str]
+
+
+async def lookup_renders(
+    db: AsyncSession,
+    keys: Iterable[str],
+    *,
+    store: Optional[AssetStore] = None,
+) -> Dict[str, CacheEntry]:
+    """Cached renders for `keys`, bumping their hit counters.
+
+    Entries whose original object has vanished from asset storage are dropped
+    rather than served.
+    """
+    keys = list(dict.fromkeys(keys))
+    if not keys or not settings.design_cache_enabled:
+        return {}
+    res = await db.execute(select(DesignRenderCache).where(DesignRenderCache.cache_key.in_(keys)))
+    rows = list(res.scalars().all())
+
+    store = store or get_asset_store()
+    found: Dict[str, CacheEntry] = {}
+    stale: List[str] = []
+    for row in rows:
+        if row.asset_key and not await store.exists(row.asset_key):
+            stale.append(row.cache_key)
+            continue
+        found[row.cache_key] = CacheEntry(row.cache_key, row.image_url, row.thumbnail_url, row.content_hash)
+
+    if stale:
+        await db.execute(delete(DesignRenderCache).where(DesignRenderCache.cache_key.in_(stale)))
+    if found:
+        await db.execute(
+            update(DesignRenderCache)
+            .where(DesignRenderCache.cache_key.in_(list(found)))
+            .values(hits=DesignRenderCache.hits + 1, last_hit_at=datetime.utcnow())
+        )
+    return found
+
+
+async def store_renders(db: AsyncSession, entries: Sequence[dict]) -> None:
+    """Insert cache entries (dicts of DesignRenderCache columns); existing keys are kept."""
+    if not entries or not settings.design_cache_enabled:
+        return
+    now = datetime.utcnow()
+    rows = [{"created_at": now, "last_hit_at": now, "hits": 0, **e} for e in entries]
+    await db.execute(pg_insert(DesignRenderCache).values(rows).on_conflict_do_nothing(index_elements=["cache_key"]))
+
+
+async def record_stats(hits: int, misses: int, *, client: Optional[redis.Redis] = None) -> None:
+    """Add to the shared hit/miss counters. Best-effort, never raises."""
+    if not (hits or misses):
+        return
+    try:
+        pipe = (client or stats_redis).pipeline(transaction=False)
+        pipe.hincrby(STATS_KEY, "hits", hits)
+        pipe.hincrby(STATS_KEY, "misses", misses)
+        await pipe.execute()
+    except Exception:
+        pass
+
+
+async def get_stats(db: AsyncSession, *, client: Optional[redis.Redis] = None) -> dict:
+    counters: Dict[str, str] = {}
+    try:
+        counters = await (client or stats_redis).hgetall(STATS_KEY)
+    except Exception:
+        pass
+    hits = int(counters.get("hits", 0))
+    misses = int(counters.get("misses", 0))
+    entries, total_hits = (
+        await db.execute(select(func.count(), func.coalesce(func.sum(DesignRenderCache.hits), 0)).select_from(DesignRenderCache))
+    ).one()
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+        "entries": int(entries),
+        "entry_hits_total": int(total_hits),
+    }
+
+
+async def evict_render_cache(
+    db: AsyncSession,
+    *,
+    max_entries: Optional[int] = None,
+    max_idle_days: Optional[int] = None,
+    store: Optional[AssetStore] = None,
+) -> dict:
+    """Drop entries idle for `max_idle_days` and the least recently hit beyond `max_entries`.
+
+    Stored objects of evicted entries are deleted once no DesignAsset and no
+    remaining cache entry references their content hash. Flushes only.
+    """
+    max_entries = settings.design_cache_max_entries if max_entries is None else max_entries
+    max_idle_days = settings.design_cache_max_idle_days if max_idle_days is None else max_idle_days
+    store = store or get_asset_store()
+
+    cutoff = datetime.utcnow() - timedelta(days=max_idle_days)
+    idle = delete(DesignRenderCache).where(DesignRenderCache.last_hit_at < cutoff)
+    res = await db.execute(idle.returning(DesignRenderCache.content_hash, DesignRenderCache.asset_key))
+    evicted = list(res.all())
+
+    overflow = (
+        select(DesignRenderCache.cache_key)
+        .order_by(DesignRenderCache.last_hit_at.desc())
+        .offset(max_entries)
+        .scalar_subquery()
+    )
+    res = await db.execute(
+        delete(DesignRenderCache)
+        .where(DesignRenderCache.cache_key.in_(overflow))
+        .returning(DesignRenderCache.content_hash, DesignRenderCache.asset_key)
+    )
+    evicted.extend(res.all())
+
+    hashes = {h for h, _ in evicted if h}
+    still_used: set = set()
+    if hashes:
+        res = await db.execute(select(DesignAsset.content_hash).where(DesignAsset.content_hash.in_(hashes)).distinct())
+        still_used.update(res.scalars().all())
+        res = await db.execute(
+            select(DesignRenderCache.content_hash).where(DesignRenderCache.content_hash.in_(hashes)).distinct()
+        )
+        still_used.update(res.scalars().all())
+
+    deleted_objects = 0
+    for digest, original_key in {(h, k) for h, k in evicted if h and k and h not in still_used}:
+        widths = {*settings.asset_variant_widths, settings.asset_thumbnail_width}
+        for key in [original_key, *(asset_key(digest, "webp", variant=f"w{w}") for w in widths)]:
+            await store.delete(key)
+            deleted_objects += 1
+
+    return {"evicted": len(evicted), "deleted_objects": deleted_objects}
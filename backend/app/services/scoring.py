@@ -1,8 +1,9 @@
 from datetime import datetime
-from typing import Tuple
+from typing import List, Sequence, Tuple
 
 from app.schemas import TrendCreate
 from app.scrapers.base import RawListing
+from app.services.keywords import KeywordMatcher, KeywordRule, scoring_matcher
 
 
 def _derive_levels(score: float) -> Tuple[str, str]:
@@ -13,17 +14,9 @@ def _derive_levels(score: float) -> Tuple[str, str]:
     return "low", "low"
 
 
-def score_listing(listing: RawListing) -> TrendCreate:
-    base = 0.5
-    title = listing.title.lower()
-    if "retro" in title or "vintage" in title:
-        base += 0.1
-    if "cat" in title or "dog" in title:
-        base += 0.1
-    if "custom" in title or "personalized" in title:
-        base += 0.05
-
-    score = max(0.0, min(1.0, base))
+def _trend_from_rules(listing: RawListing, matched: Sequence[KeywordRule]) -> TrendCreate:
+    # Keyword weights come from data (see app.services.keywords); each rule group counts once.
+    score = max(0.0, min(1.0, 0.5 + KeywordMatcher.weight_of(matched)))
     demand_level, competition_level = _derive_levels(score)
 
     return TrendCreate(
@@ -38,3 +31,13 @@ def score_listing(listing: RawListing) -> TrendCreate:
         sample_image_url=listing.image_url,
         last_seen=datetime.utcnow(),
     )
+
+
+def score_listing(listing: RawListing) -> TrendCreate:
+    return _trend_from_rules(listing, scoring_matcher().match(listing.title))
+
+
+def score_listings(listings: Sequence[RawListing]) -> List[TrendCreate]:
+    """Batch form of `score_listing`: one regex pass over all titles."""
+    matched = scoring_matcher().match_many([listing.title for listing in listings])
+    return [_trend_from_rules(listing, rules) for listing, rules in zip(listings, matched)]
@@ -0,0 +1,444 @@
+"""Storage layer for `product_snapshots`.
+
+Raw snapshots live in a table range-partitioned by month on `captured_at`. A
+retention job rolls raw rows older than `snapshot_raw_retention_days` into daily
+`SnapshotRollup` buckets, and daily buckets older than
+`snapshot_daily_retention_days` into weekly ones. Rows are moved with a single
+`WITH moved AS (DELETE ... RETURNING ...) INSERT ...` statement, so exactly the
+rows that were rolled up are deleted, even while ingest keeps writing. Fully
+expired partitions are locked before they are rolled up and dropped. Raw +
+daily + weekly never overlap and together cover a product's full history, which
+both `/history` and batch scoring read.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Collection, Dict, List, Optional
+
+from sqlalchemy import select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.core.config import settings
+from app.db.models import ProductSnapshot, SnapshotRollup
+
+log = logging.getLogger(__name__)
+
+SNAPSHOT_TABLE = "product_snapshots"
+ROLLUP_TABLE = "product_snapshot_rollups"
+LEGACY_TABLE = f"{SNAPSHOT_TABLE}_legacy"
+
+# Raised when a new partition's range already has rows in the DEFAULT partition.
+_CHECK_VIOLATION = "23514"
+
+_PARTITION_RE = re.compile(rf"^{SNAPSHOT_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+@dataclass
+class SnapshotPoint:
+    """A raw snapshot or a rollup bucket, shaped like `ProductSnapshot`.
+
+    Rollup points also carry the bucket's rank range and first sales value so
+    `compute_trend_metrics` sees the same extremes it would over raw rows.
+    """
+
+    captured_at: datetime
+    price: float
+    currency: str
+    rank: Optional[int]
+    review_count: Optional[int]
+    rating: Optional[float]
+    estimated_sales: Optional[float]
+    rank_min: Optional[int] = None
+    rank_max: Optional[int] = None
+    sales_first: Optional[float] = None
+    samples: int = 1
+    granularity: str = "raw"  # raw | day | week
+    id: Optional[int] = None  # snapshot id of a raw point
+
+
+def _month_start(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, 1)
+
+
+def _add_months(dt: datetime, months: int) -> datetime:
+    years, month0 = divmod(dt.month - 1 + months, 12)
+    return datetime(dt.year + years, month0 + 1, 1)
+
+
+def partition_name(month_start: datetime) -> str:
+    return f"{SNAPSHOT_TABLE}_y{month_start.year:04d}m{month_start.month:02d}"
+
+
+async def _relkind(conn: AsyncConnection) -> Optional[str]:
+    """`pg_class.relkind` of the snapshot table: "p" partitioned, "r" plain, None if missing or not Postgres."""
+    if conn.dialect.name != "postgresql":
+        return None
+    res = await conn.execute(text("SELECT relkind FROM pg_class WHERE relname = :t"), {"t": SNAPSHOT_TABLE})
+    return res.scalar_one_or_none()
+
+
+async def _is_partitioned(conn: AsyncConnection) -> bool:
+    return await _relkind(conn) == "p"
+
+
+async def ensure_snapshot_partitions(
+    conn: AsyncConnection,
+    *,
+    now: Optional[datetime] = None,
+    months_ahead: Optional[int] = None,
+) -> List[str]:
+    """Create the DEFAULT partition and monthly partitions from this month onward.
+
+    Idempotent; a no-op when the table is not partitioned. `create_all` never
+    converts an existing plain table, so that case is logged (see
+    `convert_to_partitioned`). A month whose range already has rows in the DEFAULT
+    partition is skipped with a warning, since Postgres refuses to create it; those
+    rows are handled by retention instead. Any other DDL error is raised.
+    """
+    relkind = await _relkind(conn)
+    if relkind == "r":
+        log.warning(
+            "%s is not partitioned; run `python manage_snapshots.py partition` to convert it", SNAPSHOT_TABLE
+        )
+    if relkind != "p":
+        return []
+    now = now or datetime.utcnow()
+    if months_ahead is None:
+        months_ahead = settings.snapshot_partition_months_ahead
+
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {SNAPSHOT_TABLE}_default PARTITION OF {SNAPSHOT_TABLE} DEFAULT"))
+
+    ensured: List[str] = []
+    first = _month_start(now)
+    for i in range(months_ahead + 1):
+        lo = _add_months(first, i)
+        hi = _add_months(first, i + 1)
+        name = partition_name(lo)
+        try:
+            async with conn.begin_nested():
+                await conn.execute(
+                    text(
+                        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {SNAPSHOT_TABLE} "
+                        f"FOR VALUES FROM ('{lo.isoformat(sep=' ')}') TO ('{hi.isoformat(sep=' ')}')"
+                    )
+                )
+        except DBAPIError as e:
+            if getattr(e.orig, "sqlstate", None) != _CHECK_VIOLATION:
+                raise
+            log.warning("skipping partition %s: the DEFAULT partition already has rows in its range", name)
+            continue
+        ensured.append(name)
+    return ensured
+
+
+async def convert_to_partitioned(conn: AsyncConnection, *, now: Optional[datetime] = None) -> int:
+    """Rebuild a plain `product_snapshots` table as the partitioned one; returns rows moved.
+
+    For deployments created before partitioning. Runs in the caller's transaction and
+    holds an ACCESS EXCLUSIVE lock on the old table throughout, so ingest writes wait
+    for it. The old table is renamed, the partitioned table created with monthly
+    partitions covering its rows, the rows copied, the id sequence carried over, and
+    the old table dropped. Returns -1 if the table is already partitioned (or missing).
+    """
+    if await _relkind(conn) != "r":
+        return -1
+    await conn.execute(text(f"LOCK TABLE {SNAPSHOT_TABLE} IN ACCESS EXCLUSIVE MODE"))
+    res = await conn.execute(text(f"SELECT min(captured_at) FROM {SNAPSHOT_TABLE}"))
+    oldest = res.scalar_one_or_none()
+
+    # The new table reuses these names, so move them out of the way first.
+    await conn.execute(text(f"ALTER TABLE {SNAPSHOT_TABLE} RENAME TO {LEGACY_TABLE}"))
+    for index in (f"{SNAPSHOT_TABLE}_pkey", "ix_product_snapshots_product_captured"):
+        legacy_index = index.replace(SNAPSHOT_TABLE, LEGACY_TABLE, 1)
+        await conn.execute(text(f"ALTER INDEX IF EXISTS {index} RENAME TO {legacy_index}"))
+    await conn.execute(text(f"ALTER SEQUENCE IF EXISTS {SNAPSHOT_TABLE}_id_seq RENAME TO {LEGACY_TABLE}_id_seq"))
+
+    await conn.run_sync(ProductSnapshot.__table__.create)
+    now = now or datetime.utcnow()
+    start = _month_start(oldest or now)
+    months_back = (now.year - start.year) * 12 + now.month - start.month
+    await ensure_snapshot_partitions(conn, now=start, months_ahead=months_back + settings.snapshot_partition_months_ahead)
+
+    res = await conn.execute(
+        text(f"INSERT INTO {SNAPSHOT_TABLE} ({_RAW_COLUMNS_WITH_ID}) SELECT {_RAW_COLUMNS_WITH_ID} FROM {LEGACY_TABLE}")
+    )
+    moved = res.rowcount
+    await conn.execute(
+        text(
+            f"SELECT setval(pg_get_serial_sequence('{SNAPSHOT_TABLE}', 'id'), "
+            f"(SELECT COALESCE(max(id), 0) + 1 FROM {SNAPSHOT_TABLE}), false)"
+        )
+    )
+    await conn.execute(text(f"DROP TABLE {LEGACY_TABLE}"))
+    return moved
+
+
+async def _expired_partitions(conn: AsyncConnection, cutoff: datetime) -> List[str]:
+    """Monthly partitions whose whole range lies before `cutoff`."""
+    if not await _is_partitioned(conn):
+        return []
+    res = await conn.execute(
+        text(
+            "SELECT c.relname FROM pg_inherits i "
+            "JOIN pg_class c ON c.oid = i.inhrelid "
+            "JOIN pg_class p ON p.oid = i.inhparent "
+            "WHERE p.relname = :t"
+        ),
+        {"t": SNAPSHOT_TABLE},
+    )
+    expired: List[str] = []
+    for name in res.scalars().all():
+        m = _PARTITION_RE.match(name)
+        if not m:
+            continue
+        upper = _add_months(datetime(int(m.group(1)), int(m.group(2)), 1), 1)
+        if upper <= cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+_ROLLUP_COLUMNS = (
+    "product_id, granularity, bucket_start, last_captured_at, samples, currency, "
+    "price_min, price_max, price_avg, price_last, rank_min, rank_max, rank_last, "
+    "review_count_last, rating_last, sales_first, sales_last"
+)
+
+# Merging (rather than overwriting) keeps the job safe to re-run and lets
+# late-arriving snapshots for an already rolled-up bucket fold in correctly.
+_ROLLUP_MERGE = f"""
+ON CONFLICT (product_id, granularity, bucket_start) DO UPDATE SET
+    samples = r.samples + EXCLUDED.samples,
+    price_min = LEAST(r.price_min, EXCLUDED.price_min),
+    price_max = GREATEST(r.price_max, EXCLUDED.price_max),
+    price_avg = (r.price_avg * r.samples + EXCLUDED.price_avg * EXCLUDED.samples) / (r.samples + EXCLUDED.samples),
+    rank_min = LEAST(r.rank_min, EXCLUDED.rank_min),
+    rank_max = GREATEST(r.rank_max, EXCLUDED.rank_max),
+    currency = CASE WHEN EXCLUDED.last_captured_at >= r.last_captured_at THEN EXCLUDED.currency ELSE r.currency END,
+    price_last = CASE WHEN EXCLUDED.last_captured_at >= r.last_captured_at THEN EXCLUDED.price_last ELSE r.price_last END,
+    rank_last = CASE WHEN EXCLUDED.last_captured_at >= r.last_captured_at THEN EXCLUDED.rank_last ELSE r.rank_last END,
+    review_count_last = CASE WHEN EXCLUDED.last_captured_at >= r.last_captured_at
+        THEN EXCLUDED.review_count_last ELSE r.review_count_last END,
+    rating_last = CASE WHEN EXCLUDED.last_captured_at >= r.last_captured_at THEN EXCLUDED.rating_last ELSE r.rating_last END,
+    sales_first = COALESCE(r.sales_first, EXCLUDED.sales_first),
+    sales_last = CASE WHEN EXCLUDED.last_captured_at >= r.last_captured_at
+        THEN COALESCE(EXCLUDED.sales_last, r.sales_last) ELSE COALESCE(r.sales_last, EXCLUDED.sales_last) END,
+    last_captured_at = GREATEST(r.last_captured_at, EXCLUDED.last_captured_at)
+"""
+
+_RAW_COLUMNS = "product_id, captured_at, currency, price, rank, review_count, rating, estimated_sales"
+_RAW_COLUMNS_WITH_ID = f"id, {_RAW_COLUMNS}"
+
+_RAW_TO_DAILY_SELECT = """
+SELECT
+    product_id,
+    'day',
+    date_trunc('day', captured_at),
+    max(captured_at),
+    count(*),
+    (array_agg(currency ORDER BY captured_at DESC))[1],
+    min(price),
+    max(price),
+    avg(price),
+    (array_agg(price ORDER BY captured_at DESC))[1],
+    min(rank),
+    max(rank),
+    (array_agg(rank ORDER BY captured_at DESC))[1],
+    (array_agg(review_count ORDER BY captured_at DESC))[1],
+    (array_agg(rating ORDER BY captured_at DESC))[1],
+    (array_agg(estimated_sales ORDER BY captured_at) FILTER (WHERE estimated_sales IS NOT NULL))[1],
+    (array_agg(estimated_sales ORDER BY captured_at DESC) FILTER (WHERE estimated_sales IS NOT NULL))[1]
+FROM {source}
+GROUP BY product_id, date_trunc('day', captured_at)
+"""
+
+_DAILY_TO_WEEKLY_SELECT = """
+SELECT
+    product_id,
+    'week',
+    date_trunc('week', bucket_start),
+    max(last_captured_at),
+    sum(samples),
+    (array_agg(currency ORDER BY bucket_start DESC))[1],
+    min(price_min),
+    max(price_max),
+    sum(price_avg * samples) / sum(samples),
+    (array_agg(price_last ORDER BY bucket_start DESC))[1],
+    min(rank_min),
+    max(rank_max),
+    (array_agg(rank_last ORDER BY bucket_start DESC))[1],
+    (array_agg(review_count_last ORDER BY bucket_start DESC))[1],
+    (array_agg(rating_last ORDER BY bucket_start DESC))[1],
+    (array_agg(sales_first ORDER BY bucket_start) FILTER (WHERE sales_first IS NOT NULL))[1],
+    (array_agg(sales_last ORDER BY bucket_start DESC) FILTER (WHERE sales_last IS NOT NULL))[1]
+FROM {source}
+GROUP BY product_id, date_trunc('week', bucket_start)
+"""
+
+# One statement, one snapshot: the INSERT aggregates exactly the rows the DELETE removed.
+_MOVE_RAW_TO_DAILY = f"""
+WITH moved AS (
+    DELETE FROM {SNAPSHOT_TABLE} WHERE captured_at < :cutoff RETURNING {_RAW_COLUMNS}
+), ins AS (
+    INSERT INTO {ROLLUP_TABLE} AS r ({_ROLLUP_COLUMNS})
+    {_RAW_TO_DAILY_SELECT.format(source="moved")}
+    {_ROLLUP_MERGE}
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM moved), (SELECT count(*) FROM ins)
+"""
+
+_MOVE_DAILY_TO_WEEKLY = f"""
+WITH moved AS (
+    DELETE FROM {ROLLUP_TABLE} WHERE granularity = 'day' AND bucket_start < :cutoff RETURNING *
+), ins AS (
+    INSERT INTO {ROLLUP_TABLE} AS r ({_ROLLUP_COLUMNS})
+    {_DAILY_TO_WEEKLY_SELECT.format(source="moved")}
+    {_ROLLUP_MERGE}
+    RETURNING 1
+)
+SELECT (SELECT count(*) FROM moved), (SELECT count(*) FROM ins)
+"""
+
+
+def _day_floor(dt: datetime) -> datetime:
+    return datetime(dt.year, dt.month, dt.day)
+
+
+async def apply_snapshot_retention(db: AsyncSession, *, now: Optional[datetime] = None) -> Dict[str, int]:
+    """Roll raw snapshots into daily buckets and daily buckets into weekly ones.
+
+    Only whole days / weeks are rolled up. Fully expired monthly partitions are
+    locked (blocking late inserts into them), rolled up and dropped rather than
+    deleted row by row. Does not commit; run it in one transaction.
+    """
+    now = now or datetime.utcnow()
+    raw_cutoff = _day_floor(now - timedelta(days=settings.snapshot_raw_retention_days))
+    daily_cutoff = _day_floor(now - timedelta(days=settings.snapshot_daily_retention_days))
+    daily_cutoff -= timedelta(days=daily_cutoff.weekday())  # Monday, matching date_trunc('week')
+
+    conn = await db.connection()
+    daily_buckets = 0
+    expired = await _expired_partitions(conn, raw_cutoff)
+    for name in expired:
+        # Once locked no insert can land in the partition, so the rollup sees every row.
+        await conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        res = await conn.execute(
+            text(
+                f"INSERT INTO {ROLLUP_TABLE} AS r ({_ROLLUP_COLUMNS}) "
+                f"{_RAW_TO_DAILY_SELECT.format(source=name)} {_ROLLUP_MERGE}"
+            )
+        )
+        daily_buckets += res.rowcount or 0
+        await conn.execute(text(f"DROP TABLE {name}"))
+
+    res = await db.execute(text(_MOVE_RAW_TO_DAILY), {"cutoff": raw_cutoff})
+    raw_deleted, moved_buckets = res.one()
+    res = await db.execute(text(_MOVE_DAILY_TO_WEEKLY), {"cutoff": daily_cutoff})
+    daily_deleted, weekly_buckets = res.one()
+
+    return {
+        "daily_buckets": daily_buckets + moved_buckets,
+        "weekly_buckets": weekly_buckets,
+        "raw_rows_deleted": raw_deleted,
+        "partitions_dropped": len(expired),
+        "daily_buckets_deleted": daily_deleted,
+    }
+
+
+def _point_from_snapshot(s: ProductSnapshot) -> SnapshotPoint:
+    return SnapshotPoint(
+        captured_at=s.captured_at,
+        price=s.price,
+        currency=s.currency,
+        rank=s.rank,
+        review_count=s.review_count,
+        rating=s.rating,
+        estimated_sales=s.estimated_sales,
+        id=s.id,
+    )
+
+
+def _point_from_rollup(r: SnapshotRollup) -> SnapshotPoint:
+    return SnapshotPoint(
+        captured_at=r.last_captured_at,
+        price=r.price_last,
+        currency=r.currency,
+        rank=r.rank_last,
+        review_count=r.review_count_last,
+        rating=r.rating_last,
+        estimated_sales=r.sales_last,
+        rank_min=r.rank_min,
+        rank_max=r.rank_max,
+        sales_first=r.sales_first,
+        samples=r.samples,
+        granularity=r.granularity,
+    )
+
+
+async def load_snapshot_history(
+    db: AsyncSession,
+    product_id: int,
+    *,
+    since: Optional[datetime] = None,
+    now: Optional[datetime] = None,
+) -> List[SnapshotPoint]:
+    """Return a product's history since `since` (all history when None), oldest first.
+
+    Windows that fit inside raw retention read only raw rows via the
+    `(product_id, captured_at)` index. Longer windows add the daily/weekly rollups
+    for the part of history whose raw rows have been rolled up.
+    """
+    now = now or datetime.utcnow()
+
+    raw_stmt = select(ProductSnapshot).where(ProductSnapshot.product_id == product_id)
+    if since is not None:
+        raw_stmt = raw_stmt.where(ProductSnapshot.captured_at >= since)
+    raw_res = await db.execute(raw_stmt.order_by(ProductSnapshot.captured_at))
+    points = [_point_from_snapshot(s) for s in raw_res.scalars().all()]
+
+    raw_horizon = now - timedelta(days=settings.snapshot_raw_retention_days)
+    if since is not None and since >= raw_horizon:
+        return points
+
+    rollup_stmt = select(SnapshotRollup).where(SnapshotRollup.product_id == product_id)
+    if since is not None:
+        rollup_stmt = rollup_stmt.where(SnapshotRollup.last_captured_at >= since)
+    rollup_res = await db.execute(rollup_stmt.order_by(SnapshotRollup.bucket_start))
+    rolled = [_point_from_rollup(r) for r in rollup_res.scalars().all()]
+
+    return sorted(rolled + points, key=lambda p: p.captured_at)
+
+
+async def load_snapshot_histories(
+    db: AsyncSession,
+    product_ids: Collection[int],
+    *,
+    exclude_snapshot_ids: Collection[int] = (),
+) -> Dict[int, List[SnapshotPoint]]:
+    """Full history (raw rows plus rollups) of several products, oldest first, in two queries.
+
+    Ordered like `load_snapshot_history`. Raw rows in `exclude_snapshot_ids` are left out.
+    """
+    if not product_ids:
+        return {}
+    raw_stmt = select(ProductSnapshot).where(ProductSnapshot.product_id.in_(product_ids))
+    if exclude_snapshot_ids:
+        raw_stmt = raw_stmt.where(ProductSnapshot.id.not_in(exclude_snapshot_ids))
+    raw_res = await db.execute(raw_stmt.order_by(ProductSnapshot.product_id, ProductSnapshot.captured_at))
+    rollup_res = await db.execute(
+        select(SnapshotRollup)
+        .where(SnapshotRollup.product_id.in_(product_ids))
+        .order_by(SnapshotRollup.product_id, SnapshotRollup.bucket_start)
+    )
+
+    histories: Dict[int, List[SnapshotPoint]] = {}
+    for r in rollup_res.scalars().all():
+        histories.setdefault(r.product_id, []).append(_point_from_rollup(r))
+    for s in raw_res.scalars().all():
+        histories.setdefault(s.product_id, []).append(_point_from_snapshot(s))
+    return {pid: sorted(points, key=lambda p: p.captured_at) for pid, points in histories.items()}
@@ -0,0 +1,205 @@
+"""Precomputed trend-item aggregates for the analytics endpoints.
+
+`trend_item_rollups` holds counts and score sums per (day, source, niche), and
+`trend_score_histogram` holds per-bucket counts for the same keys. The analytics
+queries only read these tables, so they cost the same whatever the size of
+`trend_items`.
+
+Maintenance is incremental. After an ingest (which also writes AI scores),
+`refresh_trend_rollups(db, item_ids=...)` recomputes only the (day range,
+source) slice those items fall in. It deletes that slice and re-aggregates it
+from `trend_items`, so the rollups are exact rather than accumulated deltas
+that could drift. The ingest runs it in its own transaction after the items
+commit, so a failed refresh never costs the items. A transaction-level advisory lock
+serializes overlapping refreshes. `full=True` rebuilds everything (nightly
+self-heal).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, func, insert, literal, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models import CanonicalNiche, TrendItem, TrendItemRollup, TrendScoreHistogram
+from app.services.niches import normalize_niche
+
+HISTOGRAM_BUCKETS = 10
+_LOCK_KEY = 0x7472_6F6C  # pg_advisory_xact_lock key for rollup refreshes
+
+# Grouping expressions over trend_items (outer-joined to canonical_niches); an expression
+# index backs ROLLUP_DAY. Items not yet canonicalized group by their lowercased raw niche.
+ROLLUP_DAY = func.date(func.coalesce(TrendItem.published_at, TrendItem.created_at))
+ROLLUP_NICHE = func.coalesce(CanonicalNiche.slug, func.lower(func.trim(TrendItem.ai_niche)), literal_column("''"))
+_ROLLUP_SOURCE = TrendItem.__table__.outerjoin(CanonicalNiche.__table__, TrendItem.niche_id == CanonicalNiche.id)
+# Constants are inlined (not bound) so the GROUP BY expressions match the select list exactly.
+SCORE_BUCKET = func.least(TrendItem.ai_score_0_100 // literal_column("10"), literal_column(str(HISTOGRAM_BUCKETS - 1)))
+
+
+async def refresh_trend_rollups(
+    db: AsyncSession, *, item_ids: Optional[Sequence[int]] = None, full: bool = False
+) -> Dict[str, int]:
+    """Recompute the rollup slice covering `item_ids` (or everything with `full`). Flushes only."""
+    item_cond = None
+    rollup_cond = hist_cond = None
+    if not full:
+        if not item_ids:
+            return {"days": 0, "groups": 0}
+        res = await db.execute(
+            select(func.min(ROLLUP_DAY), func.max(ROLLUP_DAY), func.array_agg(func.distinct(TrendItem.source))).where(
+                TrendItem.id.in_(list(item_ids))
+            )
+        )
+        first_day, last_day, sources = res.one()
+        if first_day is None:
+            return {"days": 0, "groups": 0}
+        item_cond = and_(ROLLUP_DAY.between(first_day, last_day), TrendItem.source.in_(sources))
+        rollup_cond = and_(TrendItemRollup.day.between(first_day, last_day), TrendItemRollup.source.in_(sources))
+        hist_cond = and_(TrendScoreHistogram.day.between(first_day, last_day), TrendScoreHistogram.source.in_(sources))
+
+    await db.execute(select(func.pg_advisory_xact_lock(_LOCK_KEY)))
+
+    del_rollups = delete(TrendItemRollup)
+    del_hist = delete(TrendScoreHistogram)
+    if not full:
+        del_rollups = del_rollups.where(rollup_cond)
+        del_hist = del_hist.where(hist_cond)
+    await db.execute(del_rollups)
+    await db.execute(del_hist)
+
+    day, niche = ROLLUP_DAY.label("day"), ROLLUP_NICHE.label("niche")
+    agg = select(
+        day,
+        TrendItem.source,
+        niche,
+        func.count(),
+        func.count(TrendItem.ai_score_0_100),
+        func.coalesce(func.sum(TrendItem.ai_score_0_100), 0),
+        func.min(TrendItem.ai_score_0_100),
+        func.max(TrendItem.ai_score_0_100),
+        literal(datetime.utcnow()),
+    ).select_from(_ROLLUP_SOURCE).group_by(day, TrendItem.source, niche)
+    if item_cond is not None:
+        agg = agg.where(item_cond)
+    res = await db.execute(
+        insert(TrendItemRollup)
+        .from_select(
+            ["day", "source", "niche", "items", "scored", "score_sum", "score_min", "score_max", "updated_at"], agg
+        )
+        .returning(TrendItemRollup.day)
+    )
+    group_days = [d for (d,) in res.all()]
+
+    bucket = SCORE_BUCKET.label("bucket")
+    hist = (
+        select(day, TrendItem.source, niche, bucket, func.count())
+        .select_from(_ROLLUP_SOURCE)
+        .where(TrendItem.ai_score_0_100.is_not(None))
+        .group_by(day, TrendItem.source, niche, bucket)
+    )
+    if item_cond is not None:
+        hist = hist.where(item_cond)
+    await db.execute(insert(TrendScoreHistogram).from_select(["day", "source", "niche", "bucket", "items"], hist))
+    await db.flush()
+    return {"days": len(set(group_days)), "groups": len(group_days)}
+
+
+# -- read side (rollups only) ------------------------------------------------
+
+
+@dataclass
+class NicheStat:
+    niche: str
+    items: int
+    scored: int
+    avg_score: Optional[float]
+    max_score: Optional[int]
+
+
+@dataclass
+class DailyCount:
+    day: date
+    source: str
+    items: int
+    scored: int
+    avg_score: Optional[float]
+
+
+def _window(stmt, model, since: date, until: Optional[date], source: Optional[str]):
+    stmt = stmt.where(model.day >= since)
+    if until is not None:
+        stmt = stmt.where(model.day < until)
+    if source:
+        stmt = stmt.where(model.source == source)
+    return stmt
+
+
+async def top_niches(
+    db: AsyncSession,
+    *,
+    since: date,
+    until: Optional[date] = None,
+    source: Optional[str] = None,
+    limit: int = 20,
+    min_scored: int = 3,
+) -> List[NicheStat]:
+    """Niches ranked by average AI score; niches with fewer than `min_scored` scored items are skipped."""
+    scored = func.sum(TrendItemRollup.scored)
+    avg = func.sum(TrendItemRollup.score_sum) / func.nullif(scored, 0)
+    stmt = (
+        select(TrendItemRollup.niche, func.sum(TrendItemRollup.items), scored, avg, func.max(TrendItemRollup.score_max))
+        .where(TrendItemRollup.niche != "")
+        .group_by(TrendItemRollup.niche)
+        .having(scored >= min_scored)
+        .order_by(avg.desc(), scored.desc())
+        .limit(limit)
+    )
+    res = await db.execute(_window(stmt, TrendItemRollup, since, until, source))
+    return [
+        NicheStat(niche=n, items=int(items), scored=int(s), avg_score=float(a) if a is not None else None, max_score=m)
+        for n, items, s, a, m in res.all()
+    ]
+
+
+async def daily_counts(
+    db: AsyncSession, *, since: date, until: Optional[date] = None, source: Optional[str] = None
+) -> List[DailyCount]:
+    scored = func.sum(TrendItemRollup.scored)
+    stmt = (
+        select(
+            TrendItemRollup.day,
+            TrendItemRollup.source,
+            func.sum(TrendItemRollup.items),
+            scored,
+            func.sum(TrendItemRollup.score_sum) / func.nullif(scored, 0),
+        )
+        .group_by(TrendItemRollup.day, TrendItemRollup.source)
+        .order_by(TrendItemRollup.day, TrendItemRollup.source)
+    )
+    res = await db.execute(_window(stmt, TrendItemRollup, since, until, source))
+    return [
+        DailyCount(day=d, source=src, items=int(items), scored=int(s), avg_score=float(a) if a is not None else None)
+        for d, src, items, s, a in res.all()
+    ]
+
+
+async def score_histogram(
+    db: AsyncSession,
+    *,
+    since: date,
+    until: Optional[date] = None,
+    source: Optional[str] = None,
+    niche: Optional[str] = None,
+) -> List[int]:
+    """Scored-item counts for buckets 0-9, 10-19, ... 90-100."""
+    stmt = select(TrendScoreHistogram.bucket, func.sum(TrendScoreHistogram.items)).group_by(TrendScoreHistogram.bucket)
+    if niche:
+        stmt = stmt.where(TrendScoreHistogram.niche.in_({normalize_niche(niche), niche.strip().lower()}))
+    res = await db.execute(_window(stmt, TrendScoreHistogram, since, until, source))
+    counts = [0] * HISTOGRAM_BUCKETS
+    for b, n in res.all():
+        counts[int(b)] = int(n)
+    return counts
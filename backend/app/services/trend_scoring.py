@@ -1,9 +1,11 @@
 from __future__ import annotations
 
+import math
 from dataclasses import dataclass
-from typing import Optional, Sequence
+from typing import List, Optional, Sequence, Union
 
 from app.db.models import ProductSnapshot
+from app.services.snapshot_storage import SnapshotPoint
 
 
 @dataclass
@@ -14,21 +16,36 @@ class TrendMetrics:
     momentum_score: Optional[float]
 
 
-def _normalize(value: float, min_val: float, max_val: float) -> float:
+def normalize(value: float, min_val: float, max_val: float) -> float:
     if max_val == min_val:
         return 0.0
     return max(0.0, min(1.0, (value - min_val) / (max_val - min_val)))
 
 
-def compute_trend_metrics(history: Sequence[ProductSnapshot]) -> TrendMetrics:
+def compute_trend_metrics(history: Sequence[Union[ProductSnapshot, SnapshotPoint]]) -> TrendMetrics:
+    """Score a product from its snapshot history.
+
+    Accepts raw `ProductSnapshot` rows or the `SnapshotPoint`s returned by
+    `load_snapshot_history`, whose rollup points carry the bucket's rank range and
+    first sales value.
+    """
     if not history:
         return TrendMetrics(0.0, 0.0, 0.0, None)
 
-    history = sorted(history, key=lambda s: s.captured_at)
+    if any(history[i].captured_at > history[i + 1].captured_at for i in range(len(history) - 1)):
+        history = sorted(history, key=lambda s: s.captured_at)
     latest = history[-1]
 
-    ranks = [s.rank for s in history if s.rank is not None]
-    sales = [s.estimated_sales for s in history if s.estimated_sales is not None]
+    ranks: List[int] = []
+    for s in history:
+        for r in (s.rank, getattr(s, "rank_min", None), getattr(s, "rank_max", None)):
+            if r is not None:
+                ranks.append(r)
+    sales_points = [s for s in history if s.estimated_sales is not None]
+    sales = [s.estimated_sales for s in sales_points]
+    first_sales = sales[0] if sales else None
+    if sales and getattr(sales_points[0], "sales_first", None) is not None:
+        first_sales = sales_points[0].sales_first
 
     demand_raw = 0.0
     if sales:
@@ -38,7 +55,6 @@ def compute_trend_metrics(history: Sequence[ProductSnapshot]) -> TrendMetrics:
 
     demand_score = 0.0
     if demand_raw > 0:
-        import math
         demand_score = max(0.0, min(1.0, math.log1p(demand_raw) / 10))
 
     competition_score = 0.0
@@ -47,13 +63,13 @@ def compute_trend_metrics(history: Sequence[ProductSnapshot]) -> TrendMetrics:
         worst_rank = max(ranks)
         if latest.rank is not None:
             inv_rank = worst_rank - latest.rank
-            competition_score = _normalize(inv_rank, 0, worst_rank - best_rank if worst_rank != best_rank else 1)
+            competition_score = normalize(inv_rank, 0, worst_rank - best_rank if worst_rank != best_rank else 1)
 
     momentum_score: Optional[float] = None
     if len(sales) >= 2:
-        diff = sales[-1] - sales[0]
-        if sales[0] > 0:
-            momentum_score = max(-1.0, min(1.0, diff / sales[0]))
+        diff = sales[-1] - first_sales
+        if first_sales > 0:
+            momentum_score = max(-1.0, min(1.0, diff / first_sales))
 
     overall = 0.6 * demand_score + 0.3 * (1 - competition_score) + 0.1 * (momentum_score or 0)
 
@@ -0,0 +1,183 @@
+"""Incremental (streaming) trend metrics.
+
+`ProductTrendState` keeps just enough per product -- rank range, latest rank and
+review count, first/last sales with their timestamps -- to reproduce
+`compute_trend_metrics` exactly, so scoring cost depends on the number of new
+snapshots rather than on history length. Snapshots may arrive out of order; only
+an EWMA of per-step sales momentum (an extra signal, not part of `TrendMetrics`)
+is order-sensitive.
+
+A product's state is seeded from its existing history (raw rows plus rollups)
+the first time it is touched, so products that predate the states score the
+same as `compute_trend_metrics` over their whole history.
+"""
+
+from __future__ import annotations
+
+import math
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Union
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.models import ProductSnapshot, ProductTrendState, TrendScore
+from app.services.snapshot_storage import SnapshotPoint, load_snapshot_histories
+from app.services.trend_scoring import TrendMetrics, normalize
+
+
+def update_state(
+    state: ProductTrendState, snap: Union[ProductSnapshot, SnapshotPoint], *, alpha: Optional[float] = None
+) -> None:
+    """Fold one snapshot (or rollup point from `load_snapshot_histories`) into `state` in O(1)."""
+    alpha = settings.trend_momentum_ewma_alpha if alpha is None else alpha
+    at = snap.captured_at
+
+    state.snapshot_count = (state.snapshot_count or 0) + 1
+
+    # Ties go to the later arrival, matching the stable sort in compute_trend_metrics.
+    if state.last_captured_at is None or at >= state.last_captured_at:
+        state.last_captured_at = at
+        state.last_snapshot_id = snap.id
+        state.latest_rank = snap.rank
+        state.latest_review_count = snap.review_count
+
+    for rank in (snap.rank, getattr(snap, "rank_min", None), getattr(snap, "rank_max", None)):
+        if rank is not None:
+            state.min_rank = rank if state.min_rank is None else min(state.min_rank, rank)
+            state.max_rank = rank if state.max_rank is None else max(state.max_rank, rank)
+
+    sales = snap.estimated_sales
+    if sales is None:
+        return
+    state.sales_count = (state.sales_count or 0) + 1
+    if state.first_sales_at is None or at < state.first_sales_at:
+        first = getattr(snap, "sales_first", None)
+        state.first_sales = sales if first is None else first
+        state.first_sales_at = at
+    if state.last_sales_at is None or at >= state.last_sales_at:
+        prev = state.last_sales
+        state.last_sales = sales
+        state.last_sales_at = at
+        if prev is not None and prev > 0:
+            step = max(-1.0, min(1.0, (sales - prev) / prev))
+            ewma = state.ewma_momentum
+            state.ewma_momentum = step if ewma is None else alpha * step + (1 - alpha) * ewma
+
+
+def state_to_metrics(state: ProductTrendState) -> TrendMetrics:
+    """Same result as `compute_trend_metrics` over every snapshot folded into `state`."""
+    if not state.snapshot_count:
+        return TrendMetrics(0.0, 0.0, 0.0, None)
+
+    demand_raw = 0.0
+    if state.sales_count:
+        demand_raw += state.last_sales
+    if state.latest_review_count:
+        demand_raw += state.latest_review_count
+
+    demand_score = 0.0
+    if demand_raw > 0:
+        demand_score = max(0.0, min(1.0, math.log1p(demand_raw) / 10))
+
+    competition_score = 0.0
+    if state.min_rank is not None and state.latest_rank is not None:
+        best_rank, worst_rank = state.min_rank, state.max_rank
+        inv_rank = worst_rank - state.latest_rank
+        competition_score = normalize(inv_rank, 0, worst_rank - best_rank if worst_rank != best_rank else 1)
+
+    momentum_score: Optional[float] = None
+    if state.sales_count >= 2 and state.first_sales > 0:
+        momentum_score = max(-1.0, min(1.0, (state.last_sales - state.first_sales) / state.first_sales))
+
+    overall = 0.6 * demand_score + 0.3 * (1 - competition_score) + 0.1 * (momentum_score or 0)
+    return TrendMetrics(
+        overall_score=overall,
+        demand_score=demand_score,
+        competition_score=competition_score,
+        momentum_score=momentum_score,
+    )
+
+
+async def apply_snapshots(db: AsyncSession, snapshots: Iterable[ProductSnapshot]) -> Dict[int, ProductTrendState]:
+    """Fold new snapshots into their products' persisted states. Does not commit.
+
+    Concurrent ingests may touch the same products: missing states are created with
+    ON CONFLICT DO NOTHING, and the rows are then locked (in product_id order, so
+    two writers cannot deadlock) until the caller commits. A state this call
+    creates is first seeded with the product's earlier history.
+    """
+    by_product: Dict[int, List[ProductSnapshot]] = defaultdict(list)
+    for snap in snapshots:
+        by_product[snap.product_id].append(snap)
+    if not by_product:
+        return {}
+
+    product_ids = sorted(by_product)
+    res = await db.execute(
+        pg_insert(ProductTrendState)
+        .values([{"product_id": pid, "snapshot_count": 0, "sales_count": 0} for pid in product_ids])
+        .on_conflict_do_nothing(index_elements=["product_id"])
+        .returning(ProductTrendState.product_id)
+    )
+    created = res.scalars().all()
+    res = await db.execute(
+        select(ProductTrendState)
+        .where(ProductTrendState.product_id.in_(product_ids))
+        .order_by(ProductTrendState.product_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    states = {s.product_id: s for s in res.scalars().all()}
+
+    new_ids = [snap.id for snaps in by_product.values() for snap in snaps]
+    histories = await load_snapshot_histories(db, created, exclude_snapshot_ids=new_ids)
+    for product_id, points in histories.items():
+        for point in points:
+            update_state(states[product_id], point)
+
+    for product_id, snaps in by_product.items():
+        state = states[product_id]
+        for snap in sorted(snaps, key=lambda s: s.captured_at):
+            update_state(state, snap)
+
+    await db.flush()
+    return states
+
+
+async def score_new_snapshots(
+    db: AsyncSession,
+    snapshots: Iterable[ProductSnapshot],
+    *,
+    niches: Optional[Dict[int, Optional[str]]] = None,
+) -> Dict[int, TrendMetrics]:
+    """Update incremental state for `snapshots` and insert a `TrendScore` per touched product.
+
+    Snapshots must already be flushed (they need ids). Does not commit.
+    """
+    states = await apply_snapshots(db, snapshots)
+    if not states:
+        return {}
+
+    now = datetime.utcnow()
+    metrics = {pid: state_to_metrics(state) for pid, state in states.items()}
+    await db.execute(
+        insert(TrendScore),
+        [
+            {
+                "product_id": pid,
+                "snapshot_id": states[pid].last_snapshot_id,
+                "overall_score": m.overall_score,
+                "demand_score": m.demand_score,
+                "competition_score": m.competition_score,
+                "momentum_score": m.momentum_score,
+                "niche": (niches or {}).get(pid),
+                "created_at": now,
+            }
+            for pid, m in metrics.items()
+        ],
+    )
+    return metrics
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import List
+
+from app.core.celery_app import celery_app
+from app.core.events import publish_event
+from app.core.worker_runtime import runtime
+from app.services.asset_pipeline import AssetPipeline, StoredAsset
+from app.services.design_generation import DesignRequest, load_pending_designs, mark_design_failed, mark_design_ready
+from app.services.render_cache import lookup_renders, record_stats, render_cache_key, store_renders
+from app.services.renderers import RenderResult, get_renderer, render_many
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="render_designs")
+def render_designs_task(*, asset_ids: List[int]) -> dict:
+    """Render pending DesignAssets and publish `design_completed` per asset."""
+    return runtime.run(_render_designs_async(asset_ids=asset_ids))
+
+
+async def _render_designs_async(*, asset_ids: List[int]) -> dict:
+    renderer = get_renderer(client=runtime.http)
+    async with runtime.sessionmaker() as db:
+        assets = await load_pending_designs(db, asset_ids)
+        reqs = [DesignRequest(prompt=a.prompt, negative_prompt=a.negative_prompt) for a in assets]
+        keys = [render_cache_key(req, renderer.name) for req in reqs]
+        # Another job may have rendered the same request since this one was queued.
+        hits = await lookup_renders(db, keys)
+        # Release the connection while renders are in flight.
+        await db.commit()
+        n_hits = sum(key in hits for key in keys)
+        await record_stats(n_hits, len(keys) - n_hits, client=runtime.redis)
+
+        # Render each distinct request once, then fan the result out to every asset.
+        todo = {key: req for key, req in zip(keys, reqs) if key not in hits}
+        results = dict(zip(todo, await render_many(renderer, list(todo.values()))))
+
+        pipeline = AssetPipeline(http_client=runtime.http)
+        stored = dict(
+            zip(
+                results,
+                await asyncio.gather(
+                    *(_store(pipeline, r) if isinstance(r, RenderResult) else _noop() for r in results.values())
+                ),
+            )
+        )
+        await store_renders(
+            db,
+            [
+                {
+                    "cache_key": key,
+                    "renderer": renderer.name,
+                    "prompt": todo[key].prompt,
+                    "image_url": kept.image_url,
+                    "thumbnail_url": kept.thumbnail_url,
+                    "content_hash": kept.content_hash,
+                    "asset_key": kept.key,
+                }
+                for key, kept in stored.items()
+                if kept is not None
+            ],
+        )
+
+        ready = 0
+        failed = 0
+        for asset, key in zip(assets, keys):
+            result = hits.get(key) or results[key]
+            kept = stored.get(key)
+            if isinstance(result, BaseException):
+                await mark_design_failed(db, asset.id, error=str(result) or type(result).__name__)
+                event = {"type": "design_completed", "design_id": asset.id, "product_id": asset.product_id, "status": "failed"}
+                failed += 1
+            else:
+                image_url = kept.image_url if kept else result.image_url
+                thumb = kept.thumbnail_url if kept else result.thumbnail_url
+                content_hash = kept.content_hash if kept else getattr(result, "content_hash", None)
+                await mark_design_ready(db, asset.id, image_url=image_url, thumbnail_url=thumb, content_hash=content_hash)
+                event = {
+                    "type": "design_completed",
+                    "design_id": asset.id,
+                    "product_id": asset.product_id,
+                    "status": "ready",
+                    "image_url": image_url,
+                    "thumbnail_url": thumb,
+                }
+                ready += 1
+            await db.commit()
+            await publish_event(event, client=runtime.redis)
+
+    return {
+        "requested": len(asset_ids),
+        "rendered": len(results),
+        "reused": len(assets) - len(results),
+        "ready": ready,
+        "failed": failed,
+    }
+
+
+async def _noop() -> None:
+    return None
+
+
+async def _store(pipeline: AssetPipeline, result: RenderResult) -> StoredAsset | None:
+    """Store the render in asset storage; on failure keep the renderer's own URLs."""
+    try:
+        if result.image_bytes is not None:
+            return await pipeline.store_image(data=result.image_bytes)
+        if result.image_url and result.image_url.startswith(("http://", "https://")):
+            return await pipeline.store_image(url=result.image_url)
+    except Exception:  # noqa: BLE001
+        logger.warning("asset storage failed for %s", result.image_url, exc_info=True)
+    return None
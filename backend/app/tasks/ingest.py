@@ -1,54 +1,62 @@
 from __future__ import annotations
 
 import json
-from typing import List
-
-import asyncio
+import logging
+from functools import partial
+from typing import List, Optional
 
 from app.core.celery_app import celery_app
 from app.core.config import settings
+from app.core.events import publish_event
+from app.core.progress import ProgressReporter
+from app.core.worker_runtime import runtime
 from app.crud.trend_item import set_ai_fields, set_ai_failure, upsert_trend_item
-from app.db.session import AsyncSessionLocal
-from app.services.ai import score_trend_item_with_ai
-
-import redis
-
-CHANNEL = "trend_events"
-
-def publish_event(event: dict):
-    try:
-        r = redis.from_url(settings.redis_url, decode_responses=True)
-        r.publish(CHANNEL, json.dumps(event, default=str))
-        r.close()
-    except Exception:
-        pass
-
+from app.services.ai import OpenAIResponsesClient, score_trend_item_with_ai
+from app.services.embeddings import OpenAIEmbeddingClient
 from app.services.ingest import fetch_rss, normalize_feed_items
+from app.services.niches import assign_trend_item_niches
+from app.services.trend_rollups import refresh_trend_rollups
+
+logger = logging.getLogger(__name__)
 
 
 @celery_app.task(name="ingest_rss", bind=True)
 def ingest_rss_task(self, *, urls: List[str], max_items_per_feed: int = 25, run_ai: bool = True) -> dict:
     """Celery entrypoint.
 
-    Celery tasks are sync functions; we spin up a small asyncio loop inside.
+    Celery tasks are sync functions; they run on the worker's long-lived event loop
+    (see app.core.worker_runtime) so the DB pool and HTTP/Redis clients are reused.
     """
 
-    return asyncio.run(_ingest_rss_async(urls=urls, max_items_per_feed=max_items_per_feed, run_ai=run_ai))
+    return runtime.run(
+        _ingest_rss_async(urls=urls, max_items_per_feed=max_items_per_feed, run_ai=run_ai, run_id=self.request.id)
+    )
 
 
-async def _ingest_rss_async(*, urls: List[str], max_items_per_feed: int, run_ai: bool) -> dict:
-    publish_event({"type":"ingest_started","feeds":len(urls)})
+async def _ingest_rss_async(
+    *, urls: List[str], max_items_per_feed: int, run_ai: bool, run_id: Optional[str] = None
+) -> dict:
+    publish = partial(publish_event, client=runtime.redis)
+    await publish({"type": "ingest_started", "run_id": run_id, "feeds": len(urls)})
     created = 0
     updated = 0
     scored = 0
+    ai_failed = 0
     errors: list[str] = []
-
-    async with AsyncSessionLocal() as db:
-        for url in urls:
+    touched: list[int] = []
+    scored_items: list = []
+    ai_client = OpenAIResponsesClient(http_client=runtime.http)
+    # Per-item updates; the reporter coalesces them to REALTIME_PROGRESS_INTERVAL_S.
+    progress = ProgressReporter("ingest_progress", publish, run_id=run_id, stage="fetching", feeds_total=len(urls))
+
+    async with runtime.sessionmaker() as db:
+        for feed_index, url in enumerate(urls):
             try:
-                parsed = await fetch_rss(url)
-                items = normalize_feed_items(parsed, source_url=url)
-                for item in items[:max_items_per_feed]:
+                await progress.update(stage="fetching", feed=url, feeds_done=feed_index, fraction=feed_index / len(urls))
+                parsed = await fetch_rss(url, client=runtime.http)
+                items = normalize_feed_items(parsed, source_url=url)[:max_items_per_feed]
+                await progress.update(stage="processing", feed_items=len(items))
+                for item_index, item in enumerate(items):
                     orm = await upsert_trend_item(
                         db,
                         source=item["source"],
@@ -61,7 +69,7 @@ async def _ingest_rss_async(*, urls: List[str], max_items_per_feed: int, run_ai:
                     )
                     if orm.id:
                         # If already existed, SQLAlchemy keeps same id; we count later after commit.
-                        pass
+                        touched.append(orm.id)
 
                     # Score only if needed
                     if run_ai and settings.openai_api_key and orm.ai_score_0_100 is None:
@@ -71,6 +79,7 @@ async def _ingest_rss_async(*, urls: List[str], max_items_per_feed: int, run_ai:
                                 summary=orm.summary or "",
                                 source=orm.source,
                                 url=orm.url,
+                                client=ai_client,
                             )
                             await set_ai_fields(
                                 db,
@@ -79,17 +88,57 @@ async def _ingest_rss_async(*, urls: List[str], max_items_per_feed: int, run_ai:
                                 niche=out.niche,
                                 ai_json=json.dumps(out.__dict__, default=str),
                             )
+                            scored_items.append(orm)
                             scored += 1
                         except Exception as e:  # noqa: BLE001
                             await set_ai_failure(db, orm, error=str(e))
                             errors.append(f"AI score failed for {orm.url}: {e}")
+                            ai_failed += 1
 
                     created += 1
+                    await progress.update(
+                        upserted=created,
+                        scored=scored,
+                        ai_failed=ai_failed,
+                        fraction=(feed_index + (item_index + 1) / len(items)) / len(urls),
+                    )
 
             except Exception as e:  # noqa: BLE001
                 errors.append(f"Fetch failed for {url}: {e}")
+            await progress.update(feeds_done=feed_index + 1, errors=len(errors), fraction=(feed_index + 1) / len(urls))
 
+        await progress.update(stage="finalizing")
+        # Items and their (paid) AI scores are committed on their own, so a failure in the
+        # derived data below cannot roll them back. The nightly canonicalize_niches and
+        # rebuild_trend_rollups tasks repair anything left behind.
         await db.commit()
 
-    publish_event({"type":"ingest_completed","created":created,"updated":updated,"scored":scored,"errors":errors[:5]})
+        if scored_items:
+            try:
+                embedder = OpenAIEmbeddingClient(http_client=runtime.http) if settings.openai_api_key else None
+                await assign_trend_item_niches(db, scored_items, embedder=embedder)
+                await db.commit()
+            except Exception as e:  # noqa: BLE001
+                await db.rollback()
+                logger.exception("niche assignment failed for run %s", run_id)
+                errors.append(f"Niche assignment failed: {e}")
+        try:
+            await refresh_trend_rollups(db, item_ids=touched)
+            await db.commit()
+        except Exception as e:  # noqa: BLE001
+            await db.rollback()
+            logger.exception("rollup refresh failed for run %s", run_id)
+            errors.append(f"Rollup refresh failed: {e}")
+
+    await progress.close(stage="done", errors=len(errors))
+    await publish(
+        {
+            "type": "ingest_completed",
+            "run_id": run_id,
+            "created": created,
+            "updated": updated,
+            "scored": scored,
+            "errors": errors[:5],
+        }
+    )
     return {"created": created, "updated": updated, "scored": scored, "errors": errors[:20]}
@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.worker_runtime import runtime
+from app.services.analytics_export import export_analytics
+from app.services.embeddings import OpenAIEmbeddingClient
+from app.services.niches import backfill_trend_item_niches, embed_missing_centroids
+from app.services.render_cache import evict_render_cache
+from app.services.snapshot_storage import apply_snapshot_retention, ensure_snapshot_partitions
+from app.services.trend_rollups import refresh_trend_rollups
+
+
+@celery_app.task(name="snapshot_maintenance")
+def snapshot_maintenance_task() -> dict:
+    """Create upcoming snapshot partitions and roll up / drop expired raw snapshots."""
+    return runtime.run(_snapshot_maintenance_async())
+
+
+async def _snapshot_maintenance_async() -> dict:
+    async with runtime.engine.begin() as conn:
+        partitions = await ensure_snapshot_partitions(conn)
+
+    async with runtime.sessionmaker() as db:
+        stats = await apply_snapshot_retention(db)
+        await db.commit()
+
+    return {"partitions": partitions, **stats}
+
+
+@celery_app.task(name="design_cache_maintenance")
+def design_cache_maintenance_task() -> dict:
+    """Evict idle / overflow render-cache entries and their unreferenced stored images."""
+    return runtime.run(_design_cache_maintenance_async())
+
+
+async def _design_cache_maintenance_async() -> dict:
+    async with runtime.sessionmaker() as db:
+        stats = await evict_render_cache(db)
+        await db.commit()
+    return stats
+
+
+@celery_app.task(name="analytics_export")
+def analytics_export_task() -> dict:
+    """Append new snapshot, score and trend-item rows to the partitioned Parquet export."""
+    return runtime.run(_analytics_export_async())
+
+
+async def _analytics_export_async() -> dict:
+    # Read-only and long-running: keep it off the primary when a replica exists.
+    async with runtime.read_sessionmaker() as db:
+        return await export_analytics(db)
+
+
+@celery_app.task(name="rebuild_trend_rollups")
+def rebuild_trend_rollups_task() -> dict:
+    """Rebuild the analytics rollups from trend_items (repairs drift from out-of-band edits)."""
+    return runtime.run(_rebuild_trend_rollups_async())
+
+
+async def _rebuild_trend_rollups_async() -> dict:
+    async with runtime.sessionmaker() as db:
+        stats = await refresh_trend_rollups(db, full=True)
+        await db.commit()
+    return stats
+
+
+@celery_app.task(name="canonicalize_niches")
+def canonicalize_niches_task() -> dict:
+    """Canonicalize trend items scored before (or without) niche canonicalization."""
+    return runtime.run(_canonicalize_niches_async())
+
+
+async def _canonicalize_niches_async() -> dict:
+    embedder = OpenAIEmbeddingClient(http_client=runtime.http) if settings.openai_api_key else None
+    async with runtime.sessionmaker() as db:
+        centroids = 0
+        if embedder is not None:
+            centroids = await embed_missing_centroids(db, embedder)
+            await db.commit()
+        stats = await backfill_trend_item_niches(db, embedder=embedder)
+    return {"centroids": centroids, **stats}
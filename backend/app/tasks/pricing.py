@@ -0,0 +1,16 @@
+from __future__ import annotations
+
+from app.core.celery_app import celery_app
+from app.core.worker_runtime import runtime
+from app.services.batch_pricing import reprice_catalog
+
+
+@celery_app.task(name="reprice_catalog")
+def reprice_catalog_task(*, chunk_size: int = 5_000) -> dict:
+    """Recompute price recommendations for the whole catalog in one vectorized pass."""
+    return runtime.run(_reprice_catalog_async(chunk_size=chunk_size))
+
+
+async def _reprice_catalog_async(*, chunk_size: int) -> dict:
+    async with runtime.sessionmaker() as db:
+        return await reprice_catalog(db, chunk_size=chunk_size)
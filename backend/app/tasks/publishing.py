@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import logging
+from functools import partial
+from typing import List
+
+from redis.exceptions import LockError
+
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.events import publish_event
+from app.core.worker_runtime import runtime
+from app.integrations.shopify_bulk import ShopifyBulkError
+from app.services.printful_catalog import load_catalog, refresh_catalog, save_catalog
+from app.services.publishing import (
+    PublishPipeline,
+    PublishStats,
+    awaiting_shopify_job_ids,
+    build_bulk_client,
+    build_clients,
+    build_printful_client,
+    sync_shopify_bulk,
+)
+
+logger = logging.getLogger(__name__)
+
+SHOPIFY_BULK_LOCK_PREFIX = "shopify_bulk_lock:"
+
+
+@celery_app.task(name="publish_designs")
+def publish_designs_task(*, job_ids: List[int]) -> dict:
+    """Publish queued PublishJobs, paced by provider rate limits; emits `publish_progress` events."""
+    return runtime.run(_publish_designs_async(job_ids=job_ids))
+
+
+async def _publish_designs_async(*, job_ids: List[int]) -> dict:
+    bulk = settings.shopify_sync_mode == "bulk"
+    printful, shopify = build_clients(runtime.http)
+    pipeline = PublishPipeline(
+        runtime.sessionmaker,
+        printful,
+        shopify,
+        on_progress=partial(publish_event, client=runtime.redis),
+        shopify_step=not bulk,
+    )
+    stats = await pipeline.run(job_ids)
+    if bulk:
+        # Jobs now wait in `awaiting_shopify`; one serialized task drains them per shop.
+        sync_shopify_drafts_task.delay()
+    return {"jobs": len(job_ids), "done": stats.done, "failed": stats.failed, "errors": stats.errors[:20]}
+
+
+@celery_app.task(name="sync_shopify_drafts", bind=True, max_retries=5)
+def sync_shopify_drafts_task(self) -> dict:
+    """Create Shopify drafts for every `awaiting_shopify` job with bulk operations.
+
+    Only one sync runs per shop (Redis lock). A busy shop or a failed bulk
+    operation leaves the jobs waiting and retries later; beat also runs this
+    task periodically, so nothing is stranded once retries run out.
+    """
+    result = runtime.run(_sync_shopify_drafts_async())
+    if result.get("retry"):
+        raise self.retry(countdown=settings.shopify_bulk_retry_s)
+    return result
+
+
+async def _sync_shopify_drafts_async() -> dict:
+    async with runtime.sessionmaker() as db:
+        if not await awaiting_shopify_job_ids(db, limit=1):
+            return {"done": 0, "failed": 0, "errors": []}
+    lock = runtime.redis.lock(
+        f"{SHOPIFY_BULK_LOCK_PREFIX}{settings.shopify_shop_domain}", timeout=settings.shopify_bulk_lock_timeout_s
+    )
+    if not await lock.acquire(blocking=False):
+        return {"retry": True, "reason": "another bulk sync is running for this shop"}
+    client = build_bulk_client(runtime.http)
+    on_progress = partial(publish_event, client=runtime.redis)
+    totals = PublishStats()
+    try:
+        while True:
+            async with runtime.sessionmaker() as db:
+                job_ids = await awaiting_shopify_job_ids(db, limit=settings.shopify_bulk_max_jobs)
+                if not job_ids:
+                    break
+                stats = await sync_shopify_bulk(db, client, job_ids, on_progress=on_progress)
+            totals.done += stats.done
+            totals.failed += stats.failed
+            totals.errors.extend(stats.errors)
+            # Jobs sync_shopify_bulk could not load would otherwise be selected forever.
+            if len(job_ids) < settings.shopify_bulk_max_jobs or not (stats.done or stats.failed):
+                break
+    except ShopifyBulkError as e:
+        logger.warning("shopify bulk sync failed, retrying later: %s", e)
+        return {"retry": True, "reason": str(e), "done": totals.done, "failed": totals.failed}
+    finally:
+        try:
+            await lock.release()
+        except LockError:
+            pass  # expired; another sync may already hold it
+    return {"done": totals.done, "failed": totals.failed, "errors": totals.errors[:20]}
+
+
+@celery_app.task(name="refresh_printful_catalog")
+def refresh_printful_catalog_task() -> dict:
+    """Conditionally refresh the shared Printful catalog snapshot."""
+    return runtime.run(_refresh_printful_catalog_async())
+
+
+async def _refresh_printful_catalog_async() -> dict:
+    current = await load_catalog()
+    catalog, stats = await refresh_catalog(
+        build_printful_client(runtime.http), current, concurrency=settings.printful_catalog_refresh_concurrency
+    )
+    if current is None or not stats.unchanged or stats.fetched or stats.revalidated:
+        await save_catalog(catalog)
+    return {"products": stats.products, "variants": len(catalog.variants), **vars(stats)}
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta
+from typing import Optional
+
+from app.core.celery_app import celery_app
+from app.core.events import publish_event
+from app.core.worker_runtime import runtime
+from app.services.batch_trend_scoring import score_all_products
+
+
+@celery_app.task(name="rescore_products")
+def rescore_products_task(*, since_days: Optional[int] = None, chunk_size: int = 50_000) -> dict:
+    """Re-score every product in one vectorized pass per chunk."""
+    since = datetime.utcnow() - timedelta(days=since_days) if since_days else None
+    return runtime.run(_rescore_products_async(since=since, chunk_size=chunk_size))
+
+
+async def _rescore_products_async(*, since: Optional[datetime], chunk_size: int) -> dict:
+    async with runtime.sessionmaker() as db:
+        result = await score_all_products(db, chunk_size=chunk_size, since=since)
+    await publish_event({"type": "scoring_completed", **result}, client=runtime.redis)
+    return result
@@ -0,0 +1,200 @@
+"""Latency of 500-row list responses: FastAPI default vs. Pydantic dump_json vs. row tuples + orjson.
+
+Runs in-process over ASGI (no network, no Postgres): each mode's handler gets the
+same 500 rows from a fake session, so only row materialization, validation and
+serialization differ. Bodies are checked to decode to identical JSON.
+
+    python benchmarks/bench_json_responses.py --rows 500 --requests 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+import httpx
+from fastapi import FastAPI, Response
+from pydantic import TypeAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core import fast_json  # noqa: E402
+from app.crud.product import PRODUCT_FIELDS, SNAPSHOT_FIELDS, TREND_FIELDS, list_product_rows  # noqa: E402
+from app.crud.trend_item import TREND_ITEM_OUT_FIELDS, list_trend_item_rows  # noqa: E402
+from app.db.models import MarketplaceProduct, ProductSnapshot, TrendItem, TrendScore  # noqa: E402
+from app.routers.products import ProductRead, ProductSnapshotRead, TrendScoreRead  # noqa: E402
+from app.schemas.trend_item import TrendItemOut  # noqa: E402
+
+
+def make_trend_rows(n: int, rng: random.Random) -> List[tuple]:
+    base = datetime(2024, 1, 1)
+    return [
+        (
+            i,
+            "news.google.com",
+            "https://news.google.com/rss",
+            f"Trend headline number {i} about retro cats",
+            f"https://example.com/trend/{i}",
+            "A short summary " * 8,
+            base + timedelta(minutes=i, microseconds=rng.randrange(1_000_000)),
+            rng.randrange(101),
+            "retro cats",
+            rng.randrange(1, 50),
+            "done",
+            None,
+        )
+        for i in range(n)
+    ]
+
+
+def make_product_rows(n: int, rng: random.Random) -> List[tuple]:
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(n):
+        product = (i, "etsy", f"ext-{i}", f"https://etsy.example/{i}", f"Retro cat tee {i}", "desc", None, "cat,retro", "cats")
+        snap = (base + timedelta(hours=i), round(rng.uniform(15, 35), 2), "USD", rng.randrange(1, 5000), rng.randrange(900), 4.6, 12.5)
+        trend = (round(rng.uniform(0, 100), 3), 0.5, 0.25, None, "c1", "cats")
+        rows.append(product + snap + trend)
+    return rows
+
+
+class _Result:
+    def __init__(self, rows: List[tuple], objects: List[Any]):
+        self._rows, self._objects = rows, objects
+
+    def tuples(self):
+        return iter(self._rows)
+
+    def scalars(self):
+        return self
+
+    def all(self):
+        return self._objects
+
+
+class FakeSession:
+    """Answers every execute() with the same prepared rows (the SQL itself isn't measured)."""
+
+    def __init__(self, rows: List[tuple], objects: List[Any] | None = None):
+        self.rows, self.objects = rows, objects or []
+
+    async def execute(self, _stmt):
+        return _Result(self.rows, self.objects)
+
+
+def build_app(n: int) -> FastAPI:
+    rng = random.Random(0)
+    trend_rows = make_trend_rows(n, rng)
+    product_rows = make_product_rows(n, rng)
+    trend_session = FakeSession(trend_rows)
+
+    def trend_objects() -> List[TrendItem]:
+        return [TrendItem(**dict(zip(TREND_ITEM_OUT_FIELDS, r))) for r in trend_rows]
+
+    def product_objects() -> List[ProductRead]:
+        # Mirrors the default /products handler: ORM rows validated into nested models.
+        out = []
+        for r in product_rows:
+            p = MarketplaceProduct(**dict(zip(PRODUCT_FIELDS, r[:9])))
+            snap = ProductSnapshot(**dict(zip(SNAPSHOT_FIELDS, r[9:16])))
+            trend = TrendScore(**dict(zip(TREND_FIELDS, r[16:])))
+            out.append(
+                ProductRead(
+                    id=p.id, marketplace=p.marketplace, external_id=p.external_id, url=p.url, title=p.title,
+                    description=p.description, image_url=p.image_url, tags=p.tags, niche=p.niche,
+                    latest_snapshot=ProductSnapshotRead.model_validate(snap),
+                    latest_trend=TrendScoreRead.model_validate(trend),
+                )
+            )
+        return out
+
+    trend_adapter = TypeAdapter(List[TrendItemOut])
+    product_adapter = TypeAdapter(List[ProductRead])
+    app = FastAPI()
+
+    @app.get("/fastapi/trends", response_model=List[TrendItemOut])
+    async def trends_default():
+        return trend_objects()
+
+    @app.get("/pydantic/trends")
+    async def trends_pydantic():
+        return Response(trend_adapter.dump_json(trend_adapter.validate_python(trend_objects(), from_attributes=True)), media_type="application/json")
+
+    @app.get("/fast/trends")
+    async def trends_fast():
+        return Response(fast_json.dumps(await list_trend_item_rows(trend_session, limit=n)), media_type="application/json")
+
+    @app.get("/fastapi/products", response_model=List[ProductRead])
+    async def products_default():
+        return product_objects()
+
+    @app.get("/pydantic/products")
+    async def products_pydantic():
+        return Response(product_adapter.dump_json(product_adapter.validate_python(product_objects(), from_attributes=True)), media_type="application/json")
+
+    @app.get("/fast/products")
+    async def products_fast():
+        rows = await list_product_rows(FakeSession(product_rows), limit=n)
+        return Response(fast_json.dumps(rows), media_type="application/json")
+
+    return app
+
+
+def percentile(samples: List[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def bench(client: httpx.AsyncClient, path: str, requests: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        (await client.get(path)).raise_for_status()
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        resp = await client.get(path)
+        samples.append((time.perf_counter() - start) * 1000)
+        resp.raise_for_status()
+    return {
+        "p50": percentile(samples, 0.50),
+        "p99": percentile(samples, 0.99),
+        "mean": statistics.fmean(samples),
+        "bytes": len(resp.content),
+        "body": resp.content,
+    }
+
+
+async def main(rows: int, requests: int, warmup: int) -> None:
+    app = build_app(rows)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for resource in ("trends", "products"):
+            results = {mode: await bench(client, f"/{mode}/{resource}", requests, warmup) for mode in ("fastapi", "pydantic", "fast")}
+            reference = json.loads(results["fastapi"]["body"])
+            print(f"{resource} ({rows} rows, {requests} requests)")
+            for mode, r in results.items():
+                same = "same JSON" if json.loads(r["body"]) == reference else "JSON DIFFERS"
+                speedup = results["fastapi"]["p50"] / r["p50"]
+                print(
+                    f"  {mode:<9} p50 {r['p50']:7.2f} ms  p99 {r['p99']:7.2f} ms  mean {r['mean']:7.2f} ms  "
+                    f"{r['bytes']:>7} B  x{speedup:4.1f}  {same}"
+                )
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--warmup", type=int, default=20)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    asyncio.run(main(args.rows, args.requests, args.warmup))
@@ -0,0 +1,58 @@
+import argparse
+import asyncio
+from datetime import date
+
+from app.db.session import AsyncReadSessionLocal
+from app.services.analytics_export import DATASETS, AnalyticsStore, export_analytics
+
+
+async def _export(args: argparse.Namespace) -> None:
+    async with AsyncReadSessionLocal() as db:
+        counts = await export_analytics(db, root=args.root, datasets=args.datasets or None)
+    for name, rows in counts.items():
+        print(f"{name}: {rows} new rows")
+
+
+def _scan(args: argparse.Namespace) -> None:
+    store = AnalyticsStore(args.root)
+    table = store.scan(
+        args.dataset,
+        columns=args.columns.split(",") if args.columns else None,
+        since=date.fromisoformat(args.since) if args.since else None,
+        until=date.fromisoformat(args.until) if args.until else None,
+        marketplace=args.marketplace,
+        latest=args.latest,
+    )
+    print(f"{table.num_rows} rows")
+    print(table.slice(0, args.head).to_pandas() if args.pandas else table.slice(0, args.head))
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Incremental Parquet analytics export and local queries.")
+    parser.add_argument("--root", default=None, help="Export root (default: ANALYTICS_EXPORT_DIR)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    exp = sub.add_parser("export", help="Append rows that are new since the last export")
+    exp.add_argument("datasets", nargs="*", help=f"Datasets to export: {', '.join(DATASETS)} (default: all)")
+
+    scan = sub.add_parser("scan", help="Read an exported dataset without touching Postgres")
+    scan.add_argument("dataset", choices=list(DATASETS))
+    scan.add_argument("--columns", help="Comma-separated column list")
+    scan.add_argument("--since", help="First date (YYYY-MM-DD, inclusive)")
+    scan.add_argument("--until", help="Last date (YYYY-MM-DD, exclusive)")
+    scan.add_argument("--marketplace")
+    scan.add_argument("--latest", action="store_true", help="One row per id (trend_items)")
+    scan.add_argument("--head", type=int, default=20)
+    scan.add_argument("--pandas", action="store_true", help="Print as a pandas DataFrame")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    unknown = set(getattr(args, "datasets", None) or []) - DATASETS.keys()
+    if unknown:
+        raise SystemExit(f"Unknown datasets: {', '.join(sorted(unknown))}")
+    if args.command == "export":
+        asyncio.run(_export(args))
+    else:
+        _scan(args)
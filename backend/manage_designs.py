@@ -0,0 +1,77 @@
+import argparse
+import asyncio
+import time
+
+from app.db.models import MarketplaceProduct
+from app.db.session import AsyncSessionLocal
+from app.services.design_generation import DesignRequest, create_pending_designs
+from app.services.renderers import StubRenderer, render_many
+
+
+async def loadtest(count: int, *, batch_size: int, concurrency: int, latency_s: float, per_item_s: float) -> None:
+    """Render `count` prompts in-process with the stub renderer and report throughput."""
+    renderer = StubRenderer(max_batch_size=batch_size, latency_s=latency_s, per_item_latency_s=per_item_s)
+    reqs = [DesignRequest(prompt=f"load test design {i}") for i in range(count)]
+    start = time.perf_counter()
+    results = await render_many(renderer, reqs, max_concurrency=concurrency)
+    elapsed = time.perf_counter() - start
+    failed = sum(isinstance(r, BaseException) for r in results)
+    print(
+        f"{count} renders in {elapsed:.2f}s ({count / elapsed:.1f}/s), "
+        f"{renderer.calls} backend calls, {failed} failed"
+    )
+
+
+async def enqueue(product_id: int, count: int) -> None:
+    """Queue `count` design jobs for `product_id` through the Celery pipeline."""
+    from app.tasks.designs import render_designs_task
+
+    if count <= 0:
+        print("Nothing to queue (--count must be positive).")
+        return
+    async with AsyncSessionLocal() as session:
+        if await session.get(MarketplaceProduct, product_id) is None:
+            print(f"No product with id {product_id}; nothing queued.")
+            return
+        assets = await create_pending_designs(
+            session, [(product_id, DesignRequest(prompt=f"load test design {i}")) for i in range(count)]
+        )
+        await session.commit()
+    if not assets:
+        print("No design jobs were created.")
+        return
+    render_designs_task.delay(asset_ids=[a.id for a in assets])
+    print(f"Queued {len(assets)} design jobs (ids {assets[0].id}..{assets[-1].id}).")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the design rendering pipeline.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    lt = sub.add_parser("loadtest", help="Render in-process with the stub renderer")
+    lt.add_argument("--count", type=int, default=200)
+    lt.add_argument("--batch-size", type=int, default=8, help="Prompts per backend call")
+    lt.add_argument("--concurrency", type=int, default=4, help="Backend calls in flight")
+    lt.add_argument("--latency", type=float, default=0.5, help="Simulated seconds per backend call")
+    lt.add_argument("--per-item", type=float, default=0.05, help="Simulated seconds per image")
+
+    eq = sub.add_parser("enqueue", help="Create pending designs and enqueue render_designs")
+    eq.add_argument("product_id", type=int)
+    eq.add_argument("--count", type=int, default=100)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    if args.command == "loadtest":
+        asyncio.run(
+            loadtest(
+                args.count,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                latency_s=args.latency,
+                per_item_s=args.per_item,
+            )
+        )
+    else:
+        asyncio.run(enqueue(args.product_id, args.count))
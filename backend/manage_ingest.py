@@ -1,64 +1,101 @@
+import argparse
 import asyncio
-from datetime import datetime
-
-from sqlalchemy import select
+from typing import Iterable, List
 
+from app.core.config import settings
+from app.core.events import publish_event
 from app.db.session import AsyncSessionLocal
-from app.db.models import MarketplaceProduct, ProductSnapshot
-from app.scrapers import AmazonScraper, EtsyScraper
-from app.services import score_listing
-from app.crud import create_trend
+from app.scrapers import AmazonScraper, EtsyScraper, MarketplaceLimits, RawListing, ScrapeOrchestrator
+from app.scrapers.http_cache import MODES, ResponseCache
+from app.services.ingest_writer import BulkIngestWriter
+
+
+async def ingest_keywords(
+    keywords: Iterable[str],
+    limit: int = 10,
+    *,
+    concurrency: int | None = None,
+    min_interval_s: float | None = None,
+    cache_mode: str | None = None,
+) -> int:
+    """Scrape every marketplace for every keyword concurrently and store the results."""
+    default_limits = None
+    if concurrency is not None or min_interval_s is not None:
+        default_limits = MarketplaceLimits(
+            concurrency=concurrency if concurrency is not None else settings.scraper_concurrency_per_marketplace,
+            min_interval_s=min_interval_s if min_interval_s is not None else settings.scraper_min_interval_s,
+        )
+    # One cache for all scrapers so size accounting and eviction see every write.
+    cache = ResponseCache(mode=cache_mode)
+    orchestrator = ScrapeOrchestrator(
+        [AmazonScraper(http_cache=cache), EtsyScraper(http_cache=cache)], default_limits=default_limits
+    )
+
+    writer: BulkIngestWriter | None = None
+    try:
+        async with AsyncSessionLocal() as session:
+            writer = BulkIngestWriter(session)
+
+            async def sink(batch: List[RawListing]) -> None:
+                await writer.write(batch)
+
+            stats = await orchestrator.run(keywords, limit=limit, sink=sink)
+    finally:
+        await orchestrator.aclose()
+        # Every chunk is committed as it is written, so announce even a partial run;
+        # this also clears the API response cache for /products.
+        if writer is not None and writer.stats.chunks:
+            await publish_event(
+                {
+                    "type": "products_ingested",
+                    "listings": writer.stats.listings,
+                    "products": writer.stats.products,
+                }
+            )
+
+    for err in stats.errors:
+        print(f"WARN: {err}")
+    return stats.listings
 
 
 async def ingest_keyword(keyword: str, limit: int = 10) -> int:
-    async with AsyncSessionLocal() as session:
-        scrapers = [AmazonScraper(), EtsyScraper()]
-        created = 0
-
-        for scraper in scrapers:
-            async for listing in scraper.search_trending(keyword, limit=limit):
-                # Store or update product (simplified)
-                prod_stmt = select(MarketplaceProduct).filter(
-                    MarketplaceProduct.marketplace == listing.marketplace,
-                    MarketplaceProduct.external_id == listing.product_id,
-                )
-                res = await session.execute(prod_stmt)
-                product = res.scalar_one_or_none()
-                if not product:
-                    product = MarketplaceProduct(
-                        marketplace=listing.marketplace,
-                        external_id=listing.product_id,
-                        url=listing.url,
-                        title=listing.title,
-                        image_url=listing.image_url,
-                    )
-                    session.add(product)
-                    await session.flush()
-
-                snapshot = ProductSnapshot(
-                    product_id=product.id,
-                    captured_at=datetime.utcnow(),
-                    price=listing.price,
-                    currency=listing.currency,
-                    rank=None,
-                    review_count=None,
-                    rating=None,
-                    estimated_sales=None,
-                )
-                session.add(snapshot)
-
-                trend_in = score_listing(listing)
-                await create_trend(session, trend_in)
-                created += 1
-
-        await session.commit()
-        return created
-
-
-async def _run():
-    created = await ingest_keyword("t-shirt", limit=10)
+    return await ingest_keywords([keyword], limit=limit)
+
+
+def _read_keywords(path: str) -> List[str]:
+    with open(path, encoding="utf-8") as fh:
+        lines = (line.strip() for line in fh)
+        return [line for line in lines if line and not line.startswith("#")]
+
+
+async def _run(args: argparse.Namespace):
+    keywords = list(args.keywords)
+    if args.keywords_file:
+        keywords.extend(_read_keywords(args.keywords_file))
+    if not keywords:
+        keywords = ["t-shirt"]
+    created = await ingest_keywords(
+        keywords,
+        limit=args.limit,
+        concurrency=args.concurrency,
+        min_interval_s=args.min_interval,
+        cache_mode=args.cache_mode,
+    )
     print(f"Ingested {created} demo trends into the database.")
 
 
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Scrape marketplaces for keywords and store trends.")
+    parser.add_argument("keywords", nargs="*", help="Keywords to search (default: t-shirt)")
+    parser.add_argument("-f", "--keywords-file", help="File with one keyword per line ('#' comments allowed)")
+    parser.add_argument("--limit", type=int, default=10, help="Max listings per marketplace per keyword")
+    parser.add_argument("--concurrency", type=int, default=None, help="Concurrent searches per marketplace")
+    parser.add_argument("--min-interval", type=float, default=None, help="Seconds between searches per marketplace")
+    parser.add_argument(
+        "--cache-mode", choices=MODES, default=None, help="HTTP response cache mode (default: SCRAPER_CACHE_MODE)"
+    )
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(_run())
+    asyncio.run(_run(_parse_args()))
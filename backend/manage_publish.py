@@ -0,0 +1,138 @@
+import argparse
+import asyncio
+import tempfile
+import time
+from typing import List
+
+import httpx
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.db.models import DesignAsset, MarketplaceProduct, PublishJob
+from app.db.session import Base, build_sessionmaker
+from app.integrations import PrintfulClient, ShopifyClient
+from app.integrations.fakes import FAKE_PRINTFUL_URL, FAKE_SHOPIFY_URL, FakePrintful, FakeProviders, FakeShopify
+from app.integrations.rate_limit import LeakyBucketLimiter, WindowLimiter
+from app.integrations.shopify_bulk import ShopifyBulkClient
+from app.services.publishing import PublishPipeline, sync_shopify_bulk
+
+_TABLES = [MarketplaceProduct.__table__, DesignAsset.__table__, PublishJob.__table__]
+
+
+async def _seed(sessionmaker: async_sessionmaker[AsyncSession], count: int) -> List[int]:
+    async with sessionmaker() as db:
+        jobs = []
+        for i in range(count):
+            product = MarketplaceProduct(
+                marketplace="Simulated", external_id=str(i), url=f"https://example.com/p/{i}", title=f"Design {i}"
+            )
+            design = DesignAsset(
+                product=product, prompt=f"design {i}", provider="stub", status="ready", image_url=f"https://example.com/{i}.png"
+            )
+            db.add_all([product, design])
+            await db.flush()
+            job = PublishJob(
+                batch_id="simulated",
+                product_id=product.id,
+                design_asset_id=design.id,
+                printful_product_id=71,
+                printful_variant_id=4012,
+                status="pending",
+                attempts=0,
+            )
+            db.add(job)
+            jobs.append(job)
+        await db.commit()
+        return [job.id for job in jobs]
+
+
+async def simulate(
+    count: int,
+    *,
+    concurrency: int,
+    shopify_bucket: int,
+    shopify_leak_rate: float,
+    printful_limit: int,
+    printful_window_s: float,
+    failure_rate: float,
+    latency_s: float,
+    shopify_bulk: bool = False,
+) -> None:
+    """Publish `count` fake designs through `PublishPipeline` against the provider fakes.
+
+    Jobs live in a throwaway SQLite database (requires aiosqlite), so the run
+    exercises the same job bookkeeping, retries and resumption as the worker.
+    """
+    fakes = FakeProviders(
+        printful=FakePrintful(limit=printful_limit, window_s=printful_window_s, latency_s=latency_s, failure_rate=failure_rate),
+        shopify=FakeShopify(bucket_size=shopify_bucket, leak_rate=shopify_leak_rate, latency_s=latency_s, failure_rate=failure_rate),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp}/publish.db")
+        async with engine.begin() as conn:
+            await conn.run_sync(lambda sync_conn: Base.metadata.create_all(sync_conn, tables=_TABLES))
+        sessionmaker = build_sessionmaker(engine)
+        job_ids = await _seed(sessionmaker, count)
+
+        async with httpx.AsyncClient(transport=fakes.transport()) as client:
+            printful = PrintfulClient(
+                "fake", base_url=FAKE_PRINTFUL_URL, http_client=client, limiter=WindowLimiter(printful_limit, printful_window_s)
+            )
+            shopify = ShopifyClient(
+                "shop.fake",
+                "fake",
+                base_url=FAKE_SHOPIFY_URL,
+                http_client=client,
+                limiter=LeakyBucketLimiter(shopify_bucket, shopify_leak_rate),
+            )
+            pipeline = PublishPipeline(
+                sessionmaker, printful, shopify, concurrency=concurrency, max_attempts=3, shopify_step=not shopify_bulk
+            )
+            start = time.perf_counter()
+            stats = await pipeline.run(job_ids)
+            if shopify_bulk:
+                bulk = ShopifyBulkClient("shop.fake", "fake", base_url=FAKE_SHOPIFY_URL, http_client=client)
+                async with sessionmaker() as db:
+                    bulk_stats = await sync_shopify_bulk(db, bulk, job_ids)
+                stats.failed += bulk_stats.failed
+            elapsed = time.perf_counter() - start
+        await engine.dispose()
+
+    for name, fake in (("printful", fakes.printful), ("shopify", fakes.shopify)):
+        print(
+            f"{name}: {fake.stats.requests} requests, {fake.stats.throttled} throttled (429), "
+            f"{fake.stats.injected_failures} injected failures, {len(fake.products)} products"
+        )
+    print(f"{count} designs in {elapsed:.1f}s, {stats.failed} failed")
+    for err in stats.errors[:10]:
+        print(f"  {err}")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Simulate bulk publishing against rate-limited provider fakes.")
+    parser.add_argument("--count", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--shopify-bucket", type=int, default=40)
+    parser.add_argument("--shopify-leak-rate", type=float, default=2.0, help="Calls/s (Shopify Plus: 20)")
+    parser.add_argument("--printful-limit", type=int, default=120)
+    parser.add_argument("--printful-window", type=float, default=60.0)
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="Share of creates failing after being applied")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated seconds per API call")
+    parser.add_argument("--shopify-bulk", action="store_true", help="Create Shopify drafts in one GraphQL bulk operation")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+    asyncio.run(
+        simulate(
+            args.count,
+            concurrency=args.concurrency,
+            shopify_bucket=args.shopify_bucket,
+            shopify_leak_rate=args.shopify_leak_rate,
+            printful_limit=args.printful_limit,
+            printful_window_s=args.printful_window,
+            failure_rate=args.failure_rate,
+            latency_s=args.latency,
+            shopify_bulk=args.shopify_bulk,
+        )
+    )
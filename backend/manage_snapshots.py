@@ -0,0 +1,28 @@
+import argparse
+import asyncio
+
+from app.db.session import engine
+from app.services.snapshot_storage import SNAPSHOT_TABLE, convert_to_partitioned
+
+
+async def partition() -> None:
+    """Convert a plain `product_snapshots` table (pre-partitioning deployments) in one transaction."""
+    async with engine.begin() as conn:
+        moved = await convert_to_partitioned(conn)
+    await engine.dispose()
+    if moved < 0:
+        print(f"{SNAPSHOT_TABLE} is already partitioned (or does not exist); nothing to do.")
+    else:
+        print(f"Converted {SNAPSHOT_TABLE} to monthly partitions ({moved} rows moved).")
+
+
+def _parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Snapshot table maintenance.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("partition", help=f"Rebuild an unpartitioned {SNAPSHOT_TABLE} table as a partitioned one")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    _parse_args()
+    asyncio.run(partition())
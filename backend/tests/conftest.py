@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import List
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.models import DesignAsset, MarketplaceProduct, PublishJob
+from app.db.session import build_sessionmaker
+
+PUBLISH_TABLES = [MarketplaceProduct.__table__, DesignAsset.__table__, PublishJob.__table__]
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def sessionmaker(tmp_path):
+    """Sessions on a throwaway SQLite file holding the publishing tables."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(lambda sync_conn: PublishJob.metadata.create_all(sync_conn, tables=PUBLISH_TABLES))
+    yield build_sessionmaker(engine)
+    await engine.dispose()
+
+
+@pytest.fixture
+def seed_publish_jobs(sessionmaker):
+    """Factory inserting `count` products, each with one design and a pending PublishJob."""
+    return partial(_seed_publish_jobs, sessionmaker)
+
+
+async def _seed_publish_jobs(
+    sessionmaker, count: int, *, image_url: str = "https://cdn.example/{i}.png", status: str = "ready"
+) -> List[int]:
+    async with sessionmaker() as db:
+        jobs = []
+        for i in range(count):
+            product = MarketplaceProduct(
+                marketplace="Etsy", external_id=f"ext-{uuid4().hex}", url=f"https://etsy.example/{i}", title=f"Design {i}", tags="cats, retro"
+            )
+            design = DesignAsset(
+                product=product, prompt=f"prompt {i}", provider="stub", status=status, image_url=image_url.format(i=i)
+            )
+            db.add_all([product, design])
+            await db.flush()
+            job = PublishJob(
+                batch_id="batch-1",
+                product_id=product.id,
+                design_asset_id=design.id,
+                printful_product_id=71,
+                printful_variant_id=4012,
+                status="pending",
+                attempts=0,
+            )
+            db.add(job)
+            jobs.append(job)
+        await db.commit()
+        return [job.id for job in jobs]
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from app.db.models import PublishJob
+from app.integrations import PrintfulClient, ShopifyClient
+from app.integrations.fakes import FAKE_PRINTFUL_URL, FAKE_SHOPIFY_URL, FakePrintful, FakeProviders, FakeShopify, _json
+from app.integrations.rate_limit import LeakyBucketLimiter, WindowLimiter
+from app.integrations.shopify_bulk import ShopifyBulkClient, ShopifyBulkError
+from app.services.publishing import (
+    AWAITING_SHOPIFY,
+    PublishPipeline,
+    awaiting_shopify_job_ids,
+    design_external_id,
+    sync_shopify_bulk,
+)
+
+pytestmark = pytest.mark.anyio
+
+
+def _clients(http: httpx.AsyncClient, *, max_attempts: int = 3):
+    printful = PrintfulClient(
+        "key", base_url=FAKE_PRINTFUL_URL, http_client=http, limiter=WindowLimiter(1000, 60), max_attempts=max_attempts
+    )
+    shopify = ShopifyClient(
+        "shop.fake",
+        "token",
+        base_url=FAKE_SHOPIFY_URL,
+        http_client=http,
+        limiter=LeakyBucketLimiter(1000, 1000),
+        max_attempts=max_attempts,
+    )
+    return printful, shopify
+
+
+async def _jobs(sessionmaker, job_ids):
+    async with sessionmaker() as db:
+        res = await db.execute(select(PublishJob).where(PublishJob.id.in_(job_ids)).order_by(PublishJob.id))
+        return list(res.scalars().all())
+
+
+async def _run(sessionmaker, job_ids, fakes: FakeProviders, *, handler=None, events=None, **kwargs):
+    async with httpx.AsyncClient(transport=httpx.MockTransport(handler or fakes.handle)) as http:
+        printful, shopify = _clients(http, max_attempts=kwargs.pop("client_attempts", 3))
+
+        async def on_progress(event: dict) -> None:
+            if events is not None:
+                events.append(event)
+
+        pipeline = PublishPipeline(
+            sessionmaker, printful, shopify, concurrency=4, retry_backoff_s=0, on_progress=on_progress, **kwargs
+        )
+        return await pipeline.run(job_ids)
+
+
+async def test_publishes_every_job_once(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(6)
+    fakes = FakeProviders()
+    events: list = []
+
+    stats = await _run(sessionmaker, job_ids, fakes, events=events, max_attempts=3)
+
+    assert (stats.done, stats.failed) == (6, 0)
+    jobs = await _jobs(sessionmaker, job_ids)
+    assert {j.status for j in jobs} == {"done"}
+    assert all(j.printful_sync_product_id and j.shopify_product_id for j in jobs)
+    assert len(fakes.printful.products) == len(fakes.shopify.products) == 6
+    assert sorted(e["job_id"] for e in events) == sorted(job_ids)
+    assert {e["batch_id"] for e in events} == {"batch-1"}
+
+
+async def test_retry_after_applied_failure_does_not_duplicate(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(3)
+    # Every create is applied and then answered with a 500.
+    fakes = FakeProviders(printful=FakePrintful(failure_rate=1.0))
+
+    stats = await _run(sessionmaker, job_ids, fakes, max_attempts=3)
+
+    assert (stats.done, stats.failed) == (3, 0)
+    assert len(fakes.printful.products) == 3
+    assert [j.attempts for j in await _jobs(sessionmaker, job_ids)] == [2, 2, 2]
+
+
+async def test_retry_exhaustion_fails_job(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(2)
+    fakes = FakeProviders()
+    printful_host = httpx.URL(FAKE_PRINTFUL_URL).host
+
+    async def printful_down(request: httpx.Request) -> httpx.Response:
+        if request.url.host == printful_host:
+            return _json(503, {"code": 503, "error": {"reason": "Unavailable"}})
+        return await fakes.handle(request)
+
+    events: list = []
+    stats = await _run(
+        sessionmaker, job_ids, fakes, handler=printful_down, events=events, max_attempts=3, client_attempts=1
+    )
+
+    assert (stats.done, stats.failed) == (0, 2)
+    jobs = await _jobs(sessionmaker, job_ids)
+    assert [(j.status, j.attempts) for j in jobs] == [("failed", 3), ("failed", 3)]
+    assert all("503" in j.error for j in jobs)
+    assert sorted((e["job_id"], e["status"]) for e in events) == [(i, "failed") for i in sorted(job_ids)]
+
+    # A re-queued job gets a fresh attempt budget.
+    stats = await _run(sessionmaker, job_ids, fakes, max_attempts=3)
+    assert (stats.done, stats.failed) == (2, 0)
+    assert [j.attempts for j in await _jobs(sessionmaker, job_ids)] == [4, 4]
+
+
+async def test_done_jobs_are_skipped(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(2)
+    fakes = FakeProviders()
+    await _run(sessionmaker, job_ids, fakes, max_attempts=3)
+    requests = fakes.printful.stats.requests + fakes.shopify.stats.requests
+
+    stats = await _run(sessionmaker, job_ids + job_ids, fakes, max_attempts=3)
+
+    assert (stats.done, stats.failed) == (0, 0)
+    assert fakes.printful.stats.requests + fakes.shopify.stats.requests == requests
+
+
+async def test_unpublishable_designs_fail_without_provider_calls(sessionmaker, seed_publish_jobs):
+    pending = await seed_publish_jobs(1, status="pending")
+    relative = await seed_publish_jobs(1, image_url="/assets/{i}.png")
+    fakes = FakeProviders()
+
+    stats = await _run(sessionmaker, pending + relative, fakes, max_attempts=3)
+
+    assert (stats.done, stats.failed) == (0, 2)
+    assert fakes.printful.stats.requests == 0
+    assert [j.status for j in await _jobs(sessionmaker, pending + relative)] == ["failed", "failed"]
+
+
+# -- Shopify bulk sync ---------------------------------------------------------
+
+
+def _bulk_fakes() -> FakeProviders:
+    shopify = FakeShopify()
+    shopify.bulk_polls_to_complete = 1
+    return FakeProviders(shopify=shopify)
+
+
+async def _sync(sessionmaker, fakes: FakeProviders, job_ids, events=None):
+    async def on_progress(event: dict) -> None:
+        if events is not None:
+            events.append(event)
+
+    async with httpx.AsyncClient(transport=fakes.transport()) as http:
+        client = ShopifyBulkClient("shop.fake", "token", base_url=FAKE_SHOPIFY_URL, http_client=http)
+        async with sessionmaker() as db:
+            return await sync_shopify_bulk(db, client, job_ids, on_progress=on_progress)
+
+
+async def test_bulk_sync_finishes_awaiting_jobs(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(4)
+    fakes = _bulk_fakes()
+    await _run(sessionmaker, job_ids, fakes, max_attempts=3, shopify_step=False)
+    assert {j.status for j in await _jobs(sessionmaker, job_ids)} == {AWAITING_SHOPIFY}
+    async with sessionmaker() as db:
+        assert await awaiting_shopify_job_ids(db, limit=10) == sorted(job_ids)
+
+    events: list = []
+    stats = await _sync(sessionmaker, fakes, job_ids, events)
+
+    assert (stats.done, stats.failed) == (4, 0)
+    jobs = await _jobs(sessionmaker, job_ids)
+    assert {j.status for j in jobs} == {"done"}
+    assert all(j.shopify_product_id for j in jobs)
+    assert len(fakes.shopify.products) == 4
+    assert events == [
+        {"type": "publish_progress", "batch_id": "batch-1", "stage": "shopify_bulk", "done": 4, "failed": 0}
+    ]
+
+
+async def test_bulk_sync_reuses_existing_drafts(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(3)
+    fakes = _bulk_fakes()
+    await _run(sessionmaker, job_ids, fakes, max_attempts=3, shopify_step=False)
+    first = (await _jobs(sessionmaker, job_ids))[0]
+    # A draft left behind by an interrupted earlier sync.
+    existing = fakes.shopify._create_product("Design", design_external_id(first.design_asset_id), "draft")
+
+    stats = await _sync(sessionmaker, fakes, job_ids)
+
+    assert (stats.done, stats.failed) == (3, 0)
+    assert len(fakes.shopify.products) == 3
+    assert (await _jobs(sessionmaker, job_ids))[0].shopify_product_id == str(existing["id"])
+
+
+async def test_bulk_sync_on_busy_shop_leaves_jobs_awaiting(sessionmaker, seed_publish_jobs):
+    job_ids = await seed_publish_jobs(2)
+    fakes = _bulk_fakes()
+    await _run(sessionmaker, job_ids, fakes, max_attempts=3, shopify_step=False)
+    # Another sync's mutation is still running on the shop.
+    other = fakes.shopify._start("mutation", b"")
+
+    with pytest.raises(ShopifyBulkError, match="already in progress"):
+        await _sync(sessionmaker, fakes, job_ids)
+    assert {j.status for j in await _jobs(sessionmaker, job_ids)} == {AWAITING_SHOPIFY}
+
+    fakes.shopify.operations[other["id"]]["status"] = "COMPLETED"
+    stats = await _sync(sessionmaker, fakes, job_ids)
+    assert (stats.done, stats.failed) == (2, 0)
+    assert len(fakes.shopify.products) == 2
@@ -180,6 +180,12 @@ export default function Page() {
         if (msg?.type === "ingest_started") {
           setIngestMsg(`Ingestion started (${msg.feeds} feeds) …`);
           setIngestStatus("loading");
+        } else if (msg?.type === "ingest_progress") {
+          const eta = msg.eta_s != null ? `, ~${Math.ceil(msg.eta_s)}s left` : "";
+          setIngestMsg(
+            `Ingesting… ${msg.percent}% (feeds ${msg.feeds_done ?? 0}/${msg.feeds_total}, upserted=${msg.upserted ?? 0} scored=${msg.scored ?? 0}${eta})`
+          );
+          setIngestStatus("loading");
         } else if (msg?.type === "ingest_completed") {
           setIngestMsg(`Ingestion complete. created=${msg.created} updated=${msg.updated} scored=${msg.scored}`);
           setIngestStatus("success");